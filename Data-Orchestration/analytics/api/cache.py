@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+
+from dagster import AssetKey, DagsterInstance
+
+
+class ResultCache:
+    """In-memory LRU cache of query results, grouped by the mart they were read from.
+
+    Entries of a mart are dropped with invalidate() when the mart is materialised again.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, mart: str, params: tuple):
+        """Returns the cached result, or None on a miss.
+
+        Args:
+            mart: name of the mart
+            params: hashable query parameters
+        """
+        with self._lock:
+            result = self._entries.get((mart, params))
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((mart, params))
+            self.hits += 1
+            return result
+
+    def put(self, mart: str, params: tuple, result) -> None:
+        """Caches a result, evicting the least recently used entry when full.
+
+        Args:
+            mart: name of the mart
+            params: hashable query parameters
+            result: the query result
+        """
+        with self._lock:
+            self._entries[(mart, params)] = result
+            self._entries.move_to_end((mart, params))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, mart: str) -> int:
+        """Drops every cached result of a mart.
+
+        Args:
+            mart: name of the mart
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == mart]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+
+class MaterialisationWatcher(threading.Thread):
+    """Polls the Dagster instance and invalidates a mart's cached results when it is materialised.
+
+    The storage id of the latest materialisation of each mart is compared between polls, so one
+    query covers all marts and nothing is invalidated while the marts are unchanged.
+    """
+
+    def __init__(
+        self,
+        cache: ResultCache,
+        asset_keys: dict[str, AssetKey],
+        instance: DagsterInstance,
+        poll_interval_seconds: float = 5.0,
+    ):
+        super().__init__(daemon=True)
+        self.cache = cache
+        self.asset_keys = asset_keys
+        self.instance = instance
+        self.poll_interval_seconds = poll_interval_seconds
+        self._last_storage_ids = {}
+        self._stopped = threading.Event()
+
+    def poll(self) -> list[str]:
+        """Invalidates the marts materialised since the last poll.
+
+        Returns:
+            Names of the invalidated marts
+        """
+        storage_ids = {}
+        for record in self.instance.get_asset_records(list(self.asset_keys.values())):
+            last = record.asset_entry.last_materialization_record
+            if last is not None:
+                storage_ids[record.asset_entry.asset_key] = last.storage_id
+
+        invalidated = []
+        for mart, asset_key in self.asset_keys.items():
+            storage_id = storage_ids.get(asset_key)
+            if self._last_storage_ids.get(asset_key) != storage_id:
+                self.cache.invalidate(mart)
+                invalidated.append(mart)
+            self._last_storage_ids[asset_key] = storage_id
+        return invalidated
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.poll_interval_seconds):
+            self.poll()
+
+    def stop(self) -> None:
+        self._stopped.set()
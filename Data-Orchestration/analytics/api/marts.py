@@ -0,0 +1,249 @@
+"""Read-only HTTP API over the analysis marts.
+
+    python -m analytics.api.marts --port 8080
+
+    GET /marts                                           lists the marts
+    GET /marts/top_games_by_platform?platform=PC&top=10  top 10 games of a platform
+    GET /marts/games_by_genre?limit=20&offset=20         second page of genres
+
+Results are cached in memory and invalidated when Dagster records a new materialisation of the mart.
+The database connection is read from the same DB_* environment variables as the postgres_conn resource.
+"""
+
+import argparse
+import dataclasses
+import datetime
+import decimal
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from dagster import AssetKey, DagsterInstance
+
+from analytics.api.cache import MaterialisationWatcher, ResultCache
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+# schema the dbt marts are built in, see generate_schema_name.sql
+MARTS_SCHEMA = os.getenv("MARTS_SCHEMA", "marts")
+
+
+@dataclasses.dataclass(frozen=True)
+class Mart:
+    model: str
+    columns: list[str]
+    order_by: str
+    # column compared with ?top=, e.g. the rank within a platform. without it, top is the row limit
+    rank_column: str | None = None
+    # query parameter to column equality filters
+    filters: dict[str, str] = dataclasses.field(default_factory=dict)
+
+    @property
+    def asset_key(self) -> AssetKey:
+        return AssetKey([MARTS_SCHEMA, self.model])
+
+
+MARTS = {
+    "top_games_by_platform": Mart(
+        model="analysis_top_games_by_platform",
+        columns=["platform_name", "platform_rank", "game_name", "rating"],
+        order_by="platform_name, platform_rank, game_name",
+        rank_column="platform_rank",
+        filters={"platform": "platform_name"},
+    ),
+    "games_by_genre": Mart(
+        model="analysis_games_by_genre",
+        columns=["genre_id", "genre_name", "game_count", "avg_genre_rating"],
+        order_by="game_count desc, genre_id",
+        filters={"genre": "genre_name"},
+    ),
+    "games_tags_popularity": Mart(
+        model="analysis_games_tags_popularity",
+        columns=["tag_id", "tag_name", "tagged_game_count"],
+        order_by="tagged_game_count desc, tag_id",
+        filters={"tag": "tag_name"},
+    ),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def parse_query(mart: Mart, query: dict[str, list[str]]) -> tuple:
+    """Validates the query string of a mart request.
+
+    Args:
+        mart: the requested mart
+        query: parsed query string
+
+    Returns:
+        Hashable (filters, top, limit, offset), also used as the cache key
+    """
+    unknown = set(query) - set(mart.filters) - {"top", "limit", "offset"}
+    if unknown:
+        raise BadRequest(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    try:
+        top = int(query["top"][0]) if "top" in query else None
+        limit = int(query.get("limit", [DEFAULT_LIMIT])[0])
+        offset = int(query.get("offset", [0])[0])
+    except ValueError:
+        raise BadRequest("top, limit and offset must be integers")
+    if not 0 < limit <= MAX_LIMIT or offset < 0 or (top is not None and top <= 0):
+        raise BadRequest(f"limit must be 1-{MAX_LIMIT}, offset >= 0 and top > 0")
+    if top is not None and mart.rank_column is None:
+        # top is the number of rows from the start, so the page ends at top
+        limit = max(min(limit, top - offset), 0)
+    filters = tuple(sorted((name, values[0]) for name, values in query.items() if name in mart.filters))
+    return filters, top, limit, offset
+
+
+def build_query(mart: Mart, filters: tuple, top: int | None, limit: int, offset: int):
+    """Builds the parameterised select for a mart request.
+
+    One extra row is fetched to tell whether there is a next page.
+
+    Args:
+        mart: the requested mart
+        filters: (parameter, value) pairs
+        top: rank cut off, only used by marts with a rank_column
+        limit: page size
+        offset: rows to skip
+
+    Returns:
+        sqlalchemy TextClause with its bind parameters
+    """
+    from sqlalchemy import text
+
+    conditions = [f"{mart.filters[name]} = :{name}" for name, _ in filters]
+    params = dict(filters)
+    if top is not None and mart.rank_column is not None:
+        conditions.append(f"{mart.rank_column} <= :top")
+        params["top"] = top
+    where = f"where {' and '.join(conditions)}" if conditions else ""
+    sql = (
+        f"select {', '.join(mart.columns)} from {MARTS_SCHEMA}.{mart.model} {where} "
+        f"order by {mart.order_by} limit :limit offset :offset"
+    )
+    return text(sql).bindparams(**params, limit=limit + 1, offset=offset)
+
+
+def json_value(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+class MartsApi:
+    """Serves mart queries from the result cache, falling back to the database."""
+
+    def __init__(self, engine, cache: ResultCache):
+        self.engine = engine
+        self.cache = cache
+
+    def query(self, name: str, query: dict[str, list[str]]) -> dict:
+        mart = MARTS[name]
+        params = parse_query(mart, query)
+        result = self.cache.get(name, params)
+        if result is None:
+            filters, top, limit, offset = params
+            rows = []
+            if limit:  # zero when the page starts past top
+                with self.engine.connect() as connection:
+                    rows = [
+                        {column: json_value(value) for column, value in row._mapping.items()}
+                        for row in connection.execute(build_query(mart, *params))
+                    ]
+            if top is not None and mart.rank_column is None and offset + limit >= top:
+                rows = rows[:limit]  # the extra row is past top, so there is no next page
+            result = {
+                "mart": name,
+                "rows": rows[:limit],
+                "limit": limit,
+                "offset": offset,
+                "next_offset": offset + limit if len(rows) > limit else None,
+            }
+            self.cache.put(name, params, result)
+        return result
+
+
+def build_handler(api: MartsApi):
+    class MartsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            try:
+                if parts == ["marts"]:
+                    self.respond(200, {"marts": sorted(MARTS)})
+                elif len(parts) == 2 and parts[0] == "marts" and parts[1] in MARTS:
+                    self.respond(200, api.query(parts[1], parse_qs(url.query)))
+                else:
+                    self.respond(404, {"error": f"Not found: {url.path}"})
+            except BadRequest as e:
+                self.respond(400, {"error": str(e)})
+            except Exception as e:
+                self.respond(500, {"error": f"Failed to query the marts, {e}"})
+
+        def respond(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):  # access logs would dominate a load test
+            pass
+
+    return MartsHandler
+
+
+def build_server(engine, host: str, port: int, cache: ResultCache) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), build_handler(MartsApi(engine, cache)))
+
+
+def main():
+    from analytics.ops.common import create_database_engine
+    from analytics.resources.postgresql import PostgresqlDatabaseResource
+
+    parser = argparse.ArgumentParser(description="Read-only HTTP API over the analysis marts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-entries", type=int, default=1024)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    engine = create_database_engine(
+        PostgresqlDatabaseResource(
+            DB_SERVER_NAME=os.environ["DB_SERVER_NAME"],
+            DB_DATABASE_NAME=os.environ["DB_DATABASE_NAME"],
+            DB_USERNAME=os.environ["DB_USERNAME"],
+            DB_PASSWORD=os.environ["DB_PASSWORD"],
+            DB_PORT=os.environ["DB_PORT"],
+        )
+    )
+    cache = ResultCache(max_entries=args.cache_entries)
+    # DAGSTER_HOME must point at the instance the dbt assets are materialised in
+    watcher = MaterialisationWatcher(
+        cache,
+        {name: mart.asset_key for name, mart in MARTS.items()},
+        DagsterInstance.get(),
+        poll_interval_seconds=args.poll_interval,
+    )
+    watcher.poll()
+    watcher.start()
+
+    server = build_server(engine, args.host, args.port, cache)
+    print(f"Serving {', '.join(sorted(MARTS))} on http://{args.host}:{args.port}/marts")
+    try:
+        server.serve_forever()
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
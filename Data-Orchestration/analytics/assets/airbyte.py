@@ -1,4 +1,4 @@
-from dagster import EnvVar, AutomationCondition, AssetSpec, AssetKey
+from dagster import EnvVar, AssetSpec, AssetKey
 from dagster_airbyte import (
     AirbyteWorkspace,
     build_airbyte_assets_definitions,
@@ -15,9 +15,7 @@ class CustomDagsterAirbyteTranslator(DagsterAirbyteTranslator):
         return default_spec.replace_attributes(
             key=AssetKey(["rawg", props.table_name]),
             group_name="airbyte_assets",
-            automation_condition=AutomationCondition.on_cron(
-                cron_schedule="* * * * *"
-            ),  # runs every minute
+            # no cron, synced by airbyte_freshness_sensor when a RAWG probe has changed
         )
 
 
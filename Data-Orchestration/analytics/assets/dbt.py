@@ -1,26 +1,30 @@
 import os
+import shutil
 from pathlib import Path
 
 from dagster_dbt import DbtCliResource, dbt_assets, DagsterDbtTranslator  # type: ignore
-from dagster import AssetExecutionContext #type: ignore
+from dagster import AssetExecutionContext, AssetObservation, Output #type: ignore
 import dagster as dg #type: ignore
 
+from analytics.ops.dbt_manifest import load_dbt_manifest_path
+from analytics.ops.dbt_runs import DbtRunConfig, dbt_run_args, model_timings
+
 # configure dbt project resource
 dbt_project_dir = (
     Path(__file__).joinpath("..", "..", "..", "..", "Data-Transformation", "dbt", "warehouse").resolve()
 )
-dbt_warehouse_resource = DbtCliResource(project_dir=os.fspath(dbt_project_dir))
-
-# generate manifest
-dbt_manifest_path = (
-    dbt_warehouse_resource.cli(
-        ["--quiet", "parse"],
-        target_path=Path("target"),
-    )
-    .wait()
-    .target_path.joinpath("manifest.json")
+# DBT_TARGET=local runs the project against the local postgres database instead of snowflake, see profiles.yml
+dbt_warehouse_resource = DbtCliResource(
+    project_dir=os.fspath(dbt_project_dir), target=os.getenv("DBT_TARGET")
 )
 
+# manifest of the last successful run, compared against for state:modified+ selection
+dbt_state_dir = Path("target", "state")
+
+# generate manifest, or reuse the one cached for the current project files. run and step processes reuse
+# the manifest the code location was loaded with
+dbt_manifest_path = load_dbt_manifest_path(dbt_warehouse_resource, dbt_project_dir)
+
 
 class CustomDagsterDbtTranslator(DagsterDbtTranslator):
     def get_automation_condition(self, dbt_resource_props):
@@ -32,6 +36,44 @@ class CustomDagsterDbtTranslator(DagsterDbtTranslator):
     manifest=dbt_manifest_path, dagster_dbt_translator=CustomDagsterDbtTranslator()
 )
 def dbt_warehouse(
-    context: AssetExecutionContext, dbt_warehouse_resource: DbtCliResource
+    context: AssetExecutionContext, config: DbtRunConfig, dbt_warehouse_resource: DbtCliResource
 ):
-    yield from dbt_warehouse_resource.cli(["run"], context=context).stream()
+    """
+    runs only the selected dbt models and records the compile and execute time of each model
+
+    args:
+        context: AssetExecutionContext
+        config: DbtRunConfig
+        dbt_warehouse_resource: DbtCliResource
+
+    returns:
+        dagster events for each dbt model, plus an AssetObservation with its timings
+    """
+    state_dir = dbt_project_dir.joinpath(dbt_state_dir)
+    invocation = dbt_warehouse_resource.cli(
+        dbt_run_args(context, config, state_dir), context=context
+    )
+
+    asset_keys = {}
+    for event in invocation.stream():
+        if isinstance(event, Output):
+            asset_keys[event.metadata["unique_id"].value] = context.assets_def.asset_key_for_output(
+                event.output_name
+            )
+        yield event
+
+    timings = model_timings(invocation.get_artifact("run_results.json"))
+    for unique_id, timing in timings.items():
+        if unique_id in asset_keys:
+            yield AssetObservation(asset_key=asset_keys[unique_id], metadata=timing)
+    context.log.info(
+        f"DBT: Ran {len(timings)} models in {sum(t['execution_time'] for t in timings.values()):.1f}s"
+    )
+
+    # the next only_modified run compares against this run's manifest, subsets leave unselected models
+    # on older code so they do not update the state
+    if context.selected_asset_keys == set(context.assets_def.keys):
+        state_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(
+            invocation.target_path.joinpath("manifest.json"), state_dir.joinpath("manifest.json")
+        )
@@ -1,6 +1,6 @@
-import requests
-import pandas as pd
+import os
 import datetime
+from pathlib import Path
 
 from dagster import ( #type: ignore
     Config,
@@ -11,33 +11,65 @@ from dagster import ( #type: ignore
     AutomationCondition,
 )
 
-from sqlalchemy import (
-    Table,
-    Column,
-    Integer,
-    Text,
-    Date,
-    Boolean,
-    Numeric,
-    Float,
-    TIMESTAMP,
-    MetaData,
-)
-from sqlalchemy.dialects.postgresql import JSONB
-
 from analytics.resources.postgresql import PostgresqlDatabaseResource
-from analytics.ops.common import upsert_to_database
+from analytics.resources.quota import RawgQuotaResource
+from analytics.ops.checkpoints import DEFAULT_MAX_AGE_HOURS, ExtractionCheckpoint
+from analytics.ops.common import clean_value, upsert_to_database, upsert_with_links_to_database, memoised
+from analytics.ops.instrumentation import instrument, instrumented_get, key_rotation
+from analytics.ops.key_pool import ROUND_ROBIN, ApiKeyPool
+from analytics.ops.profiling import profiled
+
+
+# set RAWG_GAMES_ACCESS_PATHS=true to add generated id columns with GIN indexes to the games table, so
+# "games with tag X" queries use an index instead of scanning and decoding the json of every game
+GAMES_ACCESS_PATHS = os.getenv("RAWG_GAMES_ACCESS_PATHS", "false").lower() == "true"
+
+# set RAWG_GAMES_PARTITIONED=true to create games range partitioned by release year, so queries filtering on
+# released only read their years, with a BRIN index on updated_at for the incremental filter of the staging
+# model. the primary key becomes (game_id, released), an existing unpartitioned games table has to be
+# renamed and its rows reloaded first
+GAMES_PARTITIONED = os.getenv("RAWG_GAMES_PARTITIONED", "false").lower() == "true"
+
+# set RAWG_API_BASE_URL (or base_url in the run config) to point the extraction at another RAWG compatible
+# server, e.g. the local stand-in in benchmarks/rawg_server.py
+RAWG_API_BASE_URL = os.getenv("RAWG_API_BASE_URL", "https://api.rawg.io/api")
+
+# set RAWG_CHECKPOINT_EXTRACTION=true (or checkpoint in the run config) to persist every page extracted, so a
+# retried run resumes after the last saved page. max_pages then caps the pages fetched per run instead of the
+# sweep, a long sweep (e.g. the 244 pages of tags) is finished by the runs checkpoint_resume_sensor requests
+CHECKPOINT_EXTRACTION = os.getenv("RAWG_CHECKPOINT_EXTRACTION", "false").lower() == "true"
+CHECKPOINT_DIR = str(Path(os.getenv("DAGSTER_HOME", "."), "storage", "checkpoints"))
 
 
 class RAWGApiConfig(Config):
     api_key: str = EnvVar("api_key")
     max_pages: int = 20
+    base_url: str = RAWG_API_BASE_URL
+    # extra keys, comma separated, the requests are spread over api_key and these (see ApiKeyPool)
+    api_keys: str = os.getenv("RAWG_API_KEYS", "")
+    key_strategy: str = ROUND_ROBIN
+    requests_per_second_per_key: float = 0.0
+    checkpoint: bool = CHECKPOINT_EXTRACTION
+    checkpoint_dir: str = CHECKPOINT_DIR
+    checkpoint_max_age_hours: float = DEFAULT_MAX_AGE_HOURS
+
+    def key_pool(self) -> ApiKeyPool:
+        keys = [self.api_key, *(key.strip() for key in self.api_keys.split(","))]
+        return ApiKeyPool.shared(keys, self.key_strategy, self.requests_per_second_per_key)
+
+    def checkpoint_for(self, context: OpExecutionContext, asset: str) -> ExtractionCheckpoint:
+        partition_key = context.partition_key if context.has_partition_key else None
+        return ExtractionCheckpoint(
+            self.checkpoint_dir, asset, partition_key, self.checkpoint, self.checkpoint_max_age_hours
+        )
 
 
 # ---GAMES start---
 # gets a page of games from the RAWG API
 # @helper function
-def fetch_games_page(api_key, dt_range, page: int = 1, page_size: int = 40) -> dict:
+def fetch_games_page(
+    api_key, dt_range, page: int = 1, page_size: int = 40, base_url: str = RAWG_API_BASE_URL
+) -> dict:
     """
     Fetches a single page of games from the RAWG API.
 
@@ -46,11 +78,12 @@ def fetch_games_page(api_key, dt_range, page: int = 1, page_size: int = 40) -> d
         dt_range: Date timestamp to filter games
         page: The page number to fetch
         page_size: Number of results per page
+        base_url: RAWG API base url
 
     Returns:
         Dictionary of 40 games from the response json
     """
-    url = "https://api.rawg.io/api/games"
+    url = f"{base_url}/games"
     params = {
         "key": api_key,
         "ordering": "released",  # sorting extracted data by release date (other option includes -updated for most recently updated)
@@ -58,57 +91,84 @@ def fetch_games_page(api_key, dt_range, page: int = 1, page_size: int = 40) -> d
         "page_size": page_size,
         "dates": dt_range,  # rawg api expects date range in the format YYYY-MM-DD,YYYY-MM-DD
     }
-    r = requests.get(url, params=params)
+    r = instrumented_get(url, params=params)
     r.raise_for_status()
     return r.json()
 
 
+# cheap request used by the freshness sensors to check whether an endpoint has changed
+# @helper function
+def probe_rawg_endpoint(api_key, endpoint: str, base_url: str = RAWG_API_BASE_URL, **params) -> dict:
+    """
+    Fetches a single result from a RAWG API endpoint.
+
+    Args:
+        api_key: RAWG API key
+        endpoint: RAWG endpoint name e.g. games, tags
+        base_url: RAWG API base url
+        params: Extra query parameters e.g. dates, ordering
+
+    Returns:
+        Dictionary with the total result count and the first result of the response json
+    """
+    url = f"{base_url}/{endpoint}"
+    r = instrumented_get(url, params={"key": api_key, "page_size": 1, **params})
+    r.raise_for_status()
+    data = r.json()
+    results = data.get("results", [])
+    return {"count": data.get("count"), "first": results[0] if results else None}
+
+
 daily_partition = DailyPartitionsDefinition(start_date=datetime.datetime(2024, 1, 1))
 
 
-# extracts individual games from the RAWG API response into a list of dicts 'games'
-@asset(
-    partitions_def=daily_partition,
-    # automation_condition=AutomationCondition.on_cron(cron_schedule="0 0 * * 1-5")
-    automation_condition=AutomationCondition.on_cron(
-        cron_schedule="* * * * *"
-    ),  # runs every minute
-)
-def raw_games(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]:
+# the extract, transform and load steps are plain functions so that they can run as
+# separate assets (below) or fused into a single step (see analytics/assets/rawg_fused.py)
+# @helper function
+def extract_games(
+    context: OpExecutionContext, config: RAWGApiConfig
+) -> tuple[list[dict], dict]:
     """
-    extracts raw games data from rawg api for given partition date
+    Extracts individual games from the RAWG API response into a list of dicts 'games'.
 
-    args:
+    Args:
         context: OpExecutionContext
         config: RAWGApiConfig
 
-    returns:
-        List of dictionaries containing raw games data
+    Returns:
+        List of dictionaries containing raw games data and the extraction metadata
     """
     context.log.info("GAMES: Starting RAWG games data extraction")
-    page = 1
+    checkpoint = config.checkpoint_for(context, "raw_games")
+    page, games = checkpoint.resume()
     non_empty_pages = 0  # implementing a way to track non-empty pages so that we can only extract pages with data
-    total_fetched = 0
-    games = []
+    total_fetched = len(games)
+    api_calls = 0
+    complete = False
 
     while non_empty_pages < config.max_pages:
         context.log.info(
             f"Fetching RAWG page {page} for partition {context.partition_key}"
         )
         dt_range = f"{context.partition_key},{context.partition_key}"
-        data = fetch_games_page(api_key=config.api_key, dt_range=dt_range, page=page)
+        data = fetch_games_page(
+            api_key=config.api_key, dt_range=dt_range, page=page, base_url=config.base_url
+        )
+        api_calls += 1
         results = data.get("results", [])
 
         if not results:
             context.log.info(
                 f"GAMES: No games found for partition {context.partition_key}, stopping fetch."
             )
+            complete = True
             break
 
         elif results:
             non_empty_pages += 1
             games.extend(results)
             total_fetched += len(results)
+            checkpoint.save(page, results)
             context.log.info(
                 f"GAMES: Fetched page {page}, total games: {total_fetched}"
             )
@@ -118,31 +178,38 @@ def raw_games(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]:
 
         page += 1
 
-        if config.max_pages and page > config.max_pages:
-            break
-
         # break if there are no more valid pages so that the code doesnt loop infinitely
         if not data.get("next"):
+            complete = True
+            break
+
+        # max_pages counts the pages of this run, a checkpointed sweep continues from here in the next one
+        if config.max_pages and page - checkpoint.resumed_from_page >= config.max_pages:
             break
 
     context.log.info(
         f"GAMES: Finished fetching RAWG data, total games: {total_fetched}"
     )
-    return games
+    # api_calls is used by games_refresh_schedule to estimate the cost of refreshing this partition
+    return games, {"api_calls": api_calls, "games_count": total_fetched, **checkpoint.finish(complete)}
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def transformed_games(context: OpExecutionContext, raw_games: list[dict]) -> list[dict]:
+# @helper function
+def transform_games(context: OpExecutionContext, raw_games: list[dict]) -> list[dict]:
     """
-    rransforms the raw games data into a more suitable format for loading into the database
+    Transforms the raw games data into a more suitable format for loading into the database.
 
-    args:
+    Args:
         context: OpExecutionContext
         raw_games: List of dictionaries containing raw games data
 
-    returns:
+    Returns:
         List of dictionaries containing transformed games data
     """
+    # pandas and sqlalchemy are imported inside the helpers so that importing the code
+    # location (and every step that only extracts from the API) does not pay for them
+    import pandas as pd
+
     context.log.info("GAMES: Starting RAWG data transformation")
 
     if not raw_games:
@@ -266,40 +333,57 @@ def transformed_games(context: OpExecutionContext, raw_games: list[dict]) -> lis
     )  # convert the transformed dataframe back to a list of dicts for loading
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def games(
-    context: OpExecutionContext,
-    postgres_conn: PostgresqlDatabaseResource,
-    transformed_games=dict,
-) -> None:
+# generated column of games to the jsonpath of the ids in its json array column. jsonb arrays rather than
+# integer[], as a generated column cannot use the subquery needed to cast a json array to an integer array.
+# query them with containment, e.g. where tag_ids @> '[31]'
+GAMES_ID_COLUMNS = {
+    "tag_ids": "jsonb_path_query_array(tags, '$[*].id')",
+    "genre_ids": "jsonb_path_query_array(genres, '$[*].id')",
+    "platform_ids": "jsonb_path_query_array(platforms, '$[*].platform.id')",
+    "store_ids": "jsonb_path_query_array(stores, '$[*].store.id')",
+}
+
+# @helper function
+def games_table(
+    metadata: "MetaData",
+    name: str = "games",
+    partitioned: bool = GAMES_PARTITIONED,
+    access_paths: bool = GAMES_ACCESS_PATHS,
+) -> "Table":
     """
-    loads the transformed games data into the Postgresql database
+    Defines the games table, with the partitioning and access paths the RAWG_GAMES_* toggles select.
 
-    args:
-        context: OpExecutionContext
-        postgres_conn: PostgresqlDatabaseResource
-        transformed_games: List of dictionaries containing transformed games data
+    Args:
+        metadata: MetaData the table is added to
+        name: table name, the index names are prefixed with it
+        partitioned: range partition the table by release year, see RAWG_GAMES_PARTITIONED
+        access_paths: add the generated id columns and their indexes, see RAWG_GAMES_ACCESS_PATHS
 
-    returns:
-        None
+    Returns:
+        sqlalchemy Table
     """
-    context.log.info("GAMES: Starting RAWG data loading")
-
-    # stops empty loads
-    if not transformed_games:
-        context.log.info("GAMES: No transformed games to load. Skipping insert.")
-        return
+    from sqlalchemy import (
+        Table,
+        Column,
+        Computed,
+        Index,
+        Integer,
+        Text,
+        Date,
+        Boolean,
+        Numeric,
+        Float,
+        TIMESTAMP,
+    )
+    from sqlalchemy.dialects.postgresql import JSONB
 
-    # construct the metadata
-    context.log.info("GAMES: Defining RAWG table metadata")
-    metadata = MetaData()
     games = Table(
-        "games",
+        name,
         metadata,
         Column("game_id", Integer, primary_key=True, nullable=False),
         Column("name", Text),
         Column("slug", Text),
-        Column("released", Date),
+        Column("released", Date, primary_key=partitioned, nullable=not partitioned),
         Column("tba", Boolean),
         Column("background_image", Text),
         Column("rating", Numeric(3, 2)),
@@ -319,49 +403,279 @@ def games(
         Column("stores", JSONB),
         Column("tags", JSONB),
         Column("esrb_rating", JSONB),
+        **({"postgresql_partition_by": "RANGE (released)"} if partitioned else {}),
     )
-    context.log.info("GAMES: Upsetting RAWG data into database")
-    upsert_to_database(
+    if partitioned:
+        # updated_at grows with the upserts, so block ranges stay narrow and the index a few pages
+        Index(f"{name}_updated_at_brin", games.c.updated_at, postgresql_using="brin")
+    if access_paths:
+        # added to an existing games table by bootstrap_schema, stored so they are computed once per upsert
+        for column_name, expression in GAMES_ID_COLUMNS.items():
+            games.append_column(Column(column_name, JSONB, Computed(expression, persisted=True)))
+            Index(
+                f"{name}_{column_name}_gin",
+                games.c[column_name],
+                postgresql_using="gin",
+                postgresql_ops={column_name: "jsonb_path_ops"},
+            )
+        games.append_column(
+            Column("esrb_slug", Text, Computed("esrb_rating ->> 'slug'", persisted=True))
+        )
+        Index(f"{name}_esrb_slug", games.c.esrb_slug)
+    return games
+
+
+# @helper function
+def games_year_partitions(transformed_games: list[dict]) -> dict[str, tuple[str, str]]:
+    """
+    Yearly range partitions of the partitioned games table that the games are routed to.
+
+    Args:
+        transformed_games: List of dictionaries containing transformed games data, with a release date
+
+    Returns:
+        Partition table name to its (from, to) release dates, to is exclusive
+    """
+    years = sorted({int(str(game["released"])[:4]) for game in transformed_games})
+    return {f"games_y{year}": (f"{year}-01-01", f"{year + 1}-01-01") for year in years}
+
+
+# link table name to (json array column of games, key path to the linked id within each element)
+GAME_LINKS = {
+    "game_tags": ("tags", ("id",), "tag_id"),
+    "game_genres": ("genres", ("id",), "genre_id"),
+    "game_platforms": ("platforms", ("platform", "id"), "platform_id"),
+    "game_stores": ("stores", ("store", "id"), "store_id"),
+}
+
+
+# @helper function
+def linked_ids(game: dict, column: str, path: tuple) -> list[int]:
+    """
+    Reads the ids of the tags, genres, platforms or stores listed in a json array column of a game.
+
+    Args:
+        game: transformed game
+        column: json array column, e.g. tags
+        path: key path to the id within each element, e.g. ("platform", "id")
+
+    Returns:
+        Distinct ids in the order they are listed
+    """
+    elements = game.get(column)
+    if not isinstance(elements, list):  # null in the API response, NaN after json_normalize
+        return []
+    ids = []
+    for element in elements:
+        for key in path:
+            element = element.get(key) if isinstance(element, dict) else None
+        if element is not None and element not in ids:  # an id can be listed twice for a game
+            ids.append(element)
+    return ids
+
+
+# @helper function
+def explode_game_links(transformed_games: list[dict]) -> dict[str, list[dict]]:
+    """
+    Explodes the tags, genres, platforms and stores arrays of each game into link table rows.
+
+    Args:
+        transformed_games: List of dictionaries containing transformed games data
+
+    Returns:
+        Dictionary of link table name to rows of (game_id, linked id)
+    """
+    return {
+        link_table: [
+            {"game_id": game["game_id"], id_column: linked_id}
+            for game in transformed_games
+            for linked_id in linked_ids(game, column, path)
+        ]
+        for link_table, (column, path, id_column) in GAME_LINKS.items()
+    }
+
+
+# @helper function
+def load_games(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_games: list[dict],
+) -> None:
+    """
+    Loads the transformed games data into the Postgresql database.
+
+    Args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed games data
+    """
+    context.log.info("GAMES: Starting RAWG data loading")
+
+    undated_game_ids = []
+    if GAMES_PARTITIONED:
+        # released is part of the primary key of the partitioned table. a game that lost its release date
+        # is removed, so the row of its old release date does not linger
+        dated_games = [game for game in transformed_games if clean_value(game.get("released"))]
+        undated_game_ids = [
+            game["game_id"] for game in transformed_games if not clean_value(game.get("released"))
+        ]
+        if undated_game_ids:
+            context.log.warning(f"GAMES: Removing {len(undated_game_ids)} games without a release date")
+        transformed_games = dated_games
+
+    # stops empty loads
+    if not transformed_games and not undated_game_ids:
+        context.log.info("GAMES: No transformed games to load. Skipping insert.")
+        return
+
+    from sqlalchemy import Table, Column, Integer, MetaData
+
+    # construct the metadata
+    context.log.info("GAMES: Defining RAWG table metadata")
+    metadata = MetaData()
+    games = games_table(metadata)
+    # normalised game_tags, game_genres, game_platforms and game_stores, so the warehouse can join integer
+    # ids instead of parsing the json arrays on every build
+    link_tables = {
+        link_table: Table(
+            link_table,
+            metadata,
+            Column("game_id", Integer, primary_key=True, nullable=False),
+            Column(id_column, Integer, primary_key=True, nullable=False),
+        )
+        for link_table, (_, _, id_column) in GAME_LINKS.items()
+    }
+    links = explode_game_links(transformed_games)
+    context.log.info(
+        "GAMES: Upsetting RAWG data and "
+        + ", ".join(f"{len(rows)} {link_table}" for link_table, rows in links.items())
+        + " into database"
+    )
+    upsert_with_links_to_database(
         postgres_conn=postgres_conn,
         data=transformed_games,
         table=games,
+        links={link_tables[link_table]: rows for link_table, rows in links.items()},
         metadata=metadata,
+        partitions=games_year_partitions(transformed_games) if GAMES_PARTITIONED else None,
+        removed_keys=undated_game_ids,
     )
     context.log.info("GAMES: Data load complete")
 
 
-# ---GAMES end---
+# extracts individual games from the RAWG API response into a list of dicts 'games'
+@asset(
+    partitions_def=daily_partition,
+    # no cron, materialised by rawg_freshness_sensor when a probe shows the partition has changed
+)
+@profiled
+def raw_games(
+    context: OpExecutionContext, config: RAWGApiConfig, rawg_quota: RawgQuotaResource
+) -> list[dict]:
+    """
+    extracts raw games data from rawg api for given partition date
 
-# ---GENRES start---
+    args:
+        context: OpExecutionContext
+        config: RAWGApiConfig
+        rawg_quota: RawgQuotaResource
+
+    returns:
+        List of dictionaries containing raw games data
+    """
+    key_pool = config.key_pool()
+    with instrument() as metrics, rawg_quota.metered(context, "raw_games"), key_rotation(key_pool):
+        games, metadata = extract_games(context, config)
+    context.add_output_metadata(
+        {
+            **metadata,
+            **metrics.as_metadata(rows=len(games)),
+            **rawg_quota.headroom(),
+            **key_pool.as_metadata(),
+        }
+    )
+    return games
 
 
 @asset(
     partitions_def=daily_partition,
-    automation_condition=AutomationCondition.on_cron(
-        cron_schedule="* * * * *"
-    ),  # runs every minute
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when raw_games is unchanged, see memoised
+    code_version="1",
 )
-def raw_genres(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]:
+@profiled
+@memoised("raw_games")
+def transformed_games(context: OpExecutionContext, raw_games: list[dict]) -> list[dict]:
     """
-    extracts raw genres data from rawg api - currently not partitioned by date as genres dont change often
+    rransforms the raw games data into a more suitable format for loading into the database
 
     args:
         context: OpExecutionContext
-        config: RAWGApiConfig
+        raw_games: List of dictionaries containing raw games data
 
     returns:
-        List of dictionaries containing raw genres data
+        List of dictionaries containing transformed games data
+    """
+    return transform_games(context, raw_games)
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when transformed_games is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("transformed_games")
+def games(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_games=dict,
+) -> None:
+    """
+    loads the transformed games data into the Postgresql database
+
+    args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed games data
+
+    returns:
+        None
+    """
+    load_games(context, postgres_conn, transformed_games)
+
+
+# ---GAMES end---
+
+# ---GENRES start---
+
+
+# @helper function
+def extract_genres(
+    context: OpExecutionContext, config: RAWGApiConfig
+) -> tuple[list[dict], dict]:
+    """
+    Extracts all genres from the RAWG API.
+
+    Args:
+        context: OpExecutionContext
+        config: RAWGApiConfig
+
+    Returns:
+        List of dictionaries containing raw genres data and the extraction metadata
     """
     context.log.info("GENRES: Starting RAWG data extraction")
-    page = 1
+    checkpoint = config.checkpoint_for(context, "raw_genres")
+    page, genres = checkpoint.resume()
     page_size = 19
-    genres = []
-    total_fetched = 0
+    total_fetched = len(genres)
+    api_calls = 0
 
     while True:
         context.log.info("GENRES: Fetching genres")
 
-        url = "https://api.rawg.io/api/genres"
+        url = f"{config.base_url}/genres"
         params = {
             "key": config.api_key,
             "ordering": "added",
@@ -369,8 +683,9 @@ def raw_genres(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]
             "page_size": page_size,
         }
 
-        r = requests.get(url, params=params)
+        r = instrumented_get(url, params=params)
         r.raise_for_status()
+        api_calls += 1
 
         data = r.json()
         results = data.get("results", [])
@@ -382,6 +697,7 @@ def raw_genres(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]
         elif results:
             genres.extend(results)
             total_fetched += len(results)
+            checkpoint.save(page, results)
             context.log.info(
                 f"GENRES: Fetched page {page}, total genres: {total_fetched}"
             )
@@ -389,6 +705,8 @@ def raw_genres(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]
         else:
             context.log.info(f"GENRES: Page {page} is empty, skipping")
 
+        page += 1
+
         # break if there are no more valid pages so that the code doesnt loop infinitely
         if not data.get("next"):
             break
@@ -396,23 +714,25 @@ def raw_genres(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]
     context.log.info(
         f"GENRES: Finished fetching RAWG data, total genres: {total_fetched}"
     )
-    return genres
+    return genres, {"api_calls": api_calls, "genres_count": total_fetched, **checkpoint.finish(complete=True)}
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def transformed_genres(
+# @helper function
+def transform_genres(
     context: OpExecutionContext, raw_genres: list[dict]
 ) -> list[dict]:
     """
-    rransforms the raw genres data into a more suitable format for loading into the database
+    Transforms the raw genres data into a more suitable format for loading into the database.
 
-    args:
+    Args:
         context: OpExecutionContext
         raw_genres: List of dictionaries containing raw genre data
 
-    returns:
+    Returns:
         List of dictionaries containing transformed genre data
     """
+    import pandas as pd
+
     context.log.info("GENRES: Starting RAWG data transformation")
 
     if not raw_genres:
@@ -455,22 +775,19 @@ def transformed_genres(
     )  # convert the transformed dataframe back to a list of dicts for loading
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def genres(
+# @helper function
+def load_genres(
     context: OpExecutionContext,
     postgres_conn: PostgresqlDatabaseResource,
-    transformed_genres=dict,
+    transformed_genres: list[dict],
 ) -> None:
     """
-    loads the transformed genres data into the Postgresql database
+    Loads the transformed genres data into the Postgresql database.
 
-    args:
+    Args:
         context: OpExecutionContext
         postgres_conn: PostgresqlDatabaseResource
-        transformed_games: List of dictionaries containing transformed genres data
-
-    returns:
-        None
+        transformed_genres: List of dictionaries containing transformed genres data
     """
     context.log.info("GENRES: Starting RAWG data loading")
 
@@ -479,6 +796,9 @@ def genres(
         context.log.info("GENRES: No transformed genres to load. Skipping insert.")
         return
 
+    from sqlalchemy import Table, Column, Integer, Text, MetaData
+    from sqlalchemy.dialects.postgresql import JSONB
+
     # construct the metadata
     context.log.info("GENRES: Defining RAWG table metadata")
     metadata = MetaData()
@@ -502,38 +822,120 @@ def genres(
     context.log.info("GENRES: Data load complete")
 
 
-# ---GENRES end---
+@asset(
+    partitions_def=daily_partition,
+    # no cron, materialised by rawg_freshness_sensor when a probe shows the endpoint has changed
+)
+@profiled
+def raw_genres(
+    context: OpExecutionContext, config: RAWGApiConfig, rawg_quota: RawgQuotaResource
+) -> list[dict]:
+    """
+    extracts raw genres data from rawg api - currently not partitioned by date as genres dont change often
 
-# ---PLATFORMS start---
+    args:
+        context: OpExecutionContext
+        config: RAWGApiConfig
+        rawg_quota: RawgQuotaResource
+
+    returns:
+        List of dictionaries containing raw genres data
+    """
+    key_pool = config.key_pool()
+    with instrument() as metrics, rawg_quota.metered(context, "raw_genres"), key_rotation(key_pool):
+        genres, metadata = extract_genres(context, config)
+    context.add_output_metadata(
+        {
+            **metadata,
+            **metrics.as_metadata(rows=len(genres)),
+            **rawg_quota.headroom(),
+            **key_pool.as_metadata(),
+        }
+    )
+    return genres
 
 
 @asset(
     partitions_def=daily_partition,
-    automation_condition=AutomationCondition.on_cron(
-        cron_schedule="* * * * *"
-    ),  # runs every minute
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when raw_genres is unchanged, see memoised
+    code_version="1",
 )
-def raw_platforms(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]:
+@profiled
+@memoised("raw_genres")
+def transformed_genres(
+    context: OpExecutionContext, raw_genres: list[dict]
+) -> list[dict]:
     """
-    extracts raw platforms data from rawg api - currently not partitioned by date as platforms dont change often
+    rransforms the raw genres data into a more suitable format for loading into the database
+
+    args:
+        context: OpExecutionContext
+        raw_genres: List of dictionaries containing raw genre data
+
+    returns:
+        List of dictionaries containing transformed genre data
+    """
+    return transform_genres(context, raw_genres)
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when transformed_genres is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("transformed_genres")
+def genres(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_genres=dict,
+) -> None:
+    """
+    loads the transformed genres data into the Postgresql database
 
     args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed genres data
+
+    returns:
+        None
+    """
+    load_genres(context, postgres_conn, transformed_genres)
+
+
+# ---GENRES end---
+
+# ---PLATFORMS start---
+
+
+# @helper function
+def extract_platforms(
+    context: OpExecutionContext, config: RAWGApiConfig
+) -> tuple[list[dict], dict]:
+    """
+    Extracts all platforms from the RAWG API.
+
+    Args:
         context: OpExecutionContext
         config: RAWGApiConfig
 
-    returns:
-        List of dictionaries containing raw platforms data
+    Returns:
+        List of dictionaries containing raw platforms data and the extraction metadata
     """
     context.log.info("PLATFORMS: Starting RAWG data extraction")
-    page = 1
+    checkpoint = config.checkpoint_for(context, "raw_platforms")
+    page, platforms = checkpoint.resume()
     page_size = 40
-    platforms = []
-    total_fetched = 0
+    total_fetched = len(platforms)
+    api_calls = 0
 
     while True:
         context.log.info("PLATFORMS: Fetching platforms")
 
-        url = "https://api.rawg.io/api/platforms"
+        url = f"{config.base_url}/platforms"
         params = {
             "key": config.api_key,
             "ordering": "added",
@@ -541,8 +943,9 @@ def raw_platforms(context: OpExecutionContext, config: RAWGApiConfig) -> list[di
             "page_size": page_size,
         }
 
-        r = requests.get(url, params=params)
+        r = instrumented_get(url, params=params)
         r.raise_for_status()
+        api_calls += 1
 
         data = r.json()
         results = data.get("results", [])
@@ -554,6 +957,7 @@ def raw_platforms(context: OpExecutionContext, config: RAWGApiConfig) -> list[di
         elif results:
             platforms.extend(results)
             total_fetched += len(results)
+            checkpoint.save(page, results)
             context.log.info(
                 f"PLATFORMS: Fetched page {page}, total platforms: {total_fetched}"
             )
@@ -570,23 +974,25 @@ def raw_platforms(context: OpExecutionContext, config: RAWGApiConfig) -> list[di
     context.log.info(
         f"PLATFORMS: Finished fetching RAWG data, total platforms: {total_fetched}"
     )
-    return platforms
+    return platforms, {"api_calls": api_calls, "platforms_count": total_fetched, **checkpoint.finish(complete=True)}
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def transformed_platforms(
+# @helper function
+def transform_platforms(
     context: OpExecutionContext, raw_platforms: list[dict]
 ) -> list[dict]:
     """
-    rransforms the raw platforms data into a more suitable format for loading into the database
+    Transforms the raw platforms data into a more suitable format for loading into the database.
 
-    args:
+    Args:
         context: OpExecutionContext
         raw_platforms: List of dictionaries containing raw platforms data
 
-    returns:
+    Returns:
         List of dictionaries containing transformed platforms data
     """
+    import pandas as pd
+
     context.log.info("PLATFORMS: Starting RAWG data transformation")
 
     if not raw_platforms:
@@ -644,22 +1050,19 @@ def transformed_platforms(
     )  # convert the transformed dataframe back to a list of dicts for loading
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def platforms(
+# @helper function
+def load_platforms(
     context: OpExecutionContext,
     postgres_conn: PostgresqlDatabaseResource,
-    transformed_platforms=dict,
+    transformed_platforms: list[dict],
 ) -> None:
     """
-    loads the transformed platforms data into the Postgresql database
+    Loads the transformed platforms data into the Postgresql database.
 
-    args:
+    Args:
         context: OpExecutionContext
         postgres_conn: PostgresqlDatabaseResource
-        transformed_games: List of dictionaries containing transformed platforms data
-
-    returns:
-        None
+        transformed_platforms: List of dictionaries containing transformed platforms data
     """
     context.log.info("PLATFORMS: Starting RAWG data loading")
 
@@ -670,6 +1073,9 @@ def platforms(
         )
         return
 
+    from sqlalchemy import Table, Column, Integer, Text, MetaData
+    from sqlalchemy.dialects.postgresql import JSONB
+
     # construct the metadata
     context.log.info("PLATFORMS: Defining RAWG table metadata")
     metadata = MetaData()
@@ -693,38 +1099,120 @@ def platforms(
     context.log.info("PLATFORMS: Data load complete")
 
 
-# ---PLATFORMS end---
+@asset(
+    partitions_def=daily_partition,
+    # no cron, materialised by rawg_freshness_sensor when a probe shows the endpoint has changed
+)
+@profiled
+def raw_platforms(
+    context: OpExecutionContext, config: RAWGApiConfig, rawg_quota: RawgQuotaResource
+) -> list[dict]:
+    """
+    extracts raw platforms data from rawg api - currently not partitioned by date as platforms dont change often
 
-# ---STORES start---
+    args:
+        context: OpExecutionContext
+        config: RAWGApiConfig
+        rawg_quota: RawgQuotaResource
+
+    returns:
+        List of dictionaries containing raw platforms data
+    """
+    key_pool = config.key_pool()
+    with instrument() as metrics, rawg_quota.metered(context, "raw_platforms"), key_rotation(key_pool):
+        platforms, metadata = extract_platforms(context, config)
+    context.add_output_metadata(
+        {
+            **metadata,
+            **metrics.as_metadata(rows=len(platforms)),
+            **rawg_quota.headroom(),
+            **key_pool.as_metadata(),
+        }
+    )
+    return platforms
 
 
 @asset(
     partitions_def=daily_partition,
-    automation_condition=AutomationCondition.on_cron(
-        cron_schedule="* * * * *"
-    ),  # runs every minute
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when raw_platforms is unchanged, see memoised
+    code_version="1",
 )
-def raw_stores(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]:
+@profiled
+@memoised("raw_platforms")
+def transformed_platforms(
+    context: OpExecutionContext, raw_platforms: list[dict]
+) -> list[dict]:
     """
-    extracts raw stores data from rawg api - currently not partitioned by date as stores dont change often
+    rransforms the raw platforms data into a more suitable format for loading into the database
 
     args:
         context: OpExecutionContext
-        config: RAWGApiConfig
+        raw_platforms: List of dictionaries containing raw platforms data
 
     returns:
-        List of dictionaries containing raw stores data
+        List of dictionaries containing transformed platforms data
+    """
+    return transform_platforms(context, raw_platforms)
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when transformed_platforms is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("transformed_platforms")
+def platforms(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_platforms=dict,
+) -> None:
+    """
+    loads the transformed platforms data into the Postgresql database
+
+    args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed platforms data
+
+    returns:
+        None
+    """
+    load_platforms(context, postgres_conn, transformed_platforms)
+
+
+# ---PLATFORMS end---
+
+# ---STORES start---
+
+
+# @helper function
+def extract_stores(
+    context: OpExecutionContext, config: RAWGApiConfig
+) -> tuple[list[dict], dict]:
+    """
+    Extracts all stores from the RAWG API.
+
+    Args:
+        context: OpExecutionContext
+        config: RAWGApiConfig
+
+    Returns:
+        List of dictionaries containing raw stores data and the extraction metadata
     """
     context.log.info("STORES: Starting RAWG data extraction")
-    page = 1
+    checkpoint = config.checkpoint_for(context, "raw_stores")
+    page, stores = checkpoint.resume()
     page_size = 40
-    stores = []
-    total_fetched = 0
+    total_fetched = len(stores)
+    api_calls = 0
 
     while True:
         context.log.info("STORES: Fetching stores")
 
-        url = "https://api.rawg.io/api/stores"
+        url = f"{config.base_url}/stores"
         params = {
             "key": config.api_key,
             "ordering": "added",
@@ -732,8 +1220,9 @@ def raw_stores(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]
             "page_size": page_size,
         }
 
-        r = requests.get(url, params=params)
+        r = instrumented_get(url, params=params)
         r.raise_for_status()
+        api_calls += 1
 
         data = r.json()
         results = data.get("results", [])
@@ -745,6 +1234,7 @@ def raw_stores(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]
         elif results:
             stores.extend(results)
             total_fetched += len(results)
+            checkpoint.save(page, results)
             context.log.info(
                 f"STORES: Fetched page {page}, total stores: {total_fetched}"
             )
@@ -761,23 +1251,25 @@ def raw_stores(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]
     context.log.info(
         f"STORES: Finished fetching RAWG data, total stores: {total_fetched}"
     )
-    return stores
+    return stores, {"api_calls": api_calls, "stores_count": total_fetched, **checkpoint.finish(complete=True)}
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def transformed_stores(
+# @helper function
+def transform_stores(
     context: OpExecutionContext, raw_stores: list[dict]
 ) -> list[dict]:
     """
-    rransforms the raw stores data into a more suitable format for loading into the database
+    Transforms the raw stores data into a more suitable format for loading into the database.
 
-    args:
+    Args:
         context: OpExecutionContext
         raw_stores: List of dictionaries containing raw stores data
 
-    returns:
+    Returns:
         List of dictionaries containing transformed stores data
     """
+    import pandas as pd
+
     context.log.info("STORES: Starting RAWG data transformation")
 
     if not raw_stores:
@@ -837,22 +1329,19 @@ def transformed_stores(
     )  # convert the transformed dataframe back to a list of dicts for loading
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def stores(
+# @helper function
+def load_stores(
     context: OpExecutionContext,
     postgres_conn: PostgresqlDatabaseResource,
-    transformed_stores=dict,
+    transformed_stores: list[dict],
 ) -> None:
     """
-    loads the transformed stores data into the Postgresql database
+    Loads the transformed stores data into the Postgresql database.
 
-    args:
+    Args:
         context: OpExecutionContext
         postgres_conn: PostgresqlDatabaseResource
-        transformed_games: List of dictionaries containing transformed stores data
-
-    returns:
-        None
+        transformed_stores: List of dictionaries containing transformed stores data
     """
     context.log.info("STORES: Starting RAWG data loading")
 
@@ -861,6 +1350,9 @@ def stores(
         context.log.info("STORES: No transformed stores to load. Skipping insert.")
         return
 
+    from sqlalchemy import Table, Column, Integer, Text, MetaData
+    from sqlalchemy.dialects.postgresql import JSONB
+
     # construct the metadata
     context.log.info("STORES: Defining RAWG table metadata")
     metadata = MetaData()
@@ -885,12 +1377,96 @@ def stores(
     context.log.info("STORES: Data load complete")
 
 
+@asset(
+    partitions_def=daily_partition,
+    # no cron, materialised by rawg_freshness_sensor when a probe shows the endpoint has changed
+)
+@profiled
+def raw_stores(
+    context: OpExecutionContext, config: RAWGApiConfig, rawg_quota: RawgQuotaResource
+) -> list[dict]:
+    """
+    extracts raw stores data from rawg api - currently not partitioned by date as stores dont change often
+
+    args:
+        context: OpExecutionContext
+        config: RAWGApiConfig
+        rawg_quota: RawgQuotaResource
+
+    returns:
+        List of dictionaries containing raw stores data
+    """
+    key_pool = config.key_pool()
+    with instrument() as metrics, rawg_quota.metered(context, "raw_stores"), key_rotation(key_pool):
+        stores, metadata = extract_stores(context, config)
+    context.add_output_metadata(
+        {
+            **metadata,
+            **metrics.as_metadata(rows=len(stores)),
+            **rawg_quota.headroom(),
+            **key_pool.as_metadata(),
+        }
+    )
+    return stores
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when raw_stores is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("raw_stores")
+def transformed_stores(
+    context: OpExecutionContext, raw_stores: list[dict]
+) -> list[dict]:
+    """
+    rransforms the raw stores data into a more suitable format for loading into the database
+
+    args:
+        context: OpExecutionContext
+        raw_stores: List of dictionaries containing raw stores data
+
+    returns:
+        List of dictionaries containing transformed stores data
+    """
+    return transform_stores(context, raw_stores)
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when transformed_stores is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("transformed_stores")
+def stores(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_stores=dict,
+) -> None:
+    """
+    loads the transformed stores data into the Postgresql database
+
+    args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed stores data
+
+    returns:
+        None
+    """
+    load_stores(context, postgres_conn, transformed_stores)
+
+
 # ---STORES end---
 
 
 # ---TAGS start---
 # @helper function
-def fetch_tags_page(api_key, page: int = 1, page_size: int = 40) -> dict:
+def fetch_tags_page(api_key, page: int = 1, page_size: int = 40, base_url: str = RAWG_API_BASE_URL) -> dict:
     """
     Fetches a single page of tags from the RAWG API.
 
@@ -898,60 +1474,63 @@ def fetch_tags_page(api_key, page: int = 1, page_size: int = 40) -> dict:
         api_key: RAWG API key
         page: The page number to fetch
         page_size: Number of results per page
+        base_url: RAWG API base url
 
     Returns:
         Dictionary of 40 games from the response json
     """
-    url = "https://api.rawg.io/api/tags"
+    url = f"{base_url}/tags"
     params = {
         "key": api_key,
         "ordering": "added",  # sorting extracted data by release date (other option includes -updated for most recently updated)
         "page": page,
         "page_size": page_size,
     }
-    r = requests.get(url, params=params)
+    r = instrumented_get(url, params=params)
     r.raise_for_status()
     return r.json()
 
 
 # 244 pages is max (total number of tags= 9722)
-@asset(
-    partitions_def=daily_partition,
-    automation_condition=AutomationCondition.on_cron(
-        cron_schedule="* * * * *"
-    ),  # runs every minute
-)
-def raw_tags(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]:
+# @helper function
+def extract_tags(
+    context: OpExecutionContext, config: RAWGApiConfig
+) -> tuple[list[dict], dict]:
     """
-    extracts raw tags data from rawg api - currently not partitioned by date as tags dont change often
+    Extracts up to config.max_pages pages of tags from the RAWG API.
 
-    args:
+    Args:
         context: OpExecutionContext
         config: RAWGApiConfig
 
-    returns:
-        List of dictionaries containing raw tags data
+    Returns:
+        List of dictionaries containing raw tags data and the extraction metadata
     """
     context.log.info("TAGS: Starting RAWG data extraction")
-    page = 1
-    tags = []
-    total_fetched = 0
+    checkpoint = config.checkpoint_for(context, "raw_tags")
+    page, tags = checkpoint.resume()
+    total_fetched = len(tags)
     non_empty_pages = 0
+    api_calls = 0
+    complete = False
 
     while non_empty_pages < config.max_pages:
         context.log.info("TAGS: Fetching tags")
 
-        data = fetch_tags_page(api_key=config.api_key, page=page)
+        data = fetch_tags_page(api_key=config.api_key, page=page, base_url=config.base_url)
+        api_calls += 1
         results = data.get("results", [])
 
         if not results:
             context.log.info("TAGS: No tags found, stopping fetch.")
+            complete = True
             break
 
         elif results:
             non_empty_pages += 1
             tags.extend(results)
             total_fetched += len(results)
+            checkpoint.save(page, results)
             context.log.info(f"TAGS: Fetched page {page}, total tags: {total_fetched}")
 
         else:
@@ -959,29 +1538,33 @@ def raw_tags(context: OpExecutionContext, config: RAWGApiConfig) -> list[dict]:
 
         page += 1
 
-        if config.max_pages and page > config.max_pages:
-            break
-
         # break if there are no more valid pages so that the code doesnt loop infinitely
         if not data.get("next"):
+            complete = True
+            break
+
+        # max_pages counts the pages of this run, a checkpointed sweep continues from here in the next one
+        if config.max_pages and page - checkpoint.resumed_from_page >= config.max_pages:
             break
 
     context.log.info(f"TAGS: Finished fetching RAWG data, total tags: {total_fetched}")
-    return tags
+    return tags, {"api_calls": api_calls, "tags_count": total_fetched, **checkpoint.finish(complete)}
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def transformed_tags(context: OpExecutionContext, raw_tags: list[dict]) -> list[dict]:
+# @helper function
+def transform_tags(context: OpExecutionContext, raw_tags: list[dict]) -> list[dict]:
     """
-    rransforms the raw tags data into a more suitable format for loading into the database
+    Transforms the raw tags data into a more suitable format for loading into the database.
 
-    args:
+    Args:
         context: OpExecutionContext
         raw_tags: List of dictionaries containing raw tags data
 
-    returns:
+    Returns:
         List of dictionaries containing transformed tags data
     """
+    import pandas as pd
+
     context.log.info("TAGS: Starting RAWG data transformation")
 
     if not raw_tags:
@@ -1041,22 +1624,19 @@ def transformed_tags(context: OpExecutionContext, raw_tags: list[dict]) -> list[
     )  # convert the transformed dataframe back to a list of dicts for loading
 
 
-@asset(partitions_def=daily_partition, automation_condition=AutomationCondition.eager())
-def tags(
+# @helper function
+def load_tags(
     context: OpExecutionContext,
     postgres_conn: PostgresqlDatabaseResource,
-    transformed_tags=dict,
+    transformed_tags: list[dict],
 ) -> None:
     """
-    loads the transformed tags data into the Postgresql database
+    Loads the transformed tags data into the Postgresql database.
 
-    args:
+    Args:
         context: OpExecutionContext
         postgres_conn: PostgresqlDatabaseResource
-        transformed_games: List of dictionaries containing transformed tags data
-
-    returns:
-        None
+        transformed_tags: List of dictionaries containing transformed tags data
     """
     context.log.info("TAGS: Starting RAWG data loading")
 
@@ -1065,6 +1645,9 @@ def tags(
         context.log.info("TAGS: No transformed tags to load. Skipping insert.")
         return
 
+    from sqlalchemy import Table, Column, Integer, Text, MetaData
+    from sqlalchemy.dialects.postgresql import JSONB
+
     # construct the metadata
     context.log.info("TAGS: Defining RAWG table metadata")
     metadata = MetaData()
@@ -1087,3 +1670,85 @@ def tags(
         metadata=metadata,
     )
     context.log.info("TAGS: Data load complete")
+
+
+@asset(
+    partitions_def=daily_partition,
+    # no cron, materialised by rawg_freshness_sensor when a probe shows the endpoint has changed
+)
+@profiled
+def raw_tags(
+    context: OpExecutionContext, config: RAWGApiConfig, rawg_quota: RawgQuotaResource
+) -> list[dict]:
+    """
+    extracts raw tags data from rawg api - currently not partitioned by date as tags dont change often
+
+    args:
+        context: OpExecutionContext
+        config: RAWGApiConfig
+        rawg_quota: RawgQuotaResource
+
+    returns:
+        List of dictionaries containing raw tags data
+    """
+    key_pool = config.key_pool()
+    with instrument() as metrics, rawg_quota.metered(context, "raw_tags"), key_rotation(key_pool):
+        tags, metadata = extract_tags(context, config)
+    context.add_output_metadata(
+        {
+            **metadata,
+            **metrics.as_metadata(rows=len(tags)),
+            **rawg_quota.headroom(),
+            **key_pool.as_metadata(),
+        }
+    )
+    return tags
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when raw_tags is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("raw_tags")
+def transformed_tags(context: OpExecutionContext, raw_tags: list[dict]) -> list[dict]:
+    """
+    rransforms the raw tags data into a more suitable format for loading into the database
+
+    args:
+        context: OpExecutionContext
+        raw_tags: List of dictionaries containing raw tags data
+
+    returns:
+        List of dictionaries containing transformed tags data
+    """
+    return transform_tags(context, raw_tags)
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when transformed_tags is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("transformed_tags")
+def tags(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_tags=dict,
+) -> None:
+    """
+    loads the transformed tags data into the Postgresql database
+
+    args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed tags data
+
+    returns:
+        None
+    """
+    load_tags(context, postgres_conn, transformed_tags)
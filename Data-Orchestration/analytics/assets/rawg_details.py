@@ -0,0 +1,227 @@
+import concurrent.futures
+import contextvars
+import os
+from pathlib import Path
+
+from dagster import (  # type: ignore
+    AutomationCondition,
+    Failure,
+    OpExecutionContext,
+    asset,
+)
+
+from analytics.assets.rawg import RAWGApiConfig, daily_partition
+from analytics.ops.common import memoised, upsert_to_database
+from analytics.ops.detail_cache import GameDetailCache
+from analytics.ops.instrumentation import instrumented_get, key_rotation
+from analytics.ops.profiling import profiled
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+from analytics.resources.quota import RawgQuotaResource
+
+# set RAWG_GAME_DETAILS=true to enrich raw_games with /games/{id}, the only endpoint with descriptions,
+# developers, publishers and websites. it costs one request per new or updated game
+GAME_DETAILS = os.getenv("RAWG_GAME_DETAILS", "false").lower() == "true"
+
+
+class GameDetailsConfig(RAWGApiConfig):
+    # requests in flight at once, the key pool still holds each key to requests_per_second_per_key
+    concurrency: int = 8
+    cache_path: str = str(Path(os.getenv("DAGSTER_HOME", "."), "storage", "game_details_cache.sqlite"))
+
+
+# gets the detail of a game from the RAWG API
+# @helper function
+def fetch_game_detail(api_key, game_id: int, base_url: str) -> dict | None:
+    """
+    Fetches the detail of a single game from the RAWG API.
+
+    Args:
+        api_key: RAWG API key
+        game_id: RAWG game id
+        base_url: RAWG API base url
+
+    Returns:
+        Dictionary of the game detail from the response json, None when the game no longer exists
+    """
+    r = instrumented_get(f"{base_url}/games/{game_id}", params={"key": api_key})
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.json()
+
+
+# @helper function
+def fetch_changed_details(
+    context: OpExecutionContext, config: GameDetailsConfig, raw_games: list[dict], cache: GameDetailCache
+) -> dict:
+    """
+    Fetches the details of the games that are not cached for their current updated timestamp.
+
+    Every detail is stored in the cache as soon as it arrives, and a game that was not found as a tombstone.
+    A failed request is logged and counted rather than raised, so it does not cancel the rest.
+
+    Args:
+        context: OpExecutionContext
+        config: GameDetailsConfig
+        raw_games: List of dictionaries containing raw games data
+        cache: GameDetailCache
+
+    Returns:
+        Number of games fetched, unchanged (served from the cache), missing (404) and failed as metadata,
+        with the ids of the failed games
+    """
+    cached = cache.updated([game["id"] for game in raw_games])
+    changed = [game for game in raw_games if game["id"] not in cached or cached[game["id"]] != game.get("updated")]
+    context.log.info(f"GAME DETAILS: Fetching {len(changed)} of {len(raw_games)} games, the rest are unchanged")
+
+    missing = 0
+    failed_game_ids = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=config.concurrency) as executor:
+        # each request runs in a copy of this context, so it is metered, keyed and instrumented like the rest
+        futures = {
+            executor.submit(
+                contextvars.copy_context().run, fetch_game_detail, config.api_key, game["id"], config.base_url
+            ): game
+            for game in changed
+        }
+        for future in concurrent.futures.as_completed(futures):
+            game = futures[future]
+            try:
+                detail = future.result()
+            except Exception as e:
+                context.log.warning(f"GAME DETAILS: Failed to fetch game {game['id']}, {e}")
+                failed_game_ids.append(game["id"])
+                continue
+            if detail is None:
+                context.log.warning(f"GAME DETAILS: Game {game['id']} was not found")
+                missing += 1
+            # a tombstone for a game that was not found, it is requested again once its updated timestamp moves
+            cache.store(game["id"], game.get("updated"), detail)
+
+    return {
+        "details_fetched": len(changed) - missing - len(failed_game_ids),
+        "details_unchanged": len(raw_games) - len(changed),
+        "details_missing": missing,
+        "details_failed": len(failed_game_ids),
+        "failed_game_ids": sorted(failed_game_ids),
+    }
+
+
+# @helper function
+def transform_game_details(details: list[dict]) -> list[dict]:
+    """
+    Picks the fields of the game details that the games list endpoint does not return.
+
+    Args:
+        details: List of dictionaries containing game details
+
+    Returns:
+        List of dictionaries containing transformed game details
+    """
+    return [
+        {
+            "game_id": detail["id"],
+            "description": detail.get("description_raw"),
+            "website": detail.get("website") or None,
+            "developers": detail.get("developers"),
+            "publishers": detail.get("publishers"),
+            "updated_at": detail.get("updated"),
+        }
+        for detail in details
+    ]
+
+
+# @helper function
+def load_game_details(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_details: list[dict],
+) -> None:
+    """
+    Loads the transformed game details into the Postgresql database.
+
+    Args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_details: List of dictionaries containing transformed game details
+    """
+    context.log.info("GAME DETAILS: Starting RAWG data loading")
+
+    # stops empty loads
+    if not transformed_details:
+        context.log.info("GAME DETAILS: No game details to load. Skipping insert.")
+        return
+
+    from sqlalchemy import Table, Column, Integer, Text, TIMESTAMP, MetaData
+    from sqlalchemy.dialects.postgresql import JSONB
+
+    # construct the metadata
+    context.log.info("GAME DETAILS: Defining RAWG table metadata")
+    metadata = MetaData()
+    game_details = Table(
+        "game_details",
+        metadata,
+        Column("game_id", Integer, primary_key=True, nullable=False),
+        Column("description", Text),
+        Column("website", Text),
+        Column("developers", JSONB),
+        Column("publishers", JSONB),
+        Column("updated_at", TIMESTAMP),
+    )
+    context.log.info("GAME DETAILS: Upserting RAWG data into database")
+    upsert_to_database(
+        postgres_conn=postgres_conn,
+        data=transformed_details,
+        table=game_details,
+        metadata=metadata,
+    )
+    context.log.info("GAME DETAILS: Data load complete")
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when raw_games is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("raw_games")
+def game_details(
+    context: OpExecutionContext,
+    config: GameDetailsConfig,
+    postgres_conn: PostgresqlDatabaseResource,
+    rawg_quota: RawgQuotaResource,
+    raw_games: list[dict],
+) -> dict:
+    """
+    fetches the details of the new and updated games of the partition and upserts every game's detail.
+    the run fails after the upsert when a game could not be fetched, so a retry only fetches the failed games
+
+    args:
+        context: OpExecutionContext
+        config: GameDetailsConfig
+        postgres_conn: PostgresqlDatabaseResource
+        rawg_quota: RawgQuotaResource
+        raw_games: List of dictionaries containing raw games data
+
+    returns:
+        Number of games fetched, unchanged and missing
+    """
+    key_pool = config.key_pool()
+    with GameDetailCache(config.cache_path) as cache:
+        with rawg_quota.metered(context, "game_details"), key_rotation(key_pool):
+            counts = fetch_changed_details(context, config, raw_games, cache)
+
+        # unchanged games are upserted from the cache as well, so game_details can be rebuilt without the API
+        details = cache.details([game["id"] for game in raw_games])
+    load_game_details(context, postgres_conn, transform_game_details(list(details.values())))
+
+    failed_game_ids = counts.pop("failed_game_ids")
+    if failed_game_ids:
+        raise Failure(
+            f"GAME DETAILS: Failed to fetch {len(failed_game_ids)} of {len(raw_games)} games, "
+            "the others were loaded and are not fetched again",
+            metadata={**counts, "failed_game_ids": failed_game_ids},
+        )
+    context.add_output_metadata({**counts, **rawg_quota.headroom(), **key_pool.as_metadata()})
+    return counts
@@ -0,0 +1,106 @@
+import os
+
+from dagster import (  # type: ignore
+    AutomationCondition,
+    OpExecutionContext,
+    asset,
+)
+
+from analytics.assets.rawg import (
+    daily_partition,
+    load_genres,
+    load_platforms,
+    load_stores,
+    load_tags,
+)
+from analytics.ops.common import memoised
+from analytics.ops.profiling import profiled
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+
+# set RAWG_EMBEDDED_DIMENSIONS=true to upsert the genres, platforms, stores and tags embedded in every
+# game of a raw_games partition. the endpoint sweeps of raw_genres, raw_platforms, raw_stores and raw_tags
+# are then only needed for the fields the embedded objects lack (games_count, image_background, games,
+# domain), so they are left out of rawg_freshness_sensor and run by reference_sweep_schedule instead
+EMBEDDED_DIMENSIONS = os.getenv("RAWG_EMBEDDED_DIMENSIONS", "false").lower() == "true"
+
+# dimension -> (games column, path to the object in each element, columns taken from the object).
+# the upserts only set these columns, see build_upsert_statement
+EMBEDDED_OBJECTS = {
+    "genres": ("genres", (), {"genre_id": "id", "name": "name", "slug": "slug"}),
+    "platforms": ("platforms", ("platform",), {"platform_id": "id", "name": "name", "slug": "slug"}),
+    "stores": ("stores", ("store",), {"store_id": "id", "name": "name", "slug": "slug"}),
+    "tags": (
+        "tags",
+        (),
+        {
+            "tag_id": "id",
+            "name": "name",
+            "slug": "slug",
+            "language": "language",
+            "games_count": "games_count",
+            "image_background": "image_background",
+        },
+    ),
+}
+
+
+def explode_embedded_dimensions(raw_games: list[dict]) -> dict[str, list[dict]]:
+    """
+    Collects the distinct genres, platforms, stores and tags embedded in the games.
+
+    Args:
+        raw_games: List of dictionaries containing raw games data
+
+    Returns:
+        Dimension name to rows keyed like the dimension table, with only the fields present in the objects.
+        The last object seen of each id wins for the fields it has
+    """
+    dimensions = {}
+    for dimension, (column, path, columns) in EMBEDDED_OBJECTS.items():
+        rows = {}
+        for game in raw_games:
+            for element in game.get(column) or []:
+                for key in path:
+                    element = (element or {}).get(key)
+                if element and element.get("id") is not None:
+                    # a field missing from the object is left out rather than set to None, so the upsert
+                    # keeps the value the endpoint sweep stored for it
+                    rows.setdefault(element["id"], {}).update(
+                        {table_column: element[field] for table_column, field in columns.items() if field in element}
+                    )
+        dimensions[dimension] = [rows[dimension_id] for dimension_id in sorted(rows)]
+    return dimensions
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when raw_games is unchanged, see memoised
+    code_version="1",
+)
+@profiled
+@memoised("raw_games")
+def embedded_dimensions(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    raw_games: list[dict],
+) -> dict:
+    """
+    upserts the genres, platforms, stores and tags embedded in the raw games of the partition
+
+    args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        raw_games: List of dictionaries containing raw games data
+
+    returns:
+        Dimension name to the number of rows upserted
+    """
+    dimensions = explode_embedded_dimensions(raw_games)
+    load_genres(context, postgres_conn, dimensions["genres"])
+    load_platforms(context, postgres_conn, dimensions["platforms"])
+    load_stores(context, postgres_conn, dimensions["stores"])
+    load_tags(context, postgres_conn, dimensions["tags"])
+    counts = {dimension: len(rows) for dimension, rows in dimensions.items()}
+    context.add_output_metadata({f"{dimension}_upserted": count for dimension, count in counts.items()})
+    return counts
@@ -0,0 +1,157 @@
+import os
+
+from dagster import (  # type: ignore
+    AssetExecutionContext,
+    AssetKey,
+    AssetOut,
+    Output,
+    multi_asset,
+)
+
+from analytics.assets.rawg import (
+    RAWGApiConfig,
+    daily_partition,
+    extract_games,
+    transform_games,
+    load_games,
+    extract_genres,
+    transform_genres,
+    load_genres,
+    extract_platforms,
+    transform_platforms,
+    load_platforms,
+    extract_stores,
+    transform_stores,
+    load_stores,
+    extract_tags,
+    transform_tags,
+    load_tags,
+)
+from analytics.ops.common import input_fingerprint_for, skip_if_memoised
+from analytics.ops.instrumentation import instrument, key_rotation
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+from analytics.resources.quota import RawgQuotaResource
+
+# set RAWG_FUSED_ETL=true to run raw_*, transformed_* and the load asset of each entity in a single
+# step. data is passed in memory instead of through the io manager, and only one step process is
+# launched per entity and partition instead of three.
+FUSED_ETL = os.getenv("RAWG_FUSED_ETL", "false").lower() == "true"
+
+
+def etl_asset_keys(entity: str, key_prefix: str = "postgres") -> list[AssetKey]:
+    """
+    Asset keys that have to be requested together to extract an entity.
+
+    Args:
+        entity: games, genres, platforms, stores or tags
+        key_prefix: the key prefix the rawg assets are loaded with
+
+    Returns:
+        [raw_<entity>] or, in fused mode, all three keys of the fused step
+    """
+    asset_names = (
+        [f"raw_{entity}", f"transformed_{entity}", entity] if FUSED_ETL else [f"raw_{entity}"]
+    )
+    return [AssetKey([key_prefix, asset_name]) for asset_name in asset_names]
+
+
+def build_fused_etl_asset(entity: str, extract_fn, transform_fn, load_fn):
+    """
+    Builds a multi asset that extracts, transforms and loads one entity in a single step.
+
+    A materialisation is still recorded for raw_<entity>, transformed_<entity> and <entity>, and the
+    raw and transformed data are stored by the io manager like the separate assets do, so assets
+    downstream of them (e.g. games_rollup) load them as usual. The transform and load are memoised the
+    same way as the separate assets (see memoised).
+
+    Args:
+        entity: games, genres, platforms, stores or tags
+        extract_fn: extract_<entity> helper
+        transform_fn: transform_<entity> helper
+        load_fn: load_<entity> helper
+
+    Returns:
+        AssetsDefinition
+    """
+    raw_name = f"raw_{entity}"
+    transformed_name = f"transformed_{entity}"
+
+    @multi_asset(
+        name=f"fused_{entity}",
+        outs={
+            raw_name: AssetOut(key=AssetKey(raw_name)),
+            # not required as the transform and load are memoised
+            transformed_name: AssetOut(key=AssetKey(transformed_name), code_version="1", is_required=False),
+            entity: AssetOut(key=AssetKey(entity), code_version="1", is_required=False),
+        },
+        internal_asset_deps={
+            raw_name: set(),
+            transformed_name: {AssetKey(raw_name)},
+            entity: {AssetKey(transformed_name)},
+        },
+        partitions_def=daily_partition,
+    )
+    def _fused_etl(
+        context: AssetExecutionContext,
+        config: RAWGApiConfig,
+        postgres_conn: PostgresqlDatabaseResource,
+        rawg_quota: RawgQuotaResource,
+    ):
+        # look the keys up again as load_assets_from_modules adds the key_prefix to them
+        keys = {key.path[-1]: key for key in context.assets_def.keys}
+        transformed_key = keys[transformed_name]
+        load_key = keys[entity]
+
+        key_pool = config.key_pool()
+        with instrument() as metrics, rawg_quota.metered(context, raw_name), key_rotation(key_pool):
+            raw_data, metadata = extract_fn(context, config)
+        yield Output(
+            raw_data,
+            output_name=raw_name,
+            metadata={
+                **metadata,
+                **metrics.as_metadata(rows=len(raw_data)),
+                **rawg_quota.headroom(),
+                **key_pool.as_metadata(),
+            },
+        )
+
+        input_fingerprint = input_fingerprint_for(context, transformed_key, raw_data)
+        if skip_if_memoised(context, transformed_key, raw_name, input_fingerprint):
+            return
+        with instrument() as metrics:
+            transformed_data = transform_fn(context, raw_data)
+        yield Output(
+            transformed_data,
+            output_name=transformed_name,
+            metadata={"input_fingerprint": input_fingerprint, **metrics.as_metadata(rows=len(raw_data))},
+        )
+
+        input_fingerprint = input_fingerprint_for(context, load_key, transformed_data)
+        if skip_if_memoised(context, load_key, transformed_name, input_fingerprint):
+            return
+        with instrument() as metrics:
+            load_fn(context, postgres_conn, transformed_data)
+        yield Output(
+            None,
+            output_name=entity,
+            metadata={
+                "input_fingerprint": input_fingerprint,
+                **metrics.as_metadata(rows=len(transformed_data)),
+            },
+        )
+
+    return _fused_etl
+
+
+fused_games = build_fused_etl_asset("games", extract_games, transform_games, load_games)
+fused_genres = build_fused_etl_asset(
+    "genres", extract_genres, transform_genres, load_genres
+)
+fused_platforms = build_fused_etl_asset(
+    "platforms", extract_platforms, transform_platforms, load_platforms
+)
+fused_stores = build_fused_etl_asset(
+    "stores", extract_stores, transform_stores, load_stores
+)
+fused_tags = build_fused_etl_asset("tags", extract_tags, transform_tags, load_tags)
@@ -0,0 +1,246 @@
+import datetime
+import math
+
+from dagster import (  # type: ignore
+    AutomationCondition,
+    OpExecutionContext,
+    asset,
+)
+
+from analytics.assets.rawg import daily_partition, linked_ids
+from analytics.ops.common import create_database_engine, memoised
+from analytics.ops.instrumentation import timed_statement
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+
+# key value of a dimension that is rolled up, the key columns are part of the primary key so cannot be null
+ALL = -1
+
+# each game adds to one row per grouping, so the README questions are answered from a few thousand rows:
+#   tag popularity (tag), tags per genre (genre, tag), top rated platforms (platform),
+#   ratings by decade (decade), games per genre (genre), plus the overall total ()
+ROLLUP_GROUPINGS = [
+    (),
+    ("tag_id",),
+    ("genre_id",),
+    ("genre_id", "tag_id"),
+    ("platform_id",),
+    ("decade",),
+]
+ROLLUP_KEY_COLUMNS = ("tag_id", "genre_id", "platform_id", "decade")
+
+
+# @helper function
+def rollup_state(game: dict) -> dict:
+    """
+    Reduces a transformed game to the fields the rollup is keyed and aggregated on.
+
+    Args:
+        game: transformed game
+
+    Returns:
+        Dictionary with game_id, decade, rating and the tag, genre and platform ids
+    """
+    released = game.get("released")
+    if isinstance(released, str):
+        released = datetime.date.fromisoformat(released[:10])
+    rating = game.get("rating")
+    if isinstance(rating, float) and math.isnan(rating):
+        rating = None
+    return {
+        "game_id": game["game_id"],
+        "decade": released.year // 10 * 10 if isinstance(released, datetime.date) else None,
+        "rating": float(rating) if rating is not None else None,
+        "tag_ids": linked_ids(game, "tags", ("id",)),
+        "genre_ids": linked_ids(game, "genres", ("id",)),
+        "platform_ids": linked_ids(game, "platforms", ("platform", "id")),
+    }
+
+
+# @helper function
+def rollup_contributions(states: list[dict]) -> dict[tuple, list]:
+    """
+    Adds up what each game contributes to the rollup.
+
+    Args:
+        states: games reduced by rollup_state
+
+    Returns:
+        Dictionary of (tag_id, genre_id, platform_id, decade) to [game_count, rating_sum, rating_count]
+    """
+    contributions = {}
+    for state in states:
+        members = {
+            "tag_id": state["tag_ids"],
+            "genre_id": state["genre_ids"],
+            "platform_id": state["platform_ids"],
+            "decade": [state["decade"]] if state["decade"] is not None else [],
+        }
+        for grouping in ROLLUP_GROUPINGS:
+            keys = [{}]
+            for column in grouping:
+                keys = [{**key, column: member} for key in keys for member in members[column]]
+            for key in keys:
+                row = contributions.setdefault(
+                    tuple(key.get(column, ALL) for column in ROLLUP_KEY_COLUMNS), [0, 0.0, 0]
+                )
+                row[0] += 1
+                if state["rating"] is not None:
+                    row[1] += state["rating"]
+                    row[2] += 1
+    return contributions
+
+
+# @helper function
+def rollup_deltas(before: list[dict], after: list[dict]) -> dict[tuple, list]:
+    """
+    Computes the change to the rollup when games go from their before to their after state.
+
+    Args:
+        before: states of the games as last applied to the rollup (empty for new games)
+        after: states of the same games now
+
+    Returns:
+        Dictionary of rollup key to [game_count, rating_sum, rating_count] deltas, unchanged keys left out
+    """
+    deltas = rollup_contributions(after)
+    for key, (game_count, rating_sum, rating_count) in rollup_contributions(before).items():
+        row = deltas.setdefault(key, [0, 0.0, 0])
+        row[0] -= game_count
+        row[1] -= rating_sum
+        row[2] -= rating_count
+    return {
+        key: row
+        for key, row in deltas.items()
+        if row[0] != 0 or row[2] != 0 or not math.isclose(row[1], 0.0, abs_tol=1e-9)
+    }
+
+
+# @helper function
+def apply_rollup_deltas(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_games: list[dict],
+) -> dict:
+    """
+    Applies the change of a partition's games to games_rollup, in one transaction.
+
+    games_rollup_state holds each game as it was last applied, that is the before row. It is replaced with
+    the after row in the same transaction, so re-running a partition adds nothing.
+
+    Args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed games data
+
+    Returns:
+        Metadata with the number of games and rollup rows changed
+    """
+    from sqlalchemy import Column, Float, Integer, MetaData, Table, select
+    from sqlalchemy.dialects import postgresql
+
+    metadata = MetaData()
+    games_rollup = Table(
+        "games_rollup",
+        metadata,
+        *[Column(column, Integer, primary_key=True, nullable=False) for column in ROLLUP_KEY_COLUMNS],
+        Column("game_count", Integer, nullable=False),
+        Column("rating_sum", Float, nullable=False),
+        Column("rating_count", Integer, nullable=False),
+    )
+    games_rollup_state = Table(
+        "games_rollup_state",
+        metadata,
+        Column("game_id", Integer, primary_key=True, nullable=False),
+        Column("decade", Integer),
+        Column("rating", Float),
+        Column("tag_ids", postgresql.ARRAY(Integer)),
+        Column("genre_ids", postgresql.ARRAY(Integer)),
+        Column("platform_ids", postgresql.ARRAY(Integer)),
+    )
+
+    # keyed on game_id, a game can be listed on two pages when RAWG reorders between requests
+    after = list({game["game_id"]: rollup_state(game) for game in transformed_games}.values())
+    engine = create_database_engine(postgres_conn)
+    metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        # locks the before rows so a concurrent partition cannot apply the same game twice
+        with timed_statement():
+            before = [
+                dict(row._mapping)
+                for row in connection.execute(
+                    select(games_rollup_state)
+                    .where(games_rollup_state.c.game_id.in_([state["game_id"] for state in after]))
+                    .with_for_update()
+                )
+            ]
+        deltas = rollup_deltas(before, after)
+        context.log.info(f"ROLLUP: Applying {len(deltas)} changed rollup rows")
+
+        if deltas:
+            # sorted so concurrent partitions lock the rollup rows in the same order
+            insert_statement = postgresql.insert(games_rollup).values(
+                [
+                    {
+                        **dict(zip(ROLLUP_KEY_COLUMNS, key)),
+                        "game_count": game_count,
+                        "rating_sum": rating_sum,
+                        "rating_count": rating_count,
+                    }
+                    for key, (game_count, rating_sum, rating_count) in sorted(deltas.items())
+                ]
+            )
+            with timed_statement():
+                connection.execute(
+                    insert_statement.on_conflict_do_update(
+                        index_elements=list(ROLLUP_KEY_COLUMNS),
+                        set_={
+                            column: games_rollup.c[column] + insert_statement.excluded[column]
+                            for column in ("game_count", "rating_sum", "rating_count")
+                        },
+                    )
+                )
+            # rows of members no game has any more
+            with timed_statement():
+                connection.execute(games_rollup.delete().where(games_rollup.c.game_count <= 0))
+
+        if after:
+            insert_statement = postgresql.insert(games_rollup_state).values(after)
+            with timed_statement():
+                connection.execute(
+                    insert_statement.on_conflict_do_update(
+                        index_elements=["game_id"],
+                        set_={c.key: c for c in insert_statement.excluded if c.key != "game_id"},
+                    )
+                )
+
+    return {"games_count": len(after), "rollup_rows_changed": len(deltas)}
+
+
+@asset(
+    partitions_def=daily_partition,
+    automation_condition=AutomationCondition.eager(),
+    output_required=False,  # skipped when transformed_games is unchanged, see memoised
+    code_version="1",
+)
+@memoised("transformed_games")
+def games_rollup(
+    context: OpExecutionContext,
+    postgres_conn: PostgresqlDatabaseResource,
+    transformed_games=dict,
+) -> None:
+    """
+    keeps game count, rating sum and rating count per tag, genre, platform and release decade up to date
+
+    args:
+        context: OpExecutionContext
+        postgres_conn: PostgresqlDatabaseResource
+        transformed_games: List of dictionaries containing transformed games data
+
+    returns:
+        None
+    """
+    if not transformed_games:
+        context.log.info("ROLLUP: No transformed games for this partition. Skipping.")
+        return
+    context.add_output_metadata(apply_rollup_deltas(context, postgres_conn, transformed_games))
@@ -1,29 +1,89 @@
-from dagster import Definitions, EnvVar, load_assets_from_modules
+import os
+
+from dagster import Definitions, EnvVar, definitions, load_assets_from_modules
 
 from analytics.jobs.rawg import run_rawg_etl  # noqa: TID252
 from analytics.resources.postgresql import PostgresqlDatabaseResource
-from analytics.schedules.rawg import rawg_schedule
-from analytics.assets import rawg
-from analytics.assets.airbyte import all_airbyte_assets, airbyte_workspace
-from analytics.assets.dbt import dbt_warehouse, dbt_warehouse_resource
-
-rawg_assets = load_assets_from_modules(
-    [rawg], group_name="RAW_EXTRACTIONS_LOAD_INTO_POSTGRES", key_prefix="postgres"
-)
-
-defs = Definitions(
-    assets=[*rawg_assets, *all_airbyte_assets, dbt_warehouse],
-    jobs=[run_rawg_etl],
-    schedules=[rawg_schedule],  # current schedule is set to run every hour
-    resources={
-        "postgres_conn": PostgresqlDatabaseResource(
-            DB_SERVER_NAME=EnvVar("DB_SERVER_NAME"),
-            DB_DATABASE_NAME=EnvVar("DB_DATABASE_NAME"),
-            DB_USERNAME=EnvVar("DB_USERNAME"),
-            DB_PASSWORD=EnvVar("DB_PASSWORD"),
-            DB_PORT=EnvVar("DB_PORT"),
-        ),
-        "airbyte": airbyte_workspace,
-        "dbt_warehouse_resource": dbt_warehouse_resource,
-    },
-)
+from analytics.resources.quota import RawgQuotaResource
+from analytics.resources.refresh_policy import RefreshPolicyResource
+from analytics.schedules.rawg import rawg_schedule, games_refresh_schedule, reference_sweep_schedule
+from analytics.sensors.rawg import checkpoint_resume_sensor, rawg_freshness_sensor
+from analytics.sensors.airbyte import airbyte_freshness_sensor
+from analytics.assets import rawg, rawg_details, rawg_embedded, rawg_fused, rawg_rollup
+
+# the dbt and airbyte definitions are only imported when the code location is loaded, as building them
+# parses the dbt project and reads the airbyte workspace. run and step processes rebuild them from what the
+# code location recorded (the manifest path, the airbyte workspace state) instead of parsing or reading
+# again. set ANALYTICS_LOAD_DBT=false or ANALYTICS_LOAD_AIRBYTE=false to leave them out, e.g. for a code
+# location that only extracts from RAWG
+LOAD_DBT = os.getenv("ANALYTICS_LOAD_DBT", "true").lower() == "true"
+LOAD_AIRBYTE = os.getenv("ANALYTICS_LOAD_AIRBYTE", "true").lower() == "true"
+
+
+def build_rawg_definitions() -> Definitions:
+    rawg_assets = load_assets_from_modules(
+        [
+            rawg_fused if rawg_fused.FUSED_ETL else rawg,
+            # reads transformed_games from the io manager, which the fused step stores it through as well
+            rawg_rollup,
+            *([rawg_embedded] if rawg_embedded.EMBEDDED_DIMENSIONS else []),
+            *([rawg_details] if rawg_details.GAME_DETAILS else []),
+        ],
+        group_name="RAW_EXTRACTIONS_LOAD_INTO_POSTGRES", key_prefix="postgres"
+    )
+
+    return Definitions(
+        assets=rawg_assets,
+        jobs=[run_rawg_etl],
+        schedules=[
+            rawg_schedule,  # current schedule is set to run every hour
+            games_refresh_schedule,  # every 15 minutes, refreshes due partitions older than the probe window
+            # weekly, replaces the freshness sensor's reference probes when dimensions come from raw_games
+            *([reference_sweep_schedule] if rawg_embedded.EMBEDDED_DIMENSIONS else []),
+        ],
+        sensors=[
+            rawg_freshness_sensor,
+            # resumes unfinished sweeps when extraction is checkpointed
+            *([checkpoint_resume_sensor] if rawg.CHECKPOINT_EXTRACTION else []),
+        ],
+        resources={
+            "postgres_conn": PostgresqlDatabaseResource(
+                DB_SERVER_NAME=EnvVar("DB_SERVER_NAME"),
+                DB_DATABASE_NAME=EnvVar("DB_DATABASE_NAME"),
+                DB_USERNAME=EnvVar("DB_USERNAME"),
+                DB_PASSWORD=EnvVar("DB_PASSWORD"),
+                DB_PORT=EnvVar("DB_PORT"),
+            ),
+            "games_refresh_policy": RefreshPolicyResource(),
+            # set daily_budget / monthly_budget to enforce the RAWG key's quota, calls are recorded either way
+            "rawg_quota": RawgQuotaResource(),
+        },
+    )
+
+
+def build_dbt_definitions() -> Definitions:
+    from analytics.assets.dbt import dbt_warehouse, dbt_warehouse_resource
+
+    return Definitions(
+        assets=[dbt_warehouse],
+        resources={"dbt_warehouse_resource": dbt_warehouse_resource},
+    )
+
+
+def build_airbyte_definitions() -> Definitions:
+    from analytics.assets.airbyte import all_airbyte_assets, airbyte_workspace
+
+    return Definitions(
+        assets=all_airbyte_assets,
+        sensors=[airbyte_freshness_sensor],
+        resources={"airbyte": airbyte_workspace},
+    )
+
+
+@definitions
+def defs() -> Definitions:
+    return Definitions.merge(
+        build_rawg_definitions(),
+        *([build_dbt_definitions()] if LOAD_DBT else []),
+        *([build_airbyte_definitions()] if LOAD_AIRBYTE else []),
+    )
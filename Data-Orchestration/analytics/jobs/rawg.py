@@ -1,7 +1,7 @@
 from datetime import datetime
 
-from analytics.ops.rawg import extract_rawg, transform_rawg, load_rawg
-from dagster import job, daily_partitioned_config
+from analytics.ops.rawg import extract_rawg, fetch_rawg_pages, transform_rawg, load_rawg, report_rawg_totals
+from dagster import job, daily_partitioned_config, multiprocess_executor
 
 
 @daily_partitioned_config(start_date=datetime(2024, 1, 1))
@@ -9,7 +9,9 @@ def rawg_daily_partition(start: datetime, _end: datetime):
     return {"ops": {"extract_rawg": {"config": {"date": start.strftime("%Y-%m-%d")}}}}
 
 
-@job(config=rawg_daily_partition)
+# each chunk of pages is fetched, transformed and loaded by its own steps, so the chunks run in parallel
+# processes and the fetches of one chunk overlap with the upserts of another
+@job(config=rawg_daily_partition, executor_def=multiprocess_executor)
 def run_rawg_etl():
-    raw_games = extract_rawg()
-    load_rawg(transform_rawg(raw_games))
+    loaded = extract_rawg().map(fetch_rawg_pages).map(transform_rawg).map(load_rawg)
+    report_rawg_totals(loaded.collect())
@@ -0,0 +1,160 @@
+import fcntl
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from dagster import Failure
+
+# checkpoints older than this are discarded instead of resumed, the pages staged in them may be stale
+DEFAULT_MAX_AGE_HOURS = 24.0
+
+
+class CheckpointInUse(Failure):
+    pass
+
+
+class ExtractionCheckpoint:
+    """Pages of one asset and partition extracted so far, persisted so a failed or unfinished run resumes.
+
+    Each page is appended to results.jsonl and then state.json (last page) is replaced, so a run stopped
+    between the two writes only loses the page state.json does not count yet. A disabled checkpoint stages
+    nothing and always starts from page 1.
+
+    The pages are fetched by number, so the last page is all a resumed run needs. From resume to finish the
+    run holds a lock on the checkpoint, and a second run of the same asset and partition (e.g. a manual
+    run next to the one checkpoint_resume_sensor requested) fails instead of appending to the same files.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        asset: str,
+        partition_key: str | None,
+        enabled: bool = True,
+        max_age_hours: float = DEFAULT_MAX_AGE_HOURS,
+    ):
+        self.path = Path(directory, asset, partition_key or "unpartitioned")
+        # next to the checkpoint rather than in it, so clear() does not remove a lock that is held
+        self._lock_path = Path(directory, asset, f".{self.path.name}.lock")
+        self._lock_file = None
+        self.enabled = enabled
+        self.max_age_hours = max_age_hours
+        self.page = 0
+        self.resumed_from_page = 1
+
+    @property
+    def _state_path(self) -> Path:
+        return self.path / "state.json"
+
+    @property
+    def _results_path(self) -> Path:
+        return self.path / "results.jsonl"
+
+    def _lock(self) -> None:
+        if self._lock_file is not None:
+            return
+        self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = self._lock_path.open("a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise CheckpointInUse(
+                f"Another run is extracting {self.path.parent.name} {self.path.name} from its checkpoint"
+            )
+        self._lock_file = lock_file
+
+    def _unlock(self) -> None:
+        if self._lock_file is not None:
+            # closing the file releases the lock, as does the process exiting after a failed run
+            self._lock_file.close()
+            self._lock_file = None
+
+    def resume(self) -> tuple[int, list[dict]]:
+        """Locks the checkpoint and loads what an earlier run left in it.
+
+        Returns:
+            (next page to fetch, results staged by the earlier runs), (1, []) when there is nothing to resume
+
+        Raises:
+            CheckpointInUse: when another run holds the checkpoint
+        """
+        if not self.enabled:
+            return 1, []
+        self._lock()
+        if not self._state_path.exists():
+            return 1, []
+        state = json.loads(self._state_path.read_text())
+        if time.time() - state["saved_at"] > self.max_age_hours * 3600:
+            self.clear()
+            return 1, []
+
+        lines = self._results_path.read_text().splitlines(keepends=True)
+        if len(lines) > state["page"]:
+            # a page appended by a run that stopped before updating state.json
+            lines = lines[: state["page"]]
+            self._results_path.write_text("".join(lines))
+        results = [result for line in lines for result in json.loads(line)]
+        self.page = state["page"]
+        self.resumed_from_page = self.page + 1
+        return self.resumed_from_page, results
+
+    def save(self, page: int, results: list[dict]) -> None:
+        """Stages the results of a page after the pages already saved."""
+        if not self.enabled:
+            return
+        self._lock()
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self.page == 0:
+            # a fresh sweep, drop whatever a discarded checkpoint left behind
+            self._results_path.unlink(missing_ok=True)
+        with self._results_path.open("a") as results_file:
+            results_file.write(json.dumps(results) + "\n")
+
+        self.page = page
+        state = {"page": page, "saved_at": time.time()}
+        temporary_path = self._state_path.with_suffix(".tmp")
+        temporary_path.write_text(json.dumps(state))
+        os.replace(temporary_path, self._state_path)
+
+    def clear(self) -> None:
+        """Removes the checkpoint once the sweep is complete."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.page = 0
+
+    def finish(self, complete: bool) -> dict:
+        """Clears the checkpoint once the sweep is complete, keeps it for the next run otherwise. Unlocks it.
+
+        Args:
+            complete: whether the last page of the sweep was fetched
+
+        Returns:
+            Checkpoint metadata of the run, empty when checkpoints are disabled
+        """
+        if not self.enabled:
+            return {}
+        metadata = {"resumed_from_page": self.resumed_from_page, "sweep_complete": complete}
+        if complete:
+            self.clear()
+        else:
+            metadata["checkpoint_page"] = self.page
+        self._unlock()
+        return metadata
+
+
+def pending_checkpoints(directory: str) -> list[tuple[str, str, dict]]:
+    """
+    Lists the unfinished sweeps checkpointed in the directory.
+
+    Args:
+        directory: checkpoint directory, see RAWGApiConfig.checkpoint_dir
+
+    Returns:
+        (asset, partition key, state) of every checkpoint
+    """
+    return [
+        (state_path.parent.parent.name, state_path.parent.name, json.loads(state_path.read_text()))
+        for state_path in sorted(Path(directory).glob("*/*/state.json"))
+    ]
@@ -1,9 +1,18 @@
-from sqlalchemy import Table, MetaData, URL, create_engine
-from sqlalchemy.dialects import postgresql
+import functools
+import hashlib
+import inspect
+import json
 import math
+from typing import TYPE_CHECKING
 
+from dagster import AssetObservation, AssetRecordsFilter, Output
+
+from analytics.ops.instrumentation import instrument, timed_statement
 from analytics.resources.postgresql import PostgresqlDatabaseResource
 
+if TYPE_CHECKING:
+    from sqlalchemy import Table, MetaData
+
 
 # throws an error because metacritic can be null, so we must clean the data before inserting
 def clean_value(v):
@@ -14,22 +23,135 @@ def clean_value(v):
     return v
 
 
-def upsert_to_database(
-    postgres_conn: PostgresqlDatabaseResource,
-    data: list[dict],
-    table: Table,
-    metadata: MetaData,
-) -> None:
-    """Upserts data into the target database.
+def fingerprint_records(data) -> str:
+    """Returns a stable sha256 fingerprint of the data passed between assets.
 
     Args:
-        postgres_conn: a PostgresqlDatabaseResource object
-        data: the transformed data
+        data: list of dicts (or any json serialisable value)
+
+    Returns:
+        Hex digest that only changes when the content of the data changes
     """
+    payload = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    cleaned_data = [{k: clean_value(v) for k, v in row.items()} for row in data]
 
-    data = cleaned_data
+def input_fingerprint_for(context, asset_key, data) -> str:
+    """Fingerprints an asset's input together with the asset's code_version.
+
+    Args:
+        context: the asset execution context
+        asset_key: the asset the input belongs to
+        data: the upstream input
+
+    Returns:
+        Fingerprint stored as input_fingerprint metadata on materialisation
+    """
+    code_version = context.assets_def.code_versions_by_key.get(asset_key)
+    return fingerprint_records([code_version, data])
+
+
+def skip_if_memoised(context, asset_key, input_name: str, input_fingerprint: str) -> bool:
+    """Checks the last materialisation of the asset partition for the same input fingerprint.
+
+    When it matches, an observation with the skip reason and the cached run id is recorded.
+
+    Args:
+        context: the asset execution context
+        asset_key: the asset to check
+        input_name: name of the upstream input, used in the skip reason
+        input_fingerprint: fingerprint from input_fingerprint_for
+
+    Returns:
+        True if the asset should be skipped
+    """
+    partition_key = context.partition_key if context.has_partition_key else None
+    last_materialization = context.instance.fetch_materializations(
+        AssetRecordsFilter(
+            asset_key=asset_key,
+            asset_partitions=[partition_key] if partition_key else None,
+        ),
+        limit=1,
+    ).records
+    if not last_materialization:
+        return False
+
+    last_record = last_materialization[0]
+    last_fingerprint = last_record.asset_materialization.metadata.get("input_fingerprint")
+    if not last_fingerprint or last_fingerprint.value != input_fingerprint:
+        return False
+
+    context.log.info(
+        f"{asset_key.to_user_string()}: {input_name} unchanged since run "
+        f"{last_record.run_id}, skipping."
+    )
+    context.log_event(
+        AssetObservation(
+            asset_key=asset_key,
+            partition=partition_key,
+            metadata={
+                "skip_reason": f"{input_name} unchanged since last materialisation",
+                "input_fingerprint": input_fingerprint,
+                "cached_run_id": last_record.run_id,
+            },
+        )
+    )
+    return True
+
+
+def memoised(input_name: str):
+    """Skips an asset when its upstream input is identical to the last successful run.
+
+    The input named `input_name` is fingerprinted together with the asset's code_version.
+    If the last materialisation of the same partition recorded the same fingerprint, the
+    asset records an observation with the skip reason and does not materialise, so the
+    previously stored (cached) result stays in place and eager downstream assets are not
+    triggered. Otherwise the asset runs as normal and the fingerprint is stored as metadata, together
+    with the rows per second and statement time of the run (see instrumentation.instrument).
+
+    The wrapped asset must be defined with output_required=False.
+
+    Args:
+        input_name: name of the upstream input parameter to fingerprint
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(context, *args, **kwargs):
+            bound = inspect.signature(fn).bind(context, *args, **kwargs)
+            input_fingerprint = input_fingerprint_for(
+                context, context.asset_key, bound.arguments.get(input_name)
+            )
+            if skip_if_memoised(context, context.asset_key, input_name, input_fingerprint):
+                return
+
+            with instrument() as metrics:
+                result = fn(context, *args, **kwargs)
+            data = bound.arguments.get(input_name)
+            yield Output(
+                result,
+                metadata={
+                    "input_fingerprint": input_fingerprint,
+                    **metrics.as_metadata(rows=len(data) if isinstance(data, list) else None),
+                },
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def create_database_engine(postgres_conn: PostgresqlDatabaseResource):
+    """Creates a SQLAlchemy engine for the Postgresql database.
+
+    Args:
+        postgres_conn: a PostgresqlDatabaseResource object
+
+    Returns:
+        sqlalchemy Engine
+    """
+    # imported here so that importing the code location does not pay for sqlalchemy
+    from sqlalchemy import URL, create_engine
 
     connection_url = URL.create(
         drivername="postgresql+pg8000",
@@ -39,19 +161,195 @@ def upsert_to_database(
         port=postgres_conn.DB_PORT,
         database=postgres_conn.DB_DATABASE_NAME,
     )
+    return create_engine(connection_url)
+
+
+def bootstrap_schema(engine, metadata: "MetaData") -> None:
+    """Creates missing tables, and adds columns and indexes that were added to an existing table's definition.
+
+    metadata.create_all only creates tables that do not exist yet, so e.g. generated columns added to the
+    games definition would otherwise never reach a database that already has a games table.
+
+    Args:
+        engine: sqlalchemy Engine
+        metadata: MetaData holding the table definitions
+    """
+    from sqlalchemy import inspect as inspect_schema, text
+    from sqlalchemy.schema import CreateColumn
 
-    engine = create_engine(connection_url)
     metadata.create_all(engine)
+    inspector = inspect_schema(engine)
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl}'))
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
+
+
+def build_upsert_statement(data: list[dict], table: "Table"):
+    """Builds an INSERT ... ON CONFLICT DO UPDATE on the primary key of the table.
+
+    Only the columns present in the data are updated, so partial rows (e.g. the dimension objects
+    embedded in games) leave the other columns of existing rows as they are.
+
+    Args:
+        data: the transformed data
+        table: the target table
+
+    Returns:
+        sqlalchemy Insert statement
+    """
+    from sqlalchemy.dialects import postgresql
+
+    cleaned_data = [{k: clean_value(v) for k, v in row.items()} for row in data]
 
     key_columns = [pk_column.name for pk_column in table.primary_key.columns.values()]
+    # generated columns can only be written by postgres
+    generated_columns = [column.name for column in table.columns if column.computed is not None]
+    present_columns = set().union(*cleaned_data)
 
-    insert_statement = postgresql.insert(table).values(data)
-    upsert_statement = insert_statement.on_conflict_do_update(
+    insert_statement = postgresql.insert(table).values(cleaned_data)
+    return insert_statement.on_conflict_do_update(
         index_elements=key_columns,
-        set_={c.key: c for c in insert_statement.excluded if c.key not in key_columns},
+        set_={
+            c.key: c
+            for c in insert_statement.excluded
+            if c.key not in key_columns and c.key not in generated_columns and c.key in present_columns
+        },
     )
+
+
+def upsert_to_database(
+    postgres_conn: PostgresqlDatabaseResource,
+    data: list[dict],
+    table: "Table",
+    metadata: "MetaData",
+) -> None:
+    """Upserts data into the target database.
+
+    Rows with different columns are upserted by separate statements in the same transaction, so a
+    partial row only updates the columns it has.
+
+    Args:
+        postgres_conn: a PostgresqlDatabaseResource object
+        data: the transformed data
+    """
+    engine = create_database_engine(postgres_conn)
+    bootstrap_schema(engine, metadata)
+
+    rows_by_columns = {}
+    for row in data:
+        rows_by_columns.setdefault(tuple(sorted(row)), []).append(row)
+
+    with engine.begin() as connection:
+        try:
+            for rows in rows_by_columns.values():
+                with timed_statement():
+                    connection.execute(build_upsert_statement(rows, table))
+        except Exception as e:
+            raise Exception(f"Failed to upsert to database, {e}")
+
+
+def create_range_partitions(connection, table: "Table", partitions: dict[str, tuple[str, str]]) -> None:
+    """Creates the missing range partitions of a partitioned table.
+
+    Args:
+        connection: open sqlalchemy connection, the partitions are created in its transaction
+        table: the partitioned table
+        partitions: partition table name to its (from, to) bounds, to is exclusive
+    """
+    from sqlalchemy import text
+
+    relkind = connection.execute(
+        text("select relkind from pg_class where oid = to_regclass(:name)"), {"name": table.name}
+    ).scalar()
+    if relkind != "p":
+        # postgres cannot partition a table in place
+        raise Exception(
+            f"Table {table.name} exists but is not partitioned, rename it and reload its rows into a new {table.name}"
+        )
+    for name, (lower, upper) in partitions.items():
+        connection.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table.name}" '
+                f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            )
+        )
+
+
+def upsert_with_links_to_database(
+    postgres_conn: PostgresqlDatabaseResource,
+    data: list[dict],
+    table: "Table",
+    links: dict["Table", list[dict]],
+    metadata: "MetaData",
+    partitions: dict[str, tuple[str, str]] | None = None,
+    removed_keys: list | None = None,
+) -> None:
+    """Upserts data and replaces its rows in the link tables, all in one transaction.
+
+    The link rows of every upserted parent are deleted before the new ones are inserted, so links
+    that were removed upstream (e.g. a tag taken off a game) do not linger. Parents in removed_keys are
+    deleted together with their link rows.
+
+    Args:
+        postgres_conn: a PostgresqlDatabaseResource object
+        data: the transformed data
+        table: the parent table, the primary key column it shares with every link table is their foreign key
+        links: link table to the link rows of the upserted parents
+        metadata: MetaData holding the parent and link tables
+        partitions: range partitions of a partitioned parent table the data needs, created when missing.
+            the partition column is part of its primary key, so a row whose partition column changed
+            (e.g. a new release date) is deleted from its old partition rather than duplicated
+        removed_keys: key column values of parents that cannot be upserted any more, e.g. games that lost
+            the partition column of their primary key
+    """
+    from sqlalchemy import tuple_
+    from sqlalchemy.dialects import postgresql
+
+    primary_key = [pk_column.name for pk_column in table.primary_key.columns.values()]
+    (key_column,) = [
+        name for name in primary_key if all(name in link_table.c for link_table in links)
+    ]
+    removed_keys = removed_keys or []
+    keys = [row[key_column] for row in data]
+
+    engine = create_database_engine(postgres_conn)
+    bootstrap_schema(engine, metadata)
+
     with engine.begin() as connection:
         try:
-            result = connection.execute(upsert_statement)
+            if partitions:
+                create_range_partitions(connection, table, partitions)
+                with timed_statement():
+                    connection.execute(
+                        table.delete()
+                        .where(table.c[key_column].in_(keys))
+                        .where(
+                            tuple_(*[table.c[name] for name in primary_key]).not_in(
+                                [tuple(row[name] for name in primary_key) for row in data]
+                            )
+                        )
+                    )
+            if removed_keys:
+                with timed_statement():
+                    connection.execute(table.delete().where(table.c[key_column].in_(removed_keys)))
+            if data:
+                with timed_statement():
+                    connection.execute(build_upsert_statement(data, table))
+            for link_table, link_rows in links.items():
+                with timed_statement():
+                    connection.execute(
+                        link_table.delete().where(link_table.c[key_column].in_(keys + removed_keys))
+                    )
+                if link_rows:
+                    with timed_statement():
+                        connection.execute(postgresql.insert(link_table).values(link_rows))
         except Exception as e:
             raise Exception(f"Failed to upsert to database, {e}")
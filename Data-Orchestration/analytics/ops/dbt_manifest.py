@@ -0,0 +1,145 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# not exported by the dagster package, it is what Definitions are loaded and reconstructed with. dagster is
+# pinned to a minor version for it, and analytics_tests/ops/test_dagster_internals.py fails when an upgrade moves it
+from dagster._core.definitions.definitions_load_context import (  # type: ignore
+    DefinitionsLoadContext,
+    DefinitionsLoadType,
+)
+
+# manifests are cached per project fingerprint under target/manifests/<fingerprint>/
+dbt_manifest_cache_dir = Path("target", "manifests")
+
+# generated or installed by dbt, so they are not part of the project fingerprint
+dbt_ignored_dirs = {"target", "dbt_packages", "logs"}
+
+# manifests of other fingerprints are kept this long, so a process still loading an older version of the
+# project (e.g. a run launched just before a deploy) does not have its manifest removed under it
+DBT_MANIFEST_MAX_AGE_SECONDS = 24 * 60 * 60
+
+# reconstruction metadata key of the manifest the code location was loaded with
+DBT_MANIFEST_METADATA_KEY = "analytics/dbt_manifest_path"
+
+# env_var("NAME") calls in profiles.yml, their values are rendered into the manifest (e.g. target.dbname)
+ENV_VAR_PATTERN = re.compile(r"""env_var\(\s*['"]([^'"]+)['"]""")
+
+
+def dbt_profiles_path(project_dir: Path) -> Path:
+    """The profiles.yml dbt reads: DBT_PROFILES_DIR, then the project directory, then ~/.dbt."""
+    if os.getenv("DBT_PROFILES_DIR"):
+        return Path(os.environ["DBT_PROFILES_DIR"], "profiles.yml")
+    if project_dir.joinpath("profiles.yml").exists():
+        return project_dir.joinpath("profiles.yml")
+    return Path.home().joinpath(".dbt", "profiles.yml")
+
+
+def dbt_project_fingerprint(project_dir: Path, target: str | None = None) -> str:
+    """Hashes the project files together with the target and profile the project is parsed for.
+
+    The manifest depends on more than the project files: sources.yml renders the database and schema of
+    the target, and the profile renders them from environment variables.
+
+    Args:
+        project_dir: the dbt project directory
+        target: the dbt target, None for the profile's default target
+
+    Returns:
+        Hex digest that changes whenever a model, macro, config or package file, the target, the profile or
+        an environment variable the profile reads changes
+    """
+    digest = hashlib.sha256()
+    for path in sorted(project_dir.rglob("*")):
+        relative_path = path.relative_to(project_dir)
+        if relative_path.parts[0] in dbt_ignored_dirs or relative_path.name == ".user.yml":
+            continue
+        if path.is_file():
+            digest.update(relative_path.as_posix().encode("utf-8"))
+            digest.update(path.read_bytes())
+
+    digest.update(f"target={target or ''}".encode("utf-8"))
+    profiles_path = dbt_profiles_path(project_dir)
+    if profiles_path.exists():
+        profiles = profiles_path.read_text()
+        digest.update(profiles.encode("utf-8"))
+        for name in sorted(set(ENV_VAR_PATTERN.findall(profiles))):
+            digest.update(f"{name}={os.getenv(name, '')}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_dbt_manifest_path(dbt, project_dir: Path) -> Path:
+    """Returns the cached manifest for the current project, running dbt parse only on a cache miss.
+
+    The project is parsed into a temporary directory that is renamed into place, so a manifest is never
+    read half written. When another process renames its manifest into place first, that one is used.
+
+    Args:
+        dbt: the DbtCliResource used to parse the project
+        project_dir: the dbt project directory
+
+    Returns:
+        Path to manifest.json
+    """
+    fingerprint = dbt_project_fingerprint(project_dir, dbt.target)
+    cache_dir = project_dir.joinpath(dbt_manifest_cache_dir)
+    manifest_dir = cache_dir.joinpath(fingerprint)
+    if manifest_dir.joinpath("manifest.json").exists():
+        # marks the manifest as in use, see DBT_MANIFEST_MAX_AGE_SECONDS
+        os.utime(manifest_dir)
+        return manifest_dir.joinpath("manifest.json")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    parse_dir = Path(tempfile.mkdtemp(prefix=f".{fingerprint}.", dir=cache_dir))
+    try:
+        dbt.cli(["--quiet", "parse"], target_path=parse_dir.relative_to(project_dir)).wait()
+        try:
+            os.replace(parse_dir, manifest_dir)
+        except OSError:
+            # another process parsed the same project first, its manifest is complete as well
+            if not manifest_dir.joinpath("manifest.json").exists():
+                raise
+    finally:
+        shutil.rmtree(parse_dir, ignore_errors=True)
+
+    # remove manifests of older versions of the project, and parses abandoned by processes that died
+    for cached_dir in cache_dir.iterdir():
+        if cached_dir.name == fingerprint:
+            continue
+        try:
+            age = time.time() - cached_dir.stat().st_mtime
+        except FileNotFoundError:  # renamed or removed by another process
+            continue
+        if age > DBT_MANIFEST_MAX_AGE_SECONDS:
+            shutil.rmtree(cached_dir, ignore_errors=True)
+    return manifest_dir.joinpath("manifest.json")
+
+
+def load_dbt_manifest_path(dbt, project_dir: Path) -> Path:
+    """Returns the manifest to build the dbt assets from, for the process the definitions are loaded in.
+
+    The code location finds (or parses) the manifest with get_dbt_manifest_path and records its path as
+    reconstruction metadata. Run and step processes reconstruct the definitions from that path, so they
+    neither hash the project nor parse it again.
+
+    Args:
+        dbt: the DbtCliResource used to parse the project
+        project_dir: the dbt project directory
+
+    Returns:
+        Path to manifest.json
+    """
+    context = DefinitionsLoadContext.get()
+    manifest_path = None
+    if context.load_type == DefinitionsLoadType.RECONSTRUCTION:
+        recorded_path = context.reconstruction_metadata.get(DBT_MANIFEST_METADATA_KEY)
+        if recorded_path and Path(recorded_path).exists():
+            manifest_path = Path(recorded_path)
+    if manifest_path is None:
+        manifest_path = get_dbt_manifest_path(dbt, project_dir)
+    context.add_to_pending_reconstruction_metadata(DBT_MANIFEST_METADATA_KEY, os.fspath(manifest_path))
+    return manifest_path
@@ -0,0 +1,61 @@
+import datetime
+import os
+from pathlib import Path
+
+from dagster import Config
+
+
+class DbtRunConfig(Config):
+    # when the whole project is selected, only run models whose code changed since the last successful run
+    # (state:modified+), deferring refs to unselected models to the saved state
+    only_modified: bool = False
+
+
+# @helper function
+def dbt_run_args(context, config, state_dir: Path) -> list[str]:
+    """Builds the dbt run arguments for the selected assets.
+
+    When only some of the dbt assets are selected (e.g. eager automation requesting the models downstream
+    of the sources that were just synced), dagster-dbt adds the matching --select to the invocation.
+    state:modified+ is only added for full selections, as it would otherwise widen the subset.
+
+    Args:
+        context: AssetExecutionContext of the dbt_assets run
+        config: DbtRunConfig of the run
+        state_dir: directory holding the manifest of the last successful run
+
+    Returns:
+        Arguments for DbtCliResource.cli
+    """
+    args = ["run"]
+    is_subset = context.selected_asset_keys != set(context.assets_def.keys)
+    if is_subset:
+        context.log.info(f"DBT: Running {len(context.selected_asset_keys)} selected models")
+    elif config.only_modified and state_dir.joinpath("manifest.json").exists():
+        context.log.info("DBT: Running models modified since the last successful run")
+        args += ["--select", "state:modified+", "--defer", "--state", os.fspath(state_dir)]
+    else:
+        context.log.info("DBT: Running all models")
+    return args
+
+
+# @helper function
+def model_timings(run_results: dict) -> dict[str, dict]:
+    """Reads the compile and execute time of every node from dbt's run_results.json.
+
+    Args:
+        run_results: parsed run_results.json artifact
+
+    Returns:
+        Dictionary of unique_id to timing metadata
+    """
+    timings = {}
+    for result in run_results.get("results", []):
+        timing = {"status": result["status"], "execution_time": result["execution_time"]}
+        for step in result.get("timing", []):
+            if step.get("started_at") and step.get("completed_at"):
+                started_at = datetime.datetime.fromisoformat(step["started_at"].replace("Z", "+00:00"))
+                completed_at = datetime.datetime.fromisoformat(step["completed_at"].replace("Z", "+00:00"))
+                timing[f"{step['name']}_time"] = (completed_at - started_at).total_seconds()
+        timings[result["unique_id"]] = timing
+    return timings
@@ -0,0 +1,79 @@
+import contextlib
+import json
+import sqlite3
+from pathlib import Path
+
+# ids per sqlite statement, well below the bound parameter limit
+CHUNK_SIZE = 500
+
+
+class GameDetailCache:
+    """Game details by id, with the updated timestamp of the game they were fetched for.
+
+    Kept in a SQLite file shared by all run processes, so a game is only fetched again once its updated
+    timestamp in raw_games moves. A detail is stored as soon as it is fetched, so a failed run keeps the
+    details it already paid for. A game the API does not find is stored as a tombstone (a null detail),
+    so it is not requested again until its updated timestamp moves either.
+
+    Used as a context manager, every call of the run shares one connection; otherwise each call opens its own.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+
+    def __enter__(self) -> "GameDetailCache":
+        self._connection = self._connect()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._connection.close()
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute(
+            "create table if not exists game_details (game_id integer primary key, updated text, "
+            "detail text not null)"
+        )
+        return connection
+
+    @contextlib.contextmanager
+    def _connected(self):
+        if self._connection is not None:
+            yield self._connection
+            return
+        with contextlib.closing(self._connect()) as connection:
+            yield connection
+
+    def _select(self, columns: str, game_ids: list[int]) -> list[tuple]:
+        rows = []
+        with self._connected() as connection:
+            for start in range(0, len(game_ids), CHUNK_SIZE):
+                chunk = game_ids[start : start + CHUNK_SIZE]
+                rows.extend(
+                    connection.execute(
+                        f"select game_id, {columns} from game_details where game_id in ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+        return rows
+
+    def updated(self, game_ids: list[int]) -> dict[int, str | None]:
+        """Updated timestamp each cached game (or tombstone) was fetched for, games that are not cached are left out."""
+        return dict(self._select("updated", game_ids))
+
+    def details(self, game_ids: list[int]) -> dict[int, dict]:
+        """Cached detail of each game, games that are not cached or not found are left out."""
+        details = {game_id: json.loads(detail) for game_id, detail in self._select("detail", game_ids)}
+        return {game_id: detail for game_id, detail in details.items() if detail is not None}
+
+    def store(self, game_id: int, updated: str | None, detail: dict | None) -> None:
+        """Stores the detail of a game, None for a game that was not found."""
+        with self._connected() as connection, connection:
+            connection.execute(
+                "insert into game_details values (?, ?, ?) on conflict (game_id) "
+                "do update set updated = excluded.updated, detail = excluded.detail",
+                (game_id, updated, json.dumps(detail)),
+            )
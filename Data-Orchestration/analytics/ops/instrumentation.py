@@ -0,0 +1,175 @@
+import contextlib
+import contextvars
+import math
+import re
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from analytics.ops.key_pool import MAX_KEY_WAIT_SECONDS, KeysCoolingDown
+
+# metrics of the stage currently running, set by instrument() so that fetch and upsert helpers can
+# record into it without passing it through every call
+_current_metrics = contextvars.ContextVar("stage_metrics", default=None)
+# (quota ledger, asset, partition key, priority) the requests are recorded against, set by quota_scope()
+_current_quota = contextvars.ContextVar("quota_scope", default=None)
+# ApiKeyPool the requests take their key from, set by key_rotation()
+_current_key_pool = contextvars.ContextVar("key_pool", default=None)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile, e.g. p=95 for p95.
+
+    Args:
+        values: samples
+        p: percentile between 0 and 100
+    """
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+class StageMetrics:
+    """Collects API requests, SQL statements and throughput of one extract, transform or load stage."""
+
+    def __init__(self):
+        self.request_seconds = []
+        self.bytes_downloaded = 0
+        self.statement_seconds = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def duration_seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def record_request(self, seconds: float, size: int) -> None:
+        self.request_seconds.append(seconds)
+        self.bytes_downloaded += size
+
+    def record_statement(self, seconds: float) -> None:
+        self.statement_seconds.append(seconds)
+
+    def as_metadata(self, rows: int | None = None) -> dict:
+        """Structured metadata for the materialisation, only the parts the stage used are included.
+
+        Args:
+            rows: rows processed by the stage, for rows_per_second
+
+        Returns:
+            Dictionary of metadata
+        """
+        duration = self.duration_seconds
+        metadata = {"duration_seconds": round(duration, 3)}
+        if rows is not None:
+            metadata["rows"] = rows
+            metadata["rows_per_second"] = round(rows / duration, 1) if duration > 0 else 0.0
+        if self.request_seconds:
+            metadata["api_requests"] = len(self.request_seconds)
+            metadata["bytes_downloaded"] = self.bytes_downloaded
+            for p in (50, 95, 99):
+                metadata[f"api_latency_p{p}_ms"] = round(percentile(self.request_seconds, p) * 1000, 1)
+        if self.statement_seconds:
+            metadata["statement_count"] = len(self.statement_seconds)
+            metadata["statement_seconds"] = round(sum(self.statement_seconds), 3)
+        return metadata
+
+
+@contextlib.contextmanager
+def instrument():
+    """Collects the metrics of everything run inside the block.
+
+    Returns:
+        StageMetrics, call as_metadata() on it once the block has finished
+    """
+    metrics = StageMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.finished = time.perf_counter()
+        _current_metrics.reset(token)
+
+
+@contextlib.contextmanager
+def quota_scope(quota, asset: str, partition_key: str | None, priority: str):
+    """Records the requests made inside the block in the quota ledger, see RawgQuotaResource.metered."""
+    token = _current_quota.set((quota, asset, partition_key, priority))
+    try:
+        yield
+    finally:
+        _current_quota.reset(token)
+
+
+@contextlib.contextmanager
+def key_rotation(pool):
+    """Sends the requests made inside the block with keys from the pool instead of their key param."""
+    token = _current_key_pool.set(pool)
+    try:
+        yield
+    finally:
+        _current_key_pool.reset(token)
+
+
+def endpoint_of(url: str) -> str:
+    """Endpoint of a RAWG url with ids replaced, e.g. .../api/games/3498 -> games/{id}."""
+    path = urlparse(url).path.split("/api/", 1)[-1].strip("/")
+    return re.sub(r"(?<=/)\d+(?=/|$)", "{id}", path)
+
+
+def instrumented_get(url: str, **kwargs) -> requests.Response:
+    """requests.get that records its latency and response size in the current stage, if any.
+
+    Inside a quota_scope the request is refused when the budget is spent and recorded in the ledger.
+    Inside key_rotation the key is taken from the pool, and a request answered with 401 or 429 is
+    retried with another key. When every key is cooling down for longer than MAX_KEY_WAIT_SECONDS, the
+    429 is returned rather than waited out.
+
+    Args:
+        url: request url
+        **kwargs: passed to requests.get
+
+    Returns:
+        requests.Response
+    """
+    pool = _current_key_pool.get()
+    if pool is None:
+        return _recorded_get(url, **kwargs)
+    response = None
+    for _ in range(2 * len(pool.keys)):
+        try:
+            key = pool.acquire(max_wait_seconds=MAX_KEY_WAIT_SECONDS)
+        except KeysCoolingDown:
+            if response is None:
+                raise
+            break
+        response = _recorded_get(url, **{**kwargs, "params": {**kwargs.get("params", {}), "key": key}})
+        pool.release(key, response.status_code, response.headers.get("Retry-After"))
+        if response.status_code not in (401, 429):
+            break
+    return response
+
+
+def _recorded_get(url: str, **kwargs) -> requests.Response:
+    scope = _current_quota.get()
+    if scope is not None:
+        quota, asset, partition_key, priority = scope
+        quota.reserve(asset, partition_key, endpoint_of(url), priority)
+    started = time.perf_counter()
+    response = requests.get(url, **kwargs)
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_request(time.perf_counter() - started, len(response.content))
+    return response
+
+
+@contextlib.contextmanager
+def timed_statement():
+    """Records the time of the SQL statement executed inside the block in the current stage, if any."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.record_statement(time.perf_counter() - started)
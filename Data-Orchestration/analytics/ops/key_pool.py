@@ -0,0 +1,139 @@
+import dataclasses
+import threading
+import time
+
+import requests
+
+ROUND_ROBIN = "round_robin"
+LEAST_RECENTLY_THROTTLED = "least_recently_throttled"
+# seconds a throttled key is left out when the response has no Retry-After, doubled on every 429 in a row
+DEFAULT_COOLDOWN_SECONDS = 60.0
+MAX_COOLDOWN_SECONDS = 3600.0
+# longest a request waits for a key to come out of its cooldown, past it the 429 is returned to the caller
+MAX_KEY_WAIT_SECONDS = 10.0
+
+# pools are shared by every asset and thread of a process so the per key rates hold across them
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+
+class NoApiKeys(requests.RequestException):
+    pass
+
+
+class KeysCoolingDown(requests.RequestException):
+    pass
+
+
+@dataclasses.dataclass
+class KeyState:
+    available_at: float = 0.0
+    last_used: float = float("-inf")
+    last_throttled: float = float("-inf")
+    consecutive_throttles: int = 0
+    requests: int = 0
+    throttles: int = 0
+    removed: bool = False
+
+
+class ApiKeyPool:
+    """Spreads RAWG requests over several API keys.
+
+    Each key is used at most `requests_per_second` times a second (0 for no limit). A key answered
+    with 429 is left out of the rotation until its Retry-After (or a cooldown that doubles with every
+    429 in a row) has passed, a key answered with 401 is removed for good. Keys are picked round robin,
+    or least_recently_throttled picks the ready key that was throttled longest ago.
+    """
+
+    def __init__(self, keys: list[str], strategy: str = ROUND_ROBIN, requests_per_second: float = 0.0):
+        if strategy not in (ROUND_ROBIN, LEAST_RECENTLY_THROTTLED):
+            raise ValueError(f"Unknown key strategy {strategy}, use {ROUND_ROBIN} or {LEAST_RECENTLY_THROTTLED}")
+        self.keys = list(dict.fromkeys(key for key in keys if key))
+        if not self.keys:
+            raise NoApiKeys("No RAWG API key, set api_key or RAWG_API_KEYS")
+        self.strategy = strategy
+        self.interval_seconds = 1 / requests_per_second if requests_per_second else 0.0
+        self.states = {key: KeyState() for key in self.keys}
+        self._next = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def shared(cls, keys: list[str], strategy: str = ROUND_ROBIN, requests_per_second: float = 0.0) -> "ApiKeyPool":
+        """The pool of the process for these keys and settings, created on first use."""
+        pool_key = (tuple(keys), strategy, requests_per_second)
+        with _shared_pools_lock:
+            if pool_key not in _shared_pools:
+                _shared_pools[pool_key] = cls(keys, strategy, requests_per_second)
+            return _shared_pools[pool_key]
+
+    def _pick(self, ready: list[str]) -> str:
+        if self.strategy == LEAST_RECENTLY_THROTTLED:
+            return min(ready, key=lambda key: (self.states[key].last_throttled, self.states[key].last_used))
+        # round robin: the first ready key at or after the position of the last pick
+        for offset in range(len(self.keys)):
+            key = self.keys[(self._next + offset) % len(self.keys)]
+            if key in ready:
+                self._next = (self.keys.index(key) + 1) % len(self.keys)
+                return key
+
+    def acquire(self, max_wait_seconds: float | None = None) -> str:
+        """Waits until a key may make a request within its rate and returns it.
+
+        Args:
+            max_wait_seconds: longest to wait for a key, None to wait as long as the cooldowns last
+
+        Raises:
+            NoApiKeys: when every key has been removed
+            KeysCoolingDown: when no key is ready within max_wait_seconds
+        """
+        deadline = None if max_wait_seconds is None else time.monotonic() + max_wait_seconds
+        with self._condition:
+            while True:
+                active = [key for key in self.keys if not self.states[key].removed]
+                if not active:
+                    raise NoApiKeys("Every RAWG API key was rejected with 401")
+                now = time.monotonic()
+                ready = [key for key in active if self.states[key].available_at <= now]
+                if ready:
+                    key = self._pick(ready)
+                    state = self.states[key]
+                    state.available_at = now + self.interval_seconds
+                    state.last_used = now
+                    state.requests += 1
+                    return key
+                available_at = min(self.states[key].available_at for key in active)
+                if deadline is not None and available_at > deadline:
+                    raise KeysCoolingDown(f"Every RAWG API key is cooling down for {available_at - now:.0f}s")
+                self._condition.wait(timeout=available_at - now)
+
+    def release(self, key: str, status_code: int, retry_after: str | None = None) -> None:
+        """Reports the response status of a request made with the key."""
+        with self._condition:
+            state = self.states[key]
+            now = time.monotonic()
+            if status_code == 401:
+                state.removed = True
+            elif status_code == 429:
+                state.throttles += 1
+                state.consecutive_throttles += 1
+                state.last_throttled = now
+                cooldown = DEFAULT_COOLDOWN_SECONDS * 2 ** (state.consecutive_throttles - 1)
+                if retry_after and retry_after.isdigit():
+                    cooldown = float(retry_after)
+                state.available_at = max(state.available_at, now + min(cooldown, MAX_COOLDOWN_SECONDS))
+            else:
+                state.consecutive_throttles = 0
+            self._condition.notify_all()
+
+    def as_metadata(self) -> dict:
+        now = time.monotonic()
+        return {
+            "api_keys_active": sum(
+                1 for state in self.states.values() if not state.removed and state.available_at <= now
+            ),
+            "api_keys_cooling_down": sum(
+                1 for state in self.states.values() if not state.removed and state.available_at > now
+            ),
+            "api_keys_removed": sum(1 for state in self.states.values() if state.removed),
+            "api_key_throttles": sum(state.throttles for state in self.states.values()),
+        }
@@ -0,0 +1,178 @@
+import collections
+import contextlib
+import functools
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from dagster import DagsterError, DynamicOutput, MetadataValue, Output
+
+# share of asset and op executions that are profiled, e.g. RAWG_PROFILE_SAMPLE_RATE=0.05 profiles one run in 20.
+# a single run can be profiled regardless with the run tag rawg/profile=true
+PROFILE_SAMPLE_RATE = float(os.getenv("RAWG_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TAG = "rawg/profile"
+SAMPLE_INTERVAL_SECONDS = 0.005
+TOP_ALLOCATIONS = 25
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval, a cheap statistical CPU profile.
+
+    Stacks are counted in the collapsed format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float = SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profile:
+    """CPU samples and traced memory of one profiled execution."""
+
+    def __init__(self):
+        self.sampler = StackSampler(threading.get_ident())
+        self.peak_bytes = 0
+        self.snapshot = None
+        self.seconds = 0.0
+
+
+@contextlib.contextmanager
+def profile():
+    """Samples the stack and traces allocations of everything run inside the block.
+
+    Returns:
+        Profile, complete once the block has finished
+    """
+    result = Profile()
+    # tracing may already be on, e.g. under benchmarks.scale, in which case it is left running
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    result.sampler.start()
+    try:
+        yield result
+    finally:
+        result.sampler.stop()
+        result.seconds = time.perf_counter() - started
+        result.peak_bytes = tracemalloc.get_traced_memory()[1]
+        result.snapshot = tracemalloc.take_snapshot()
+        if not tracing:
+            tracemalloc.stop()
+
+
+def should_profile(context) -> bool:
+    try:
+        tags = context.run.tags
+    except DagsterError:
+        return False  # directly invoked, e.g. in a test, there is no run storage to write the profile to
+    return tags.get(PROFILE_TAG) == "true" or random.random() < PROFILE_SAMPLE_RATE
+
+
+def write_profile(context, result: Profile) -> dict:
+    """Stores the profile next to the Dagster storage and returns metadata linking to it.
+
+    Args:
+        context: the asset or op execution context
+        result: the finished profile
+
+    Returns:
+        Dictionary of metadata for the output
+    """
+    step = context.op_execution_context.op.name
+    mapping_key = context.op_execution_context.get_mapping_key()
+    if mapping_key:
+        step = f"{step}[{mapping_key}]"  # each mapped copy of a dynamic op gets its own profile
+    directory = Path(context.instance.storage_directory(), "profiles", context.run.run_id, step)
+    directory.mkdir(parents=True, exist_ok=True)
+    cpu_path = directory / "cpu.folded"
+    cpu_path.write_text(result.sampler.folded())
+
+    top = result.snapshot.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    ).statistics("lineno")[:TOP_ALLOCATIONS]
+    memory_path = directory / "memory.txt"
+    memory_path.write_text(
+        f"peak traced memory: {result.peak_bytes / 2**20:.1f} MiB\n"
+        f"top {len(top)} allocations still held at the end, by line:\n"
+        + "".join(f"{statistic}\n" for statistic in top)
+    )
+    return {
+        "profile_cpu": MetadataValue.path(str(cpu_path)),
+        "profile_memory": MetadataValue.path(str(memory_path)),
+        "profile_cpu_samples": sum(result.sampler.stacks.values()),
+        "profile_peak_memory_mb": round(result.peak_bytes / 2**20, 1),
+    }
+
+
+def profiled(fn):
+    """Profiles a sampled share of the executions of an asset or op.
+
+    Profiled executions store a sampled CPU profile (collapsed stacks, for a flame graph) and the
+    tracemalloc peak with the top allocations under <DAGSTER_HOME>/storage/profiles/<run id>/<step>,
+    and link them from the output metadata. Executions that are not sampled only pay for one random().
+
+    Place it directly under @asset or @op (above @memoised).
+    """
+    if inspect.isgeneratorfunction(fn):
+
+        @functools.wraps(fn)
+        def generator_wrapper(context, *args, **kwargs):
+            if not should_profile(context):
+                yield from fn(context, *args, **kwargs)
+                return
+            # events are held back until the profile is written, so it can be linked from the output
+            with profile() as result:
+                events = list(fn(context, *args, **kwargs))
+            metadata = write_profile(context, result)
+            for event in events:
+                if isinstance(event, Output):
+                    event = event.with_metadata({**event.metadata, **metadata})
+                elif isinstance(event, DynamicOutput):
+                    event = DynamicOutput(
+                        event.value, event.mapping_key, event.output_name, {**event.metadata, **metadata}
+                    )
+                yield event
+
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(context, *args, **kwargs):
+        if not should_profile(context):
+            return fn(context, *args, **kwargs)
+        with profile() as result:
+            value = fn(context, *args, **kwargs)
+        context.add_output_metadata(write_profile(context, result))
+        return value
+
+    return wrapper
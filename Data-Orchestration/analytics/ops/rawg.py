@@ -1,33 +1,35 @@
-import requests
-import pandas as pd
-
-from dagster import op, Config, EnvVar, OpExecutionContext
-
-from sqlalchemy import (
-    Table,
-    Column,
-    Integer,
-    Text,
-    Date,
-    Boolean,
-    Numeric,
-    TIMESTAMP,
-    MetaData,
-)
-from sqlalchemy.dialects.postgresql import JSONB
+import math
+import os
+
+from dagster import op, Config, DynamicOut, DynamicOutput, EnvVar, Failure, OpExecutionContext
 
 from analytics.resources.postgresql import PostgresqlDatabaseResource
 from analytics.ops.common import upsert_to_database
+from analytics.ops.instrumentation import instrumented_get
+from analytics.ops.profiling import profiled
+from analytics.resources.quota import RawgQuotaResource
+
+
+PAGE_SIZE = 40
 
 
-class RAWGApiConfig(Config):
+class RAWGFetchConfig(Config):
     api_key: str = EnvVar("api_key")
+    base_url: str = os.getenv("RAWG_API_BASE_URL", "https://api.rawg.io/api")
+
+
+class RAWGApiConfig(RAWGFetchConfig):
     date: str
+    max_pages: int = 5
+    # pages fetched, transformed and loaded by each mapped chunk of ops
+    pages_per_chunk: int = 1
 
 
 # gets a page of games from the RAWG API
 # @helper function
-def fetch_games_page(api_key, dt_range, page: int = 1, page_size: int = 40) -> dict:
+def fetch_games_page(
+    api_key, dt_range, page: int = 1, page_size: int = 40, base_url: str = "https://api.rawg.io/api"
+) -> dict:
     """
     Fetches a single page of games from the RAWG API.
 
@@ -36,11 +38,12 @@ def fetch_games_page(api_key, dt_range, page: int = 1, page_size: int = 40) -> d
         dt_range: Date timestamp to filter games
         page: The page number to fetch
         page_size: Number of results per page
+        base_url: RAWG API base url
 
     Returns:
         Dictionary of 40 games from the response json
     """
-    url = "https://api.rawg.io/api/games"
+    url = f"{base_url}/games"
     params = {
         "key": api_key,
         "ordering": "released",  # sorting extracted data by release date (other option includes -updated for most recently updated)
@@ -48,53 +51,82 @@ def fetch_games_page(api_key, dt_range, page: int = 1, page_size: int = 40) -> d
         "page_size": page_size,
         "dates": dt_range,  # rawg api expects date range in the format YYYY-MM-DD,YYYY-MM-DD
     }
-    r = requests.get(url, params=params)
+    r = instrumented_get(url, params=params)
     r.raise_for_status()
     return r.json()
 
 
-# extracts individual games from the RAWG API response into a list of dicts 'games'
+# plans the pages of the partition and fans them out in chunks, each chunk is fetched, transformed and loaded
+# by its own ops so the chunks run in parallel under the multiprocess executor
+@op(out=DynamicOut(dict))
+@profiled
+def extract_rawg(context: OpExecutionContext, config: RAWGApiConfig, rawg_quota: RawgQuotaResource):
+    from analytics.assets.rawg import GAMES_PARTITIONED
+
+    # load_rawg upserts on game_id alone and does not route games to their release year partition, so the
+    # job is stopped before it spends any API calls
+    if GAMES_PARTITIONED:
+        raise Failure(
+            "run_rawg_etl cannot load into the partitioned games table, materialise the games assets instead "
+            "or unset RAWG_GAMES_PARTITIONED"
+        )
+
+    context.log.info("Starting RAWG data extraction")
+    dt_range = f"{config.date},{config.date}"
+
+    # a single result is enough to read the number of games of the partition
+    with rawg_quota.metered(context, "extract_rawg"):
+        data = fetch_games_page(
+            api_key=config.api_key, dt_range=dt_range, page=1, page_size=1, base_url=config.base_url
+        )
+    count = data.get("count", 0)
+    pages = min(math.ceil(count / PAGE_SIZE), config.max_pages)
+    context.log.info(f"{count} games on {pages} pages, fanning out {config.pages_per_chunk} pages per chunk")
+
+    headroom = rawg_quota.headroom()
+    for first_page in range(1, pages + 1, config.pages_per_chunk):
+        last_page = min(first_page + config.pages_per_chunk - 1, pages)
+        yield DynamicOutput(
+            {"date": config.date, "first_page": first_page, "last_page": last_page},
+            mapping_key=f"pages_{first_page}_{last_page}",
+            metadata=headroom,
+        )
+
+
+# extracts individual games of a chunk of pages from the RAWG API response into a list of dicts 'games'
 @op
-def extract_rawg(
-    context: OpExecutionContext, config: RAWGApiConfig, max_pages=5
+@profiled
+def fetch_rawg_pages(
+    context: OpExecutionContext, config: RAWGFetchConfig, rawg_quota: RawgQuotaResource, page_range: dict
 ) -> list[dict]:
-    context.log.info("Starting RAWG data extraction")
-    page = 1
-    non_empty_pages = 0  # implementing a way to track non-empty pages so that we can only extract pages with data
-    total_fetched = 0
     games = []
-
-    while non_empty_pages < max_pages:
-        context.log.info(f"Fetching RAWG page {page}")
-        dt_range = f"{config.date},{config.date}"
-        data = fetch_games_page(api_key=config.api_key, dt_range=dt_range, page=page)
-        results = data.get("results", [])
-
-        if results:
-            non_empty_pages += 1
-            games.extend(results)
-            total_fetched += len(results)
-            context.log.info(f"Fetched page {page}, total games: {total_fetched}")
-
-        else:
-            context.log.info(f"Page {page} is empty, skipping")
-
-        page += 1
-
-        if max_pages and page > max_pages:
-            break
-
-        # break if there are no more valid pages so that the code doesnt loop infinitely.
-        if not data.get("next"):
-            break
-
-    context.log.info(f"Finished fetching RAWG data, total games: {total_fetched}")
+    dt_range = f"{page_range['date']},{page_range['date']}"
+
+    with rawg_quota.metered(context, "extract_rawg"):
+        for page in range(page_range["first_page"], page_range["last_page"] + 1):
+            context.log.info(f"Fetching RAWG page {page}")
+            data = fetch_games_page(
+                api_key=config.api_key, dt_range=dt_range, page=page, base_url=config.base_url
+            )
+            games.extend(data.get("results", []))
+
+            # the partition may have shrunk since the pages were planned
+            if not data.get("next"):
+                break
+
+    context.log.info(f"Fetched pages {page_range['first_page']}-{page}, games: {len(games)}")
+    context.add_output_metadata({"games_count": len(games), **rawg_quota.headroom()})
     return games
 
 
 @op
+@profiled
 def transform_rawg(context: OpExecutionContext, games: list[dict]) -> list[dict]:
+    import pandas as pd  # imported here so that importing the code location does not pay for it
+
     context.log.info("Starting RAWG data transformation")
+    if not games:
+        return []
     df = pd.json_normalize(games)
     df_renamed = df.rename(
         columns={
@@ -137,34 +169,25 @@ def transform_rawg(context: OpExecutionContext, games: list[dict]) -> list[dict]
 
 
 @op
+@profiled
 def load_rawg(
     context: OpExecutionContext,
     postgres_conn: PostgresqlDatabaseResource,
     transformed_game=dict,
-) -> None:
+) -> int:
+    # imported here so that importing the code location does not pay for sqlalchemy
+    from sqlalchemy import MetaData
+
+    from analytics.assets.rawg import games_table
+
     context.log.info("Starting RAWG data loading")
+    if not transformed_game:
+        return 0
 
-    # construct the metadata
+    # the same games table the games assets load into, so neither creates it without the other's columns
     context.log.info("Defining RAWG table metadata")
     metadata = MetaData()
-    games = Table(
-        "games",
-        metadata,
-        Column("game_id", Integer, primary_key=True),
-        Column("slug", Text),
-        Column("name", Text),
-        Column("released", Date),
-        Column("tba", Boolean),
-        Column("rating", Numeric(3, 2)),
-        Column("ratings", JSONB),
-        Column("rating_top", Numeric(5, 2)),
-        Column("ratings_count", Integer),
-        Column("reviews_text_count", Integer),
-        Column("metacritic", Numeric(5, 2)),
-        Column("playtime", Numeric(5, 2)),
-        Column("updated_at", TIMESTAMP),
-        Column("platforms", JSONB),
-    )
+    games = games_table(metadata)
     context.log.info("Upserting RAWG data into database")
     upsert_to_database(
         postgres_conn=postgres_conn,
@@ -173,3 +196,12 @@ def load_rawg(
         metadata=metadata,
     )
     context.log.info("Data load complete")
+    return len(transformed_game)
+
+
+@op
+def report_rawg_totals(context: OpExecutionContext, loaded: list[int]) -> int:
+    total = sum(loaded)
+    context.log.info(f"Loaded {total} games in {len(loaded)} chunks")
+    context.add_output_metadata({"games_loaded": total, "chunks": len(loaded)})
+    return total
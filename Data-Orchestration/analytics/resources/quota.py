@@ -0,0 +1,187 @@
+import contextlib
+import datetime
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from dagster import ConfigurableResource, Failure
+from pydantic import PrivateAttr
+
+from analytics.ops.instrumentation import quota_scope
+
+# run tag with the priority of the work, runs tagged rawg/priority=low are deferred first
+PRIORITY_TAG = "rawg/priority"
+LOW_PRIORITY = "low"
+NORMAL_PRIORITY = "normal"
+
+
+class QuotaExceeded(Failure):
+    pass
+
+
+class RawgQuotaResource(ConfigurableResource):
+    """Ledger of RAWG API calls by day, asset, partition and endpoint, with daily and monthly budgets.
+
+    Every request made by instrumented_get inside metered() is counted in a SQLite file shared by all
+    run processes. Once less than `low_priority_reserve` of either budget is left, low priority work
+    (e.g. refreshes of old partitions) is refused so the rest is kept for new partitions; once a budget
+    is spent every request is refused. Without budgets the calls are only recorded.
+    """
+
+    ledger_path: str = str(Path(os.getenv("DAGSTER_HOME", "."), "storage", "rawg_quota.sqlite"))
+    daily_budget: int | None = None
+    monthly_budget: int | None = None
+    low_priority_reserve: float = 0.2
+
+    # one connection for the requests of a metered() block, shared by the threads the block runs requests in
+    _connection: sqlite3.Connection | None = PrivateAttr(default=None)
+    _connection_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _schema_ready: bool = PrivateAttr(default=False)
+
+    def setup_for_execution(self, context) -> None:
+        with contextlib.closing(self._connect()):
+            pass
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.ledger_path).parent.mkdir(parents=True, exist_ok=True)
+        # autocommit, so reserve() can take the write lock with begin immediate itself
+        connection = sqlite3.connect(self.ledger_path, timeout=30, isolation_level=None, check_same_thread=False)
+        if not self._schema_ready:
+            connection.execute(
+                "create table if not exists api_calls (day text not null, asset text not null, "
+                "partition_key text not null, endpoint text not null, calls integer not null, "
+                "primary key (day, asset, partition_key, endpoint))"
+            )
+            self._schema_ready = True
+        return connection
+
+    @contextlib.contextmanager
+    def _connected(self):
+        """The connection of the current metered() block, or a connection of its own outside of one."""
+        if self._connection is not None:
+            with self._connection_lock:
+                yield self._connection
+            return
+        with contextlib.closing(self._connect()) as connection:
+            yield connection
+
+    def _record(self, connection: sqlite3.Connection, asset, partition_key, endpoint, calls, day) -> None:
+        connection.execute(
+            "insert into api_calls values (?, ?, ?, ?, ?) on conflict (day, asset, partition_key, endpoint) "
+            "do update set calls = calls + excluded.calls",
+            (day.isoformat(), asset, partition_key or "", endpoint, calls),
+        )
+
+    def _usage(self, connection: sqlite3.Connection, day: datetime.date) -> tuple[int, int]:
+        return connection.execute(
+            "select coalesce(sum(case when day = ? then calls end), 0), coalesce(sum(calls), 0) "
+            "from api_calls where day >= ? and day <= ?",
+            (day.isoformat(), day.replace(day=1).isoformat(), day.isoformat()),
+        ).fetchone()
+
+    def _within_budgets(self, daily: int, monthly: int, priority: str) -> bool:
+        reserve = self.low_priority_reserve if priority == LOW_PRIORITY else 0.0
+        return all(
+            used < budget * (1 - reserve)
+            for used, budget in ((daily, self.daily_budget), (monthly, self.monthly_budget))
+            if budget is not None
+        )
+
+    def record(
+        self,
+        asset: str,
+        partition_key: str | None,
+        endpoint: str,
+        calls: int = 1,
+        day: datetime.date | None = None,
+    ) -> None:
+        day = day or datetime.datetime.now(datetime.timezone.utc).date()
+        with self._connected() as connection:
+            self._record(connection, asset, partition_key, endpoint, calls, day)
+
+    def reserve(self, asset: str, partition_key: str | None, endpoint: str, priority: str = NORMAL_PRIORITY) -> None:
+        """Records a request before it is made, or refuses it when the budget for the priority is spent.
+
+        The budget check and the insert run in one begin immediate transaction, so concurrent runs and
+        threads cannot both take the last call of a budget.
+
+        Raises:
+            QuotaExceeded: when the budget left for the priority is spent
+        """
+        day = datetime.datetime.now(datetime.timezone.utc).date()
+        with self._connected() as connection:
+            connection.execute("begin immediate")
+            try:
+                allowed = self._within_budgets(*self._usage(connection, day), priority)
+                if allowed:
+                    self._record(connection, asset, partition_key, endpoint, 1, day)
+                connection.execute("commit")
+            except BaseException:
+                connection.execute("rollback")
+                raise
+        if not allowed:
+            raise self._exceeded(priority)
+
+    def usage(self, day: datetime.date | None = None) -> tuple[int, int]:
+        """Calls made on the day and in its month so far.
+
+        Args:
+            day: UTC day, today by default
+
+        Returns:
+            (calls on the day, calls in the month)
+        """
+        day = day or datetime.datetime.now(datetime.timezone.utc).date()
+        with self._connected() as connection:
+            return self._usage(connection, day)
+
+    def headroom(self, day: datetime.date | None = None) -> dict:
+        """Calls made and left of each budget, as materialisation metadata."""
+        daily, monthly = self.usage(day)
+        metadata = {"quota_calls_today": daily, "quota_calls_this_month": monthly}
+        if self.daily_budget is not None:
+            metadata["quota_daily_remaining"] = self.daily_budget - daily
+        if self.monthly_budget is not None:
+            metadata["quota_monthly_remaining"] = self.monthly_budget - monthly
+        return metadata
+
+    def allows(self, priority: str = NORMAL_PRIORITY, day: datetime.date | None = None) -> bool:
+        """Whether work of the priority may make another request within the budgets."""
+        return self._within_budgets(*self.usage(day), priority)
+
+    def _exceeded(self, priority: str) -> QuotaExceeded:
+        return QuotaExceeded(
+            description=f"RAWG API budget left for {priority} priority work is spent",
+            metadata=self.headroom(),
+            allow_retries=False,
+        )
+
+    def check(self, priority: str = NORMAL_PRIORITY) -> None:
+        if not self.allows(priority):
+            raise self._exceeded(priority)
+
+    @contextlib.contextmanager
+    def metered(self, context, asset: str):
+        """Records every RAWG request made inside the block against the asset and partition.
+
+        The priority is read from the rawg/priority run tag. The block is refused upfront when the
+        budget for that priority is spent, and stopped before the request that would exceed it.
+
+        Args:
+            context: the asset or op execution context
+            asset: name the calls are recorded under, e.g. raw_games
+        """
+        priority = context.op_execution_context.run_tags.get(PRIORITY_TAG, NORMAL_PRIORITY)
+        partition_key = context.partition_key if context.has_partition_key else None
+        previous_connection = self._connection
+        connection = previous_connection or self._connect()
+        self._connection = connection
+        try:
+            self.check(priority)
+            with quota_scope(self, asset, partition_key, priority):
+                yield
+        finally:
+            self._connection = previous_connection
+            if previous_connection is None:
+                connection.close()
@@ -0,0 +1,34 @@
+import math
+from datetime import timedelta
+
+from dagster import ConfigurableResource
+
+
+class RefreshPolicyResource(ConfigurableResource):
+    """Decaying re-extraction cadence for release date partitions.
+
+    Partitions released in the last `first_tier_days` are refreshed every `base_interval_hours`.
+    Each following tier is `decay_factor` times as old and refreshed `decay_factor` times less
+    often, e.g. with the defaults: < 7 days every 1h, < 14 days every 2h, < 28 days every 4h ...
+    up to `max_interval_days`. Partitions within the probe window of rawg_freshness_sensor are left to it,
+    see games_refresh_schedule.
+    """
+
+    first_tier_days: int = 7
+    base_interval_hours: float = 1.0
+    decay_factor: float = 2.0
+    max_interval_days: float = 30.0
+    api_call_budget_per_tick: int = 100
+    # partitions without a recorded api_calls are priced as a full extraction, RAWGApiConfig.max_pages
+    unknown_partition_api_calls: int = 20
+
+    def refresh_tier(self, age_days: float) -> int:
+        if age_days < self.first_tier_days:
+            return 0
+        return int(math.log(age_days / self.first_tier_days, self.decay_factor)) + 1
+
+    def refresh_interval(self, age_days: float) -> timedelta:
+        interval_hours = self.base_interval_hours * self.decay_factor ** self.refresh_tier(
+            age_days
+        )
+        return min(timedelta(hours=interval_hours), timedelta(days=self.max_interval_days))
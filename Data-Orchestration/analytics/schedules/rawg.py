@@ -1,5 +1,185 @@
-from dagster import build_schedule_from_partitioned_job
+import datetime
+import os
 
+from dagster import (
+    AssetKey,
+    AssetRecordsFilter,
+    DefaultScheduleStatus,
+    RunRequest,
+    ScheduleEvaluationContext,
+    SkipReason,
+    build_schedule_from_partitioned_job,
+    schedule,
+)
+
+from analytics.assets.rawg import daily_partition
+from analytics.assets.rawg_fused import etl_asset_keys
 from analytics.jobs.rawg import run_rawg_etl
+from analytics.resources.quota import LOW_PRIORITY, NORMAL_PRIORITY, PRIORITY_TAG, RawgQuotaResource
+from analytics.resources.refresh_policy import RefreshPolicyResource
+from analytics.sensors.rawg import GAMES_PROBE_WINDOW_DAYS
 
 rawg_schedule = build_schedule_from_partitioned_job(job=run_rawg_etl)
+
+RAW_GAMES_KEY = AssetKey(["postgres", "raw_games"])
+
+# with RAWG_EMBEDDED_DIMENSIONS=true the genres, platforms, stores and tags endpoints are only swept for the
+# fields the objects embedded in games lack, e.g. games_count, so weekly by default
+REFERENCE_SWEEP_CRON = os.getenv("RAWG_REFERENCE_SWEEP_CRON", "0 3 * * 0")
+REFERENCE_ENTITIES = ["genres", "platforms", "stores", "tags"]
+
+
+def select_partitions_to_refresh(
+    partition_keys: list[str],
+    last_refreshed: dict[str, datetime.datetime],
+    api_calls: dict[str, int],
+    now: datetime.datetime,
+    policy: RefreshPolicyResource,
+) -> list[str]:
+    """
+    Picks the release date partitions that are due for a refresh within the API call budget.
+
+    Args:
+        partition_keys: All partition keys of daily_partition
+        last_refreshed: Partition key to time of the last raw_games materialisation
+        api_calls: Partition key to the API calls the last materialisation took, partitions without one
+            cost policy.unknown_partition_api_calls
+        now: Time of the schedule tick
+        policy: RefreshPolicyResource with the tiers and budget
+
+    Returns:
+        Partition keys to refresh, most overdue first
+    """
+    due = []
+    for partition_key in partition_keys:
+        age_days = (now.date() - datetime.date.fromisoformat(partition_key)).days
+        last = last_refreshed.get(partition_key)
+        if last is None:
+            overdue = float("inf")  # never extracted within the slowest tier
+        else:
+            overdue = (now - last) / policy.refresh_interval(age_days)
+        if overdue >= 1:
+            due.append((overdue, -age_days, partition_key))
+
+    # most overdue first, newer release dates first when equally overdue
+    due.sort(reverse=True)
+
+    selected = []
+    budget = policy.api_call_budget_per_tick
+    for _, _, partition_key in due:
+        cost = api_calls.get(partition_key, policy.unknown_partition_api_calls)
+        if cost > budget:
+            continue
+        budget -= cost
+        selected.append(partition_key)
+    return selected
+
+
+@schedule(
+    cron_schedule="*/15 * * * *",
+    target=etl_asset_keys("games"),
+    default_status=DefaultScheduleStatus.RUNNING,
+)
+def games_refresh_schedule(
+    context: ScheduleEvaluationContext,
+    games_refresh_policy: RefreshPolicyResource,
+    rawg_quota: RawgQuotaResource,
+):
+    """
+    re-extracts raw_games partitions on a cadence that decays with the age of the release date. the most
+    recent release dates are left to rawg_freshness_sensor, which only requests them when their probe
+    fingerprint changes
+
+    args:
+        context: ScheduleEvaluationContext
+        games_refresh_policy: RefreshPolicyResource
+        rawg_quota: RawgQuotaResource, refreshes of partitions past the first tier are low priority and
+            deferred while the API budget is low
+
+    returns:
+        RunRequests for the partitions that are due, within the per-tick API call budget
+    """
+    now = context.scheduled_execution_time or datetime.datetime.now(
+        datetime.timezone.utc
+    )
+    oldest = now - datetime.timedelta(days=games_refresh_policy.max_interval_days)
+
+    # latest materialisation per partition, records come back newest first
+    last_refreshed = {}
+    api_calls = {}
+    cursor = None
+    while True:
+        result = context.instance.fetch_materializations(
+            AssetRecordsFilter(asset_key=RAW_GAMES_KEY, after_timestamp=oldest.timestamp()),
+            limit=1000,
+            cursor=cursor,
+        )
+        for record in result.records:
+            if record.partition_key in last_refreshed:
+                continue
+            last_refreshed[record.partition_key] = datetime.datetime.fromtimestamp(
+                record.timestamp, tz=datetime.timezone.utc
+            )
+            calls = record.asset_materialization.metadata.get("api_calls")
+            if calls is not None:
+                api_calls[record.partition_key] = calls.value
+        if not result.has_more:
+            break
+        cursor = result.cursor
+
+    def priority(partition_key):
+        age_days = (now.date() - datetime.date.fromisoformat(partition_key)).days
+        return NORMAL_PRIORITY if games_refresh_policy.refresh_tier(age_days) == 0 else LOW_PRIORITY
+
+    # the partitions in the probe window of rawg_freshness_sensor, including those never extracted (a first
+    # probe always counts as changed), are re-extracted when their probe changes rather than every hour
+    partition_keys = daily_partition.get_partition_keys(current_time=now)
+    partition_keys = partition_keys[: max(len(partition_keys) - GAMES_PROBE_WINDOW_DAYS, 0)]
+    if not rawg_quota.allows(LOW_PRIORITY):
+        # deferred, they stay due and are requested again once the budget has headroom
+        partition_keys = [key for key in partition_keys if priority(key) != LOW_PRIORITY]
+
+    partition_keys = select_partitions_to_refresh(
+        partition_keys=partition_keys,
+        last_refreshed=last_refreshed,
+        api_calls=api_calls,
+        now=now,
+        policy=games_refresh_policy,
+    )
+    if not partition_keys:
+        return SkipReason("No raw_games partitions are due for a refresh")
+
+    context.log.info(f"GAMES: Refreshing {len(partition_keys)} partitions")
+    return [
+        RunRequest(
+            run_key=f"raw_games:{partition_key}:{now.isoformat()}",
+            partition_key=partition_key,
+            tags={PRIORITY_TAG: priority(partition_key)},
+        )
+        for partition_key in partition_keys
+    ]
+
+
+@schedule(
+    cron_schedule=REFERENCE_SWEEP_CRON,
+    target=[asset_key for entity in REFERENCE_ENTITIES for asset_key in etl_asset_keys(entity)],
+    default_status=DefaultScheduleStatus.RUNNING,
+)
+def reference_sweep_schedule(context: ScheduleEvaluationContext):
+    """
+    sweeps the genres, platforms, stores and tags endpoints for the latest partition, only loaded with
+    RAWG_EMBEDDED_DIMENSIONS=true as the freshness sensor probes them otherwise
+
+    args:
+        context: ScheduleEvaluationContext
+
+    returns:
+        RunRequest for the latest partition, low priority so it is deferred while the API budget is low
+    """
+    now = context.scheduled_execution_time or datetime.datetime.now(datetime.timezone.utc)
+    partition_key = daily_partition.get_partition_keys(current_time=now)[-1]
+    return RunRequest(
+        run_key=f"reference_sweep:{partition_key}:{now.isoformat()}",
+        partition_key=partition_key,
+        tags={PRIORITY_TAG: LOW_PRIORITY},
+    )
@@ -0,0 +1,51 @@
+import json
+
+from dagster import (
+    AssetSelection,
+    DefaultSensorStatus,
+    RunRequest,
+    SensorEvaluationContext,
+    SkipReason,
+    sensor,
+)
+
+from analytics.ops.common import fingerprint_records
+from analytics.resources.quota import RawgQuotaResource
+from analytics.sensors.rawg import PROBE_INTERVAL_SECONDS, probe_fingerprints
+
+# the airbyte connection syncs the whole catalogue, so each endpoint is probed without a date filter
+AIRBYTE_PROBES = {
+    "games": ("games", {"ordering": "-updated"}),
+    "genres": ("genres", {}),
+    "platforms": ("platforms", {}),
+    "stores": ("stores", {}),
+    "tags": ("tags", {}),
+}
+
+
+@sensor(
+    target=AssetSelection.groups("airbyte_assets"),
+    minimum_interval_seconds=PROBE_INTERVAL_SECONDS,
+    default_status=DefaultSensorStatus.RUNNING,
+)
+def airbyte_freshness_sensor(context: SensorEvaluationContext, rawg_quota: RawgQuotaResource):
+    """
+    requests an airbyte sync when any RAWG endpoint probe fingerprint changed since the last tick
+
+    args:
+        context: SensorEvaluationContext
+        rawg_quota: RawgQuotaResource
+
+    returns:
+        RunRequest for the airbyte assets, the cursor stores the last seen fingerprints
+    """
+    last_fingerprints = json.loads(context.cursor) if context.cursor else {}
+    fingerprints = {**last_fingerprints, **probe_fingerprints(
+        context, AIRBYTE_PROBES, rawg_quota, "airbyte_freshness_sensor"
+    )}
+
+    if fingerprints == last_fingerprints:
+        return SkipReason("No RAWG endpoint changed since the last probe")
+
+    context.update_cursor(json.dumps(fingerprints))
+    return RunRequest(run_key=fingerprint_records(fingerprints))
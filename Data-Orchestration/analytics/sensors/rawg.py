@@ -0,0 +1,203 @@
+import json
+import os
+import time
+
+import requests
+from dagster import (
+    AssetSelection,
+    DefaultSensorStatus,
+    EnvVar,
+    RunRequest,
+    SensorEvaluationContext,
+    SkipReason,
+    sensor,
+)
+
+from analytics.assets.rawg import CHECKPOINT_DIR, daily_partition, probe_rawg_endpoint
+from analytics.assets.rawg_embedded import EMBEDDED_DIMENSIONS
+from analytics.assets.rawg_fused import etl_asset_keys
+from analytics.ops.checkpoints import pending_checkpoints
+from analytics.ops.common import fingerprint_records
+from analytics.ops.instrumentation import quota_scope
+from analytics.resources.quota import (
+    LOW_PRIORITY,
+    NORMAL_PRIORITY,
+    PRIORITY_TAG,
+    QuotaExceeded,
+    RawgQuotaResource,
+)
+
+# games are partitioned by release date, so only the most recent release dates are probed every tick
+GAMES_PROBE_WINDOW_DAYS = int(os.getenv("RAWG_PROBE_WINDOW_DAYS", "7"))
+
+# seconds between probe ticks of the freshness sensors. every tick costs one call per probe, so the default
+# 7 + 4 probes every 15 minutes are ~1k calls a day (the airbyte sensor adds ~500) rather than ~23k a minutely
+# tick would spend before any extraction
+PROBE_INTERVAL_SECONDS = int(os.getenv("RAWG_PROBE_INTERVAL_SECONDS", "900"))
+
+# a checkpoint saved more recently than this is taken to belong to a run that is still extracting
+CHECKPOINT_IDLE_SECONDS = 300
+
+# genres, platforms, stores and tags are the same for every partition, so a change only refreshes the latest partition
+REFERENCE_PROBES = {
+    "raw_genres": "genres",
+    "raw_platforms": "platforms",
+    "raw_stores": "stores",
+    "raw_tags": "tags",
+}
+
+
+def probe_fingerprints(
+    context: SensorEvaluationContext, probes: dict, rawg_quota: RawgQuotaResource, sensor_name: str
+) -> dict:
+    """
+    Probes each RAWG endpoint with page_size=1 and fingerprints the count and first result.
+
+    Probes that fail (e.g. 429 rate limit) are logged and left out, so they are retried next tick.
+    The probes are recorded in the quota ledger. They are skipped once only the low priority reserve of
+    the budget is left, and stop once the budget is spent.
+
+    args:
+        context: SensorEvaluationContext
+        probes: mapping of probe name to (endpoint, query params)
+        rawg_quota: RawgQuotaResource
+        sensor_name: name the probes are recorded under in the quota ledger
+
+    returns:
+        Dictionary of probe name to fingerprint
+    """
+    api_key = EnvVar("api_key").get_value()
+    fingerprints = {}
+    # probes only spend what low priority work may, the reserve is kept for extraction
+    if not rawg_quota.allows(LOW_PRIORITY):
+        context.log.warning("PROBE: RAWG API budget is low, probing resumes once it has headroom")
+        return fingerprints
+    with quota_scope(rawg_quota, sensor_name, None, NORMAL_PRIORITY):
+        for probe_name, (endpoint, params) in probes.items():
+            try:
+                probe = probe_rawg_endpoint(api_key=api_key, endpoint=endpoint, **params)
+            except requests.RequestException as e:
+                context.log.warning(f"PROBE: Failed to probe {probe_name}, {e}")
+                continue
+            except QuotaExceeded:
+                context.log.warning("PROBE: RAWG API budget spent, the remaining probes wait for the next tick")
+                break
+            fingerprints[probe_name] = fingerprint_records(probe)
+    return fingerprints
+
+
+@sensor(
+    target=AssetSelection.assets(
+        *etl_asset_keys("games"),
+        *[
+            asset_key
+            for asset_name in REFERENCE_PROBES
+            for asset_key in etl_asset_keys(asset_name.removeprefix("raw_"))
+        ],
+    ),
+    minimum_interval_seconds=PROBE_INTERVAL_SECONDS,
+    default_status=DefaultSensorStatus.RUNNING,
+)
+def rawg_freshness_sensor(context: SensorEvaluationContext, rawg_quota: RawgQuotaResource):
+    """
+    requests raw_* partitions whose RAWG probe fingerprint changed since the last tick
+
+    args:
+        context: SensorEvaluationContext
+        rawg_quota: RawgQuotaResource
+
+    returns:
+        RunRequests for the changed partitions, the cursor stores the last seen fingerprints
+    """
+    partition_keys = daily_partition.get_partition_keys()
+    latest_partition = partition_keys[-1]
+
+    probes = {
+        f"raw_games:{partition_key}": (
+            "games",
+            {"dates": f"{partition_key},{partition_key}", "ordering": "-updated"},
+        )
+        for partition_key in partition_keys[-GAMES_PROBE_WINDOW_DAYS:]
+    }
+    # with embedded dimensions the names and slugs come with raw_games, the endpoints are swept by
+    # reference_sweep_schedule instead
+    for asset_name, endpoint in ({} if EMBEDDED_DIMENSIONS else REFERENCE_PROBES).items():
+        probes[f"{asset_name}:{latest_partition}"] = (endpoint, {})
+
+    last_fingerprints = json.loads(context.cursor) if context.cursor else {}
+    fingerprints = probe_fingerprints(context, probes, rawg_quota, "rawg_freshness_sensor")
+
+    changed = [
+        probe_name
+        for probe_name, fingerprint in fingerprints.items()
+        if last_fingerprints.get(probe_name) != fingerprint
+    ]
+    # partitions that have left the probe window are dropped from the cursor
+    context.update_cursor(
+        json.dumps(
+            {
+                probe_name: fingerprints.get(probe_name, last_fingerprints.get(probe_name))
+                for probe_name in probes
+                if probe_name in fingerprints or probe_name in last_fingerprints
+            }
+        )
+    )
+
+    if not changed:
+        return SkipReason("No RAWG endpoint changed since the last probe")
+
+    run_requests = []
+    for probe_name in changed:
+        asset_name, partition_key = probe_name.split(":")
+        run_requests.append(
+            RunRequest(
+                run_key=f"{probe_name}:{fingerprints[probe_name]}",
+                asset_selection=etl_asset_keys(asset_name.removeprefix("raw_")),
+                partition_key=partition_key,
+            )
+        )
+    return run_requests
+
+
+@sensor(
+    target=AssetSelection.assets(
+        *[
+            asset_key
+            for entity in ("games", "genres", "platforms", "stores", "tags")
+            for asset_key in etl_asset_keys(entity)
+        ]
+    ),
+    minimum_interval_seconds=600,
+    default_status=DefaultSensorStatus.RUNNING,
+)
+def checkpoint_resume_sensor(context: SensorEvaluationContext, rawg_quota: RawgQuotaResource):
+    """
+    requests a run for every checkpointed raw_* sweep that is unfinished, e.g. stopped by max_pages, a failed
+    page or the API budget, so it resumes after its last saved page
+
+    args:
+        context: SensorEvaluationContext
+        rawg_quota: RawgQuotaResource, the sweeps are low priority and wait while the API budget is low
+
+    returns:
+        RunRequests for the idle checkpoints
+    """
+    if not rawg_quota.allows(LOW_PRIORITY):
+        return SkipReason("RAWG API budget is low, checkpointed sweeps resume once it has headroom")
+
+    run_requests = []
+    for asset_name, partition_key, state in pending_checkpoints(CHECKPOINT_DIR):
+        if time.time() - state["saved_at"] < CHECKPOINT_IDLE_SECONDS:
+            continue
+        run_requests.append(
+            RunRequest(
+                # one run per saved page, a run that saves nothing new is not requested again
+                run_key=f"{asset_name}:{partition_key}:{state['page']}",
+                asset_selection=etl_asset_keys(asset_name.removeprefix("raw_")),
+                partition_key=partition_key,
+                tags={PRIORITY_TAG: LOW_PRIORITY},
+            )
+        )
+    if not run_requests:
+        return SkipReason("No checkpointed sweep to resume")
+    return run_requests
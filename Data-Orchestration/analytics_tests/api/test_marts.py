@@ -0,0 +1,94 @@
+from dagster import AssetMaterialization, instance_for_test
+
+from analytics.api.cache import MaterialisationWatcher, ResultCache
+from analytics.api.marts import MARTS, parse_query
+
+
+def test_result_cache_evicts_least_recently_used():
+    # ASSEMBLE
+    cache = ResultCache(max_entries=2)
+    cache.put("games_by_genre", ("a",), 1)
+    cache.put("games_by_genre", ("b",), 2)
+
+    # ACT
+    cache.get("games_by_genre", ("a",))
+    cache.put("games_tags_popularity", ("c",), 3)
+
+    # ASSERT
+    assert cache.get("games_by_genre", ("a",)) == 1
+    assert cache.get("games_by_genre", ("b",)) is None
+    assert cache.invalidate("games_by_genre") == 1
+    assert cache.get("games_tags_popularity", ("c",)) == 3
+
+
+def test_watcher_invalidates_materialised_marts():
+    # ASSEMBLE
+    cache = ResultCache()
+    asset_keys = {name: mart.asset_key for name, mart in MARTS.items()}
+    with instance_for_test() as instance:
+        watcher = MaterialisationWatcher(cache, asset_keys, instance)
+        watcher.poll()
+        cache.put("games_by_genre", ("a",), 1)
+        cache.put("games_tags_popularity", ("a",), 2)
+
+        # ACT
+        instance.report_runless_asset_event(
+            AssetMaterialization(asset_key=asset_keys["games_by_genre"])
+        )
+        invalidated = watcher.poll()
+
+    # ASSERT
+    assert invalidated == ["games_by_genre"]
+    assert cache.get("games_by_genre", ("a",)) is None
+    assert cache.get("games_tags_popularity", ("a",)) == 2
+
+
+def test_parse_query_top_without_rank_column_ends_the_page():
+    # ASSEMBLE
+    mart = MARTS["games_by_genre"]
+
+    # ACT
+    filters, top, limit, offset = parse_query(
+        mart, {"genre": ["Action"], "top": ["15"], "limit": ["10"], "offset": ["10"]}
+    )
+
+    # ASSERT
+    assert (filters, top, limit, offset) == ((("genre", "Action"),), 15, 5, 10)
+
+
+def test_marts_api_pages_and_caches():
+    from sqlalchemy import create_engine, event, text
+    from sqlalchemy.pool import StaticPool
+
+    from analytics.api.marts import MartsApi
+
+    # ASSEMBLE
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    event.listen(
+        engine, "connect", lambda connection, _: connection.execute("attach ':memory:' as marts")
+    )
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "create table marts.analysis_games_tags_popularity "
+                "(tag_id integer, tag_name text, tagged_game_count integer)"
+            )
+        )
+        connection.execute(
+            text("insert into marts.analysis_games_tags_popularity values (:id, :name, :count)"),
+            [{"id": i, "name": f"tag {i}", "count": 100 - i} for i in range(5)],
+        )
+    cache = ResultCache()
+    api = MartsApi(engine, cache)
+
+    # ACT
+    first_page = api.query("games_tags_popularity", {"limit": ["2"]})
+    last_page = api.query("games_tags_popularity", {"limit": ["2"], "offset": ["4"]})
+    api.query("games_tags_popularity", {"limit": ["2"]})
+
+    # ASSERT
+    assert [row["tag_id"] for row in first_page["rows"]] == [0, 1]
+    assert first_page["next_offset"] == 2
+    assert [row["tag_id"] for row in last_page["rows"]] == [4]
+    assert last_page["next_offset"] is None
+    assert (cache.hits, cache.misses) == (1, 2)
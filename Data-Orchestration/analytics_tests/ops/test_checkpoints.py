@@ -0,0 +1,26 @@
+import pytest
+
+from analytics.ops.checkpoints import CheckpointInUse, ExtractionCheckpoint
+
+
+def test_a_checkpoint_is_only_extracted_by_one_run_at_a_time(tmp_path):
+    # ASSEMBLE
+    first_run = ExtractionCheckpoint(str(tmp_path), "raw_tags", None)
+    first_run.resume()
+    first_run.save(1, [{"id": 31}])
+
+    # ACT / ASSERT
+    with pytest.raises(CheckpointInUse):
+        ExtractionCheckpoint(str(tmp_path), "raw_tags", None).resume()
+
+    first_run.finish(complete=False)
+    second_run = ExtractionCheckpoint(str(tmp_path), "raw_tags", None)
+    assert second_run.resume() == (2, [{"id": 31}])
+
+    # the lock outlives the checkpoint a complete sweep removes
+    second_run.save(2, [{"id": 40}])
+    second_run.finish(complete=True)
+    third_run = ExtractionCheckpoint(str(tmp_path), "raw_tags", None)
+    assert third_run.resume() == (1, [])
+    with pytest.raises(CheckpointInUse):
+        ExtractionCheckpoint(str(tmp_path), "raw_tags", None).resume()
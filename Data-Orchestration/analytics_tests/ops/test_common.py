@@ -0,0 +1,102 @@
+from dagster import asset, instance_for_test, materialize
+
+from analytics.assets.rawg import daily_partition, transformed_genres
+from analytics.ops.common import bootstrap_schema, build_upsert_statement, fingerprint_records
+
+
+def test_fingerprint_records():
+    # ASSEMBLE
+    first = [{"id": 1, "name": "Action", "games": [{"id": 3}]}]
+    same_but_reordered = [{"games": [{"id": 3}], "name": "Action", "id": 1}]
+    changed = [{"id": 1, "name": "Adventure", "games": [{"id": 3}]}]
+
+    # ACT / ASSERT
+    assert fingerprint_records(first) == fingerprint_records(same_but_reordered)
+    assert fingerprint_records(first) != fingerprint_records(changed)
+
+
+def test_memoised_transform_skips_unchanged_input():
+    # ASSEMBLE
+    genre = {
+        "id": 4,
+        "name": "Action",
+        "slug": "action",
+        "games_count": 180000,
+        "image_background": "https://media.rawg.io/action.jpg",
+        "games": [{"id": 3498, "slug": "grand-theft-auto-v"}],
+    }
+    raw_data = {"genres": [genre]}
+
+    @asset(partitions_def=daily_partition)
+    def raw_genres() -> list[dict]:
+        return raw_data["genres"]
+
+    def materialized_keys(instance):
+        result = materialize(
+            [raw_genres, transformed_genres],
+            instance=instance,
+            partition_key="2024-01-01",
+        )
+        return {
+            event.asset_key.to_user_string()
+            for event in result.get_asset_materialization_events()
+        }
+
+    # ACT / ASSERT
+    with instance_for_test() as instance:
+        assert materialized_keys(instance) == {"raw_genres", "transformed_genres"}
+        assert materialized_keys(instance) == {"raw_genres"}
+
+        raw_data["genres"] = [{**genre, "games_count": 180001}]
+        assert materialized_keys(instance) == {"raw_genres", "transformed_genres"}
+
+
+def test_bootstrap_schema_adds_new_columns_and_indexes_to_existing_tables():
+    from sqlalchemy import Column, Index, Integer, MetaData, Table, Text, create_engine, inspect
+
+    # ASSEMBLE
+    engine = create_engine("sqlite://")
+    Table("games", MetaData(), Column("game_id", Integer, primary_key=True)).create(engine)
+
+    metadata = MetaData()
+    games = Table(
+        "games",
+        metadata,
+        Column("game_id", Integer, primary_key=True),
+        Column("esrb_slug", Text),
+    )
+    Index("games_esrb_slug", games.c.esrb_slug)
+
+    # ACT
+    bootstrap_schema(engine, metadata)
+    bootstrap_schema(engine, metadata)  # idempotent
+
+    # ASSERT
+    inspector = inspect(engine)
+    assert [column["name"] for column in inspector.get_columns("games")] == ["game_id", "esrb_slug"]
+    assert [index["name"] for index in inspector.get_indexes("games")] == ["games_esrb_slug"]
+
+
+def test_upsert_of_partial_rows_only_updates_their_columns():
+    # ASSEMBLE
+    from sqlalchemy import Column, Integer, MetaData, Table, Text
+    from sqlalchemy.dialects import postgresql
+
+    genres = Table(
+        "genres",
+        MetaData(),
+        Column("genre_id", Integer, primary_key=True),
+        Column("name", Text),
+        Column("slug", Text),
+        Column("games_count", Integer),
+    )
+
+    # ACT
+    statement = build_upsert_statement([{"genre_id": 4, "name": "Action", "slug": "action"}], genres)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    # ASSERT
+    update = sql.split("DO UPDATE SET")[1]
+    assert "name = excluded.name" in update
+    assert "slug = excluded.slug" in update
+    assert "games_count" not in update
@@ -0,0 +1,34 @@
+import importlib
+
+import dagster
+
+# private dagster modules the code location relies on, with the names it uses from them. kept out of the
+# modules that import them, so an upgrade that moves them fails here with a reason rather than at collection
+PRIVATE_NAMES = {
+    "dagster._core.definitions.definitions_load_context": ["DefinitionsLoadContext", "DefinitionsLoadType"],
+}
+
+
+def test_dagster_definitions_load_context_is_where_dbt_manifest_expects():
+    # ASSEMBLE
+    failure = (
+        f"dagster {dagster.__version__} moved or changed a private module analytics/ops/dbt_manifest.py "
+        "imports. update its imports, then the dagster pin in pyproject.toml and setup.py"
+    )
+
+    # ACT
+    modules = {}
+    for module_name in PRIVATE_NAMES:
+        try:
+            modules[module_name] = importlib.import_module(module_name)
+        except ImportError as e:
+            raise AssertionError(failure) from e
+
+    # ASSERT
+    for module_name, names in PRIVATE_NAMES.items():
+        for name in names:
+            assert hasattr(modules[module_name], name), failure
+    load_context = modules["dagster._core.definitions.definitions_load_context"]
+    assert hasattr(load_context.DefinitionsLoadType, "RECONSTRUCTION"), failure
+    for attribute in ("get", "load_type", "reconstruction_metadata", "add_to_pending_reconstruction_metadata"):
+        assert hasattr(load_context.DefinitionsLoadContext, attribute), failure
@@ -0,0 +1,131 @@
+import os
+
+from dagster._core.definitions.definitions_load_context import (  # type: ignore
+    DefinitionsLoadContext,
+    DefinitionsLoadType,
+)
+from dagster._core.definitions.repository_definition.repository_definition import (  # type: ignore
+    RepositoryLoadData,
+)
+
+from analytics.ops.dbt_manifest import (
+    DBT_MANIFEST_MAX_AGE_SECONDS,
+    dbt_project_fingerprint,
+    get_dbt_manifest_path,
+    load_dbt_manifest_path,
+)
+
+
+class StandInDbt:
+    """Writes a manifest where DbtCliResource.cli(["parse"]) would, and counts the parses."""
+
+    def __init__(self, project_dir, target=None):
+        self.project_dir = project_dir
+        self.target = target
+        self.parses = []
+
+    def cli(self, args, target_path):
+        self.parses.append(target_path)
+        self.project_dir.joinpath(target_path, "manifest.json").write_text('{"nodes": {}}')
+        return self
+
+    def wait(self):
+        return self
+
+
+def dbt_project(tmp_path):
+    project_dir = tmp_path / "warehouse"
+    project_dir.joinpath("models").mkdir(parents=True)
+    project_dir.joinpath("dbt_project.yml").write_text("name: 'rawg_warehouse'\n")
+    project_dir.joinpath("models", "games.sql").write_text("select 1 as game_id\n")
+    project_dir.joinpath("profiles.yml").write_text("dbname: '{{ env_var(\"DB_DATABASE_NAME\") }}'\n")
+    return project_dir
+
+
+def test_dbt_project_fingerprint(tmp_path, monkeypatch):
+    # ASSEMBLE
+    monkeypatch.delenv("DBT_PROFILES_DIR", raising=False)
+    monkeypatch.setenv("DB_DATABASE_NAME", "rawg")
+    project_dir = dbt_project(tmp_path)
+    fingerprint = dbt_project_fingerprint(project_dir)
+
+    # ACT / ASSERT
+    # generated files are not part of the project
+    project_dir.joinpath("target", "manifests").mkdir(parents=True)
+    project_dir.joinpath("target", "run_results.json").write_text("{}")
+    assert dbt_project_fingerprint(project_dir) == fingerprint
+
+    # the target and the environment the profile reads are
+    assert dbt_project_fingerprint(project_dir, "local") != fingerprint
+    monkeypatch.setenv("DB_DATABASE_NAME", "rawg_test")
+    assert dbt_project_fingerprint(project_dir) != fingerprint
+    monkeypatch.setenv("DB_DATABASE_NAME", "rawg")
+
+    project_dir.joinpath("models", "games.sql").write_text("select 2 as game_id\n")
+    assert dbt_project_fingerprint(project_dir) != fingerprint
+
+
+def test_get_dbt_manifest_path_parses_once_per_fingerprint(tmp_path, monkeypatch):
+    # ASSEMBLE
+    monkeypatch.delenv("DBT_PROFILES_DIR", raising=False)
+    project_dir = dbt_project(tmp_path)
+    dbt = StandInDbt(project_dir)
+
+    # ACT
+    manifest_path = get_dbt_manifest_path(dbt, project_dir)
+    cached_path = get_dbt_manifest_path(dbt, project_dir)
+
+    # ASSERT
+    assert manifest_path == cached_path
+    assert manifest_path.parent.name == dbt_project_fingerprint(project_dir)
+    assert len(dbt.parses) == 1
+    # parsed next to the cache and renamed into place, nothing else is left in it
+    assert [path.name for path in manifest_path.parent.parent.iterdir()] == [manifest_path.parent.name]
+
+
+def test_get_dbt_manifest_path_removes_old_manifests(tmp_path, monkeypatch):
+    # ASSEMBLE
+    monkeypatch.delenv("DBT_PROFILES_DIR", raising=False)
+    project_dir = dbt_project(tmp_path)
+    dbt = StandInDbt(project_dir)
+    old_manifest_path = get_dbt_manifest_path(dbt, project_dir)
+    project_dir.joinpath("models", "games.sql").write_text("select 2 as game_id\n")
+
+    # ACT
+    recent_manifest_path = get_dbt_manifest_path(dbt, project_dir)
+    recent_is_kept = old_manifest_path.exists()
+    stale = os.stat(old_manifest_path.parent).st_mtime - DBT_MANIFEST_MAX_AGE_SECONDS - 1
+    os.utime(old_manifest_path.parent, (stale, stale))
+    project_dir.joinpath("models", "games.sql").write_text("select 3 as game_id\n")
+    get_dbt_manifest_path(dbt, project_dir)
+
+    # ASSERT
+    # still loaded by processes on the previous version of the project until it is a day old
+    assert recent_is_kept
+    assert not old_manifest_path.exists()
+    assert recent_manifest_path.exists()
+
+
+def test_run_and_step_processes_reuse_the_manifest_the_code_location_loaded(tmp_path, monkeypatch):
+    # ASSEMBLE
+    monkeypatch.delenv("DBT_PROFILES_DIR", raising=False)
+    project_dir = dbt_project(tmp_path)
+    dbt = StandInDbt(project_dir)
+    with DefinitionsLoadContext.scoped(DefinitionsLoadContext(DefinitionsLoadType.INITIALIZATION)) as context:
+        manifest_path = load_dbt_manifest_path(dbt, project_dir)
+        reconstruction_metadata = context.get_pending_reconstruction_metadata()
+    # edited after the code location loaded, runs keep the definitions the code location serves
+    project_dir.joinpath("models", "games.sql").write_text("select 2 as game_id\n")
+
+    # ACT
+    with DefinitionsLoadContext.scoped(
+        DefinitionsLoadContext(
+            DefinitionsLoadType.RECONSTRUCTION,
+            RepositoryLoadData(reconstruction_metadata=reconstruction_metadata),
+        )
+    ):
+        reconstructed_path = load_dbt_manifest_path(dbt, project_dir)
+
+    # ASSERT
+    assert reconstructed_path == manifest_path
+    assert len(dbt.parses) == 1
@@ -0,0 +1,87 @@
+import logging
+
+from dagster import AssetKey
+
+from analytics.ops.dbt_runs import DbtRunConfig, dbt_run_args, model_timings
+
+# trimmed run_results.json of a dbt run, a model that ran and one that failed before executing
+RUN_RESULTS = {
+    "metadata": {"dbt_schema_version": "https://schemas.getdbt.com/dbt/run-results/v5.json"},
+    "results": [
+        {
+            "unique_id": "model.rawg_warehouse.dim_games",
+            "status": "success",
+            "execution_time": 1.75,
+            "timing": [
+                {
+                    "name": "compile",
+                    "started_at": "2024-01-01T00:00:00.000000Z",
+                    "completed_at": "2024-01-01T00:00:00.250000Z",
+                },
+                {
+                    "name": "execute",
+                    "started_at": "2024-01-01T00:00:00.250000Z",
+                    "completed_at": "2024-01-01T00:00:01.750000Z",
+                },
+            ],
+        },
+        {
+            "unique_id": "model.rawg_warehouse.report_games",
+            "status": "error",
+            "execution_time": 0.1,
+            "timing": [{"name": "compile", "started_at": None, "completed_at": None}],
+        },
+    ],
+}
+
+
+class StandInContext:
+    """The parts of the dbt_assets AssetExecutionContext that dbt_run_args reads."""
+
+    def __init__(self, asset_keys, selected_asset_keys):
+        self.assets_def = type("AssetsDefinition", (), {"keys": asset_keys})()
+        self.selected_asset_keys = selected_asset_keys
+        self.log = logging.getLogger("analytics_tests.dbt_runs")
+
+
+def test_model_timings():
+    # ACT
+    timings = model_timings(RUN_RESULTS)
+
+    # ASSERT
+    assert timings == {
+        "model.rawg_warehouse.dim_games": {
+            "status": "success",
+            "execution_time": 1.75,
+            "compile_time": 0.25,
+            "execute_time": 1.5,
+        },
+        # steps that never started are left out
+        "model.rawg_warehouse.report_games": {"status": "error", "execution_time": 0.1},
+    }
+
+
+def test_dbt_run_args(tmp_path):
+    # ASSEMBLE
+    asset_keys = {AssetKey(["dim_games"]), AssetKey(["report_games"])}
+    full = StandInContext(asset_keys, asset_keys)
+    subset = StandInContext(asset_keys, {AssetKey(["report_games"])})
+    state_dir = tmp_path / "state"
+
+    # ACT / ASSERT
+    # without a saved state there is nothing to compare against
+    assert dbt_run_args(full, DbtRunConfig(only_modified=True), state_dir) == ["run"]
+
+    state_dir.mkdir()
+    state_dir.joinpath("manifest.json").write_text("{}")
+    assert dbt_run_args(full, DbtRunConfig(only_modified=True), state_dir) == [
+        "run",
+        "--select",
+        "state:modified+",
+        "--defer",
+        "--state",
+        str(state_dir),
+    ]
+    assert dbt_run_args(full, DbtRunConfig(), state_dir) == ["run"]
+    # dagster-dbt selects the subset itself, state:modified+ would widen it
+    assert dbt_run_args(subset, DbtRunConfig(only_modified=True), state_dir) == ["run"]
@@ -0,0 +1,37 @@
+from analytics.ops import instrumentation
+from analytics.ops.instrumentation import instrument, instrumented_get, percentile, timed_statement
+
+
+class FakeResponse:
+    content = b"x" * 1024
+
+
+def test_instrument_records_requests_statements_and_throughput(monkeypatch):
+    # ASSEMBLE
+    monkeypatch.setattr(instrumentation.requests, "get", lambda url, **kwargs: FakeResponse())
+
+    # ACT
+    with instrument() as metrics:
+        for _ in range(3):
+            instrumented_get("https://api.rawg.io/api/games", params={"page": 1})
+        with timed_statement():
+            pass
+    instrumented_get("https://api.rawg.io/api/games")  # outside a stage, not recorded
+    metadata = metrics.as_metadata(rows=120)
+
+    # ASSERT
+    assert metadata["api_requests"] == 3
+    assert metadata["bytes_downloaded"] == 3072
+    assert metadata["statement_count"] == 1
+    assert metadata["rows"] == 120
+    assert {"api_latency_p50_ms", "api_latency_p95_ms", "api_latency_p99_ms", "rows_per_second"} <= set(metadata)
+
+
+def test_percentile():
+    # ASSEMBLE
+    values = [float(i) for i in range(1, 101)]
+
+    # ACT / ASSERT
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([7.0], 95) == 7.0
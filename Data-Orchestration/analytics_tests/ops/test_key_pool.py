@@ -0,0 +1,88 @@
+import time
+
+import pytest
+import requests
+
+from analytics.ops.instrumentation import instrumented_get, key_rotation
+from analytics.ops.key_pool import (
+    LEAST_RECENTLY_THROTTLED,
+    MAX_KEY_WAIT_SECONDS,
+    ApiKeyPool,
+    KeysCoolingDown,
+    NoApiKeys,
+)
+
+
+def test_key_pool_rotates_and_drops_rejected_keys():
+    # ASSEMBLE
+    pool = ApiKeyPool(["a", "b", "c", "a", ""])
+
+    # ACT
+    first_round = [pool.acquire() for _ in range(3)]
+    pool.release("b", 401)
+    pool.release("c", 429, retry_after="60")
+    after_rejections = [pool.acquire() for _ in range(2)]
+
+    # ASSERT
+    assert first_round == ["a", "b", "c"]
+    assert after_rejections == ["a", "a"]  # b is removed and c cools down for a minute
+    assert pool.as_metadata() == {
+        "api_keys_active": 1,
+        "api_keys_cooling_down": 1,
+        "api_keys_removed": 1,
+        "api_key_throttles": 1,
+    }
+
+
+def test_key_pool_prefers_the_least_recently_throttled_key():
+    # ASSEMBLE
+    pool = ApiKeyPool(["a", "b", "c"], strategy=LEAST_RECENTLY_THROTTLED, requests_per_second=1)
+
+    # ACT
+    for key in ("c", "a"):
+        pool.release(key, 429, retry_after="0")
+    picks = [pool.acquire() for _ in range(3)]
+
+    # ASSERT
+    # b was never throttled, then the keys wait out their one request a second in throttle order
+    assert picks == ["b", "c", "a"]
+
+
+def test_key_pool_needs_a_key():
+    # ACT / ASSERT
+    with pytest.raises(NoApiKeys):
+        ApiKeyPool(["", ""])
+
+
+def test_key_pool_stops_waiting_when_every_key_is_cooling_down():
+    # ASSEMBLE
+    pool = ApiKeyPool(["a"])
+    pool.release(pool.acquire(), 429)
+
+    # ACT / ASSERT
+    # the key cools down for a minute without a Retry-After
+    with pytest.raises(KeysCoolingDown):
+        pool.acquire(max_wait_seconds=1)
+
+
+def test_instrumented_get_returns_the_429_when_every_key_is_cooling_down(monkeypatch):
+    # ASSEMBLE
+    responses = []
+
+    def throttled_get(url, **kwargs):
+        response = requests.Response()
+        response.status_code = 429
+        responses.append(response)
+        return response
+
+    monkeypatch.setattr(requests, "get", throttled_get)
+
+    # ACT
+    started = time.monotonic()
+    with key_rotation(ApiKeyPool(["a"])):
+        response = instrumented_get("http://127.0.0.1:9/api/games")
+
+    # ASSERT
+    assert response.status_code == 429
+    assert len(responses) == 1
+    assert time.monotonic() - started < MAX_KEY_WAIT_SECONDS
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from dagster import asset, instance_for_test, materialize
+
+from analytics.assets.rawg import daily_partition, transformed_genres
+from analytics.ops.profiling import PROFILE_TAG, profiled
+
+
+def test_profiled_assets_link_their_profiles():
+    # ASSEMBLE
+    genre = {
+        "id": 4,
+        "name": "Action",
+        "slug": "action",
+        "games_count": 180000,
+        "image_background": "https://media.rawg.io/action.jpg",
+        "games": [{"id": 3498, "slug": "grand-theft-auto-v"}],
+    }
+
+    @asset(partitions_def=daily_partition)
+    @profiled
+    def raw_genres(context) -> list[dict]:
+        context.add_output_metadata({"api_calls": 1})
+        return [genre]
+
+    def materialization_metadata(instance, tags):
+        result = materialize(
+            [raw_genres, transformed_genres],
+            instance=instance,
+            partition_key="2024-01-01",
+            tags=tags,
+        )
+        return {
+            event.asset_key.to_user_string(): event.materialization.metadata
+            for event in result.get_asset_materialization_events()
+        }
+
+    with instance_for_test() as instance:
+        # ACT
+        unprofiled = materialization_metadata(instance, {})
+        profiled_run = materialization_metadata(instance, {PROFILE_TAG: "true"})
+
+        # ASSERT
+        assert "profile_cpu" not in unprofiled["raw_genres"]
+        assert profiled_run["raw_genres"]["api_calls"].value == 1
+        # the second run of the memoised transform is skipped, so only the extraction is profiled
+        assert set(profiled_run) == {"raw_genres"}
+        memory = Path(profiled_run["raw_genres"]["profile_memory"].value).read_text()
+        assert memory.startswith("peak traced memory")
+        assert Path(profiled_run["raw_genres"]["profile_cpu"].value).exists()
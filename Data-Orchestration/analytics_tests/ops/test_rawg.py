@@ -1,6 +1,12 @@
-from dagster import build_op_context
+import pytest
+from dagster import Failure, build_op_context
 
-from analytics.ops.rawg import transform_rawg
+import analytics.assets.rawg
+
+from analytics.ops.rawg import RAWGApiConfig, RAWGFetchConfig, extract_rawg, fetch_rawg_pages, transform_rawg
+from analytics.resources.quota import RawgQuotaResource
+from benchmarks.rawg_payloads import generate_games
+from benchmarks.rawg_server import RawgStandIn, serve_in_background
 
 
 def test_transform_rawg():
@@ -50,3 +56,43 @@ def test_transform_rawg():
 
     # ASSERT
     assert actual_data == expected_data
+
+
+def test_extract_rawg_fans_out_page_ranges_that_cover_the_partition(tmp_path):
+    # ASSEMBLE
+    server, base_url = serve_in_background(RawgStandIn(games=generate_games(200, games_per_day=100)))
+    rawg_quota = RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite"))
+    config = RAWGApiConfig(api_key="test", base_url=base_url, date="2024-01-02", pages_per_chunk=2)
+
+    # ACT
+    try:
+        chunks = list(extract_rawg(build_op_context(), config=config, rawg_quota=rawg_quota))
+        games = [
+            game
+            for chunk in chunks
+            for game in fetch_rawg_pages(
+                build_op_context(),
+                config=RAWGFetchConfig(api_key="test", base_url=base_url),
+                rawg_quota=rawg_quota,
+                page_range=chunk.value,
+            )
+        ]
+    finally:
+        server.shutdown()
+
+    # ASSERT
+    assert [chunk.mapping_key for chunk in chunks] == ["pages_1_2", "pages_3_3"]  # 100 games, 40 a page
+    assert len({game["id"] for game in games}) == 100
+    assert rawg_quota.usage()[0] == 4  # the count probe and three pages
+
+
+def test_extract_rawg_refuses_to_run_against_the_partitioned_games_table(monkeypatch, tmp_path):
+    # ASSEMBLE
+    monkeypatch.setattr(analytics.assets.rawg, "GAMES_PARTITIONED", True)
+    rawg_quota = RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite"))
+    config = RAWGApiConfig(api_key="test", base_url="http://127.0.0.1:9", date="2024-01-02")
+
+    # ACT / ASSERT
+    with pytest.raises(Failure):
+        list(extract_rawg(build_op_context(), config=config, rawg_quota=rawg_quota))
+    assert rawg_quota.usage()[0] == 0
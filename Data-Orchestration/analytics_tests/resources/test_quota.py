@@ -0,0 +1,80 @@
+import concurrent.futures
+import contextlib
+import contextvars
+
+import pytest
+from dagster import build_op_context
+
+from analytics.ops import instrumentation
+from analytics.ops.instrumentation import instrumented_get
+from analytics.resources.quota import PRIORITY_TAG, QuotaExceeded, RawgQuotaResource
+
+
+class FakeResponse:
+    content = b"{}"
+
+
+def test_quota_ledger_records_calls_and_enforces_budgets(monkeypatch, tmp_path):
+    # ASSEMBLE
+    monkeypatch.setattr(instrumentation.requests, "get", lambda url, **kwargs: FakeResponse())
+    rawg_quota = RawgQuotaResource(
+        ledger_path=str(tmp_path / "quota.sqlite"), daily_budget=10, low_priority_reserve=0.5
+    )
+    context = build_op_context(partition_key="2024-01-01")
+
+    # ACT
+    with rawg_quota.metered(context, "raw_games"):
+        for _ in range(4):
+            instrumented_get("https://api.rawg.io/api/games", params={"page": 1})
+        instrumented_get("https://api.rawg.io/api/games/3498")
+    instrumented_get("https://api.rawg.io/api/games")  # outside metered, not recorded
+    after_five = rawg_quota.headroom()
+
+    # ASSERT
+    assert after_five["quota_calls_today"] == 5
+    assert after_five["quota_daily_remaining"] == 5
+    # half the budget is reserved for normal priority work
+    assert not rawg_quota.allows("low")
+    with pytest.raises(QuotaExceeded):
+        with rawg_quota.metered(build_op_context(run_tags={PRIORITY_TAG: "low"}), "raw_games"):
+            pass
+    with pytest.raises(QuotaExceeded):
+        with rawg_quota.metered(context, "raw_genres"):
+            for _ in range(6):
+                instrumented_get("https://api.rawg.io/api/genres")
+    assert rawg_quota.headroom()["quota_daily_remaining"] == 0
+
+
+def test_quota_budget_holds_across_threads_and_processes(monkeypatch, tmp_path):
+    # ASSEMBLE
+    monkeypatch.setattr(instrumentation.requests, "get", lambda url, **kwargs: FakeResponse())
+    ledger_path = str(tmp_path / "quota.sqlite")
+    # one resource per run process, sharing the ledger file
+    runs = [RawgQuotaResource(ledger_path=ledger_path, daily_budget=25) for _ in range(2)]
+    refused = []
+
+    def request_until_refused():
+        while True:
+            try:
+                instrumented_get("https://api.rawg.io/api/games/3498")
+            except QuotaExceeded:
+                refused.append(1)
+                return
+
+    # ACT
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor, contextlib.ExitStack() as stack:
+        run_contexts = []
+        for partition_key, rawg_quota in zip(("2024-01-01", "2024-01-02"), runs):
+            stack.enter_context(rawg_quota.metered(build_op_context(partition_key=partition_key), "game_details"))
+            run_contexts.append(contextvars.copy_context())
+        futures = [
+            executor.submit(run_context.copy().run, request_until_refused)
+            for run_context in run_contexts
+            for _ in range(4)
+        ]
+        for future in futures:
+            future.result()
+
+    # ASSERT
+    assert runs[0].usage()[0] == 25
+    assert len(refused) == 8
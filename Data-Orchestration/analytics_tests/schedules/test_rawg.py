@@ -0,0 +1,83 @@
+import datetime
+
+from dagster import build_schedule_context, instance_for_test
+
+from analytics.resources.quota import RawgQuotaResource
+from analytics.resources.refresh_policy import RefreshPolicyResource
+from analytics.schedules.rawg import games_refresh_schedule, select_partitions_to_refresh
+
+
+def test_refresh_interval_decays_with_age():
+    # ASSEMBLE
+    policy = RefreshPolicyResource(max_interval_days=2)
+
+    # ACT / ASSERT
+    assert policy.refresh_interval(0) == datetime.timedelta(hours=1)
+    assert policy.refresh_interval(6) == datetime.timedelta(hours=1)
+    assert policy.refresh_interval(7) == datetime.timedelta(hours=2)
+    assert policy.refresh_interval(14) == datetime.timedelta(hours=4)
+    assert policy.refresh_interval(400) == datetime.timedelta(days=2)
+
+
+def test_select_partitions_to_refresh():
+    # ASSEMBLE
+    now = datetime.datetime(2024, 3, 1, 12, tzinfo=datetime.timezone.utc)
+    policy = RefreshPolicyResource(api_call_budget_per_tick=5)
+    partition_keys = ["2024-01-01", "2024-02-01", "2024-02-28", "2024-02-29"]
+    last_refreshed = {
+        "2024-01-01": now - datetime.timedelta(hours=2),  # 60 days old, not due for 16h
+        "2024-02-28": now - datetime.timedelta(hours=3),  # 2 days old, due every hour
+        "2024-02-29": now - datetime.timedelta(minutes=30),  # refreshed recently
+    }
+    api_calls = {"2024-02-01": 4, "2024-02-28": 2}
+
+    # ACT
+    selected = select_partitions_to_refresh(
+        partition_keys, last_refreshed, api_calls, now, policy
+    )
+
+    # ASSERT
+    # 2024-02-01 has never been extracted so comes first, then 2024-02-28 no longer fits the budget
+    assert selected == ["2024-02-01"]
+
+
+def test_never_extracted_partitions_are_priced_as_a_full_extraction():
+    # ASSEMBLE
+    now = datetime.datetime(2024, 3, 1, 12, tzinfo=datetime.timezone.utc)
+    policy = RefreshPolicyResource(api_call_budget_per_tick=100, unknown_partition_api_calls=20)
+    partition_keys = [f"2023-{month:02d}-01" for month in range(1, 13)]
+
+    # ACT
+    selected = select_partitions_to_refresh(partition_keys, {}, {}, now, policy)
+
+    # ASSERT
+    assert len(selected) == 5  # 5 x 20 calls, not 12 x 1
+
+
+def test_games_refresh_schedule_requests_due_partitions_outside_the_probe_window(tmp_path):
+    # ASSEMBLE
+    with instance_for_test() as instance:
+        context = build_schedule_context(
+            instance=instance,
+            scheduled_execution_time=datetime.datetime(
+                2024, 1, 20, tzinfo=datetime.timezone.utc
+            ),
+        )
+
+        # ACT
+        run_requests = games_refresh_schedule(
+            context,
+            games_refresh_policy=RefreshPolicyResource(),
+            rawg_quota=RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite")),
+        )
+
+    # ASSERT
+    # 2024-01-13 to 2024-01-19 are probed by rawg_freshness_sensor, the rest are never extracted so all due,
+    # newest first within 5 full extractions
+    assert [run_request.partition_key for run_request in run_requests] == [
+        "2024-01-12",
+        "2024-01-11",
+        "2024-01-10",
+        "2024-01-09",
+        "2024-01-08",
+    ]
@@ -0,0 +1,54 @@
+from dagster import RunRequest, SkipReason, build_sensor_context
+
+from analytics.resources.quota import RawgQuotaResource
+from analytics.sensors import rawg as rawg_sensors
+
+
+def test_rawg_freshness_sensor_requests_only_changed_probes(monkeypatch, tmp_path):
+    # ASSEMBLE
+    monkeypatch.setenv("api_key", "test")
+    counts = {}
+
+    def fake_probe(api_key, endpoint, **params):
+        return {"count": counts.get((endpoint, params.get("dates")), 0), "first": None}
+
+    monkeypatch.setattr(rawg_sensors, "probe_rawg_endpoint", fake_probe)
+    rawg_quota = RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite"))
+
+    # ACT
+    context = build_sensor_context(resources={"rawg_quota": rawg_quota})
+    first_tick = rawg_sensors.rawg_freshness_sensor(context)
+
+    context = build_sensor_context(cursor=context.cursor, resources={"rawg_quota": rawg_quota})
+    unchanged_tick = rawg_sensors.rawg_freshness_sensor(context)
+
+    counts[("tags", None)] = 9722
+    context = build_sensor_context(cursor=context.cursor, resources={"rawg_quota": rawg_quota})
+    changed_tick = rawg_sensors.rawg_freshness_sensor(context)
+
+    # ASSERT
+    assert len(first_tick) == rawg_sensors.GAMES_PROBE_WINDOW_DAYS + len(
+        rawg_sensors.REFERENCE_PROBES
+    )
+    assert isinstance(unchanged_tick, SkipReason)
+    assert len(changed_tick) == 1
+    assert isinstance(changed_tick[0], RunRequest)
+    assert changed_tick[0].asset_selection[0].path == ["postgres", "raw_tags"]
+
+
+def test_rawg_freshness_sensor_does_not_probe_into_the_budget_reserve(monkeypatch, tmp_path):
+    # ASSEMBLE
+    monkeypatch.setenv("api_key", "test")
+    probed = []
+    monkeypatch.setattr(
+        rawg_sensors, "probe_rawg_endpoint", lambda api_key, endpoint, **params: probed.append(endpoint)
+    )
+    rawg_quota = RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite"), daily_budget=100)
+    rawg_quota.record("raw_games", "2024-01-01", "games", calls=85)  # 15 left, within the 20% reserve
+
+    # ACT
+    tick = rawg_sensors.rawg_freshness_sensor(build_sensor_context(resources={"rawg_quota": rawg_quota}))
+
+    # ASSERT
+    assert isinstance(tick, SkipReason)
+    assert probed == []
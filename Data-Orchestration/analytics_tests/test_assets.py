@@ -1 +1,434 @@
+import pytest
+import requests
+from dagster import build_op_context, instance_for_test, materialize
 
+from analytics.assets import rawg, rawg_details, rawg_embedded, rawg_rollup
+from analytics.assets.rawg import (
+    RAWGApiConfig,
+    transform_games,
+    explode_game_links,
+    extract_games,
+    extract_genres,
+    extract_tags,
+    games_year_partitions,
+    load_games,
+    transform_genres,
+)
+from analytics.assets.rawg_details import GameDetailsConfig, fetch_changed_details
+from analytics.assets.rawg_embedded import explode_embedded_dimensions
+from analytics.assets.rawg_fused import build_fused_etl_asset
+from analytics.assets.rawg_rollup import ALL, rollup_deltas, rollup_state
+from analytics.ops.checkpoints import pending_checkpoints
+from analytics.ops.detail_cache import GameDetailCache
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+from analytics.resources.quota import RawgQuotaResource
+from benchmarks.rawg_payloads import generate_games, generate_genres, generate_tags
+from benchmarks.rawg_server import RawgStandIn, serve_in_background
+
+
+@pytest.fixture
+def postgres_conn():
+    # never connected to, the loads are replaced or skipped in these tests
+    return PostgresqlDatabaseResource(
+        DB_SERVER_NAME="localhost",
+        DB_DATABASE_NAME="rawg",
+        DB_USERNAME="postgres",
+        DB_PASSWORD="postgres",
+        DB_PORT="5432",
+    )
+
+
+def test_fused_etl_asset_materialises_every_key(postgres_conn, tmp_path):
+    # ASSEMBLE
+    genre = {
+        "id": 4,
+        "name": "Action",
+        "slug": "action",
+        "games_count": 180000,
+        "image_background": "https://media.rawg.io/action.jpg",
+        "games": [{"id": 3498, "slug": "grand-theft-auto-v"}],
+    }
+    loaded = []
+
+    def fake_extract(context, config):
+        return [genre], {"api_calls": 1, "genres_count": 1}
+
+    def fake_load(context, postgres_conn, transformed_genres):
+        loaded.append(transformed_genres)
+
+    fused_genres = build_fused_etl_asset(
+        "genres", fake_extract, transform_genres, fake_load
+    )
+    def materialized_keys(instance):
+        result = materialize(
+            [fused_genres],
+            instance=instance,
+            partition_key="2024-01-01",
+            resources={
+                "postgres_conn": postgres_conn,
+                "rawg_quota": RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite")),
+            },
+            run_config={"ops": {"fused_genres": {"config": {"api_key": "test"}}}},
+        )
+        return [
+            event.asset_key.to_user_string()
+            for event in result.get_asset_materialization_events()
+        ]
+
+    # ACT / ASSERT
+    with instance_for_test() as instance:
+        assert materialized_keys(instance) == [
+            "raw_genres",
+            "transformed_genres",
+            "genres",
+        ]
+        assert loaded[0][0]["genre_id"] == 4
+
+        # unchanged input: only the extraction is recorded, transform and load are memoised
+        assert materialized_keys(instance) == ["raw_genres"]
+        assert len(loaded) == 1
+
+
+def test_fused_games_feed_the_assets_downstream_of_raw_and_transformed_games(monkeypatch, postgres_conn, tmp_path):
+    # ASSEMBLE
+    raw_games = generate_games(5)
+    rolled_up = []
+    upserted_genres = []
+    monkeypatch.setattr(
+        rawg_rollup,
+        "apply_rollup_deltas",
+        lambda context, postgres_conn, transformed_games: rolled_up.append(transformed_games) or {},
+    )
+    monkeypatch.setattr(
+        rawg_embedded, "load_genres", lambda context, postgres_conn, rows: upserted_genres.extend(rows)
+    )
+    for load_name in ("load_platforms", "load_stores", "load_tags"):
+        monkeypatch.setattr(rawg_embedded, load_name, lambda context, postgres_conn, rows: None)
+
+    fused_games = build_fused_etl_asset(
+        "games",
+        lambda context, config: (raw_games, {"api_calls": 1, "games_count": len(raw_games)}),
+        transform_games,
+        lambda context, postgres_conn, transformed_games: None,
+    )
+
+    # ACT
+    with instance_for_test() as instance:
+        result = materialize(
+            [fused_games, rawg_rollup.games_rollup, rawg_embedded.embedded_dimensions],
+            instance=instance,
+            partition_key="2024-01-01",
+            resources={
+                "postgres_conn": postgres_conn,
+                "rawg_quota": RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite")),
+            },
+            run_config={"ops": {"fused_games": {"config": {"api_key": "test"}}}},
+        )
+
+    # ASSERT
+    assert result.success
+    assert {event.asset_key.to_user_string() for event in result.get_asset_materialization_events()} == {
+        "raw_games",
+        "transformed_games",
+        "games",
+        "games_rollup",
+        "embedded_dimensions",
+    }
+    assert [game["game_id"] for game in rolled_up[0]] == [game["id"] for game in raw_games]
+    assert upserted_genres
+
+
+def test_games_rollup_is_skipped_when_the_fused_transform_is_memoised(monkeypatch, postgres_conn, tmp_path):
+    # ASSEMBLE
+    raw_games = generate_games(5)
+    rolled_up = []
+    monkeypatch.setattr(
+        rawg_rollup,
+        "apply_rollup_deltas",
+        lambda context, postgres_conn, transformed_games: rolled_up.append(transformed_games) or {},
+    )
+    fused_games = build_fused_etl_asset(
+        "games",
+        lambda context, config: (raw_games, {"api_calls": 1, "games_count": len(raw_games)}),
+        transform_games,
+        lambda context, postgres_conn, transformed_games: None,
+    )
+
+    def materialized_keys(instance):
+        result = materialize(
+            [fused_games, rawg_rollup.games_rollup],
+            instance=instance,
+            partition_key="2024-01-01",
+            resources={
+                "postgres_conn": postgres_conn,
+                "rawg_quota": RawgQuotaResource(ledger_path=str(tmp_path / "quota.sqlite")),
+            },
+            run_config={"ops": {"fused_games": {"config": {"api_key": "test"}}}},
+        )
+        assert result.success
+        return {event.asset_key.to_user_string() for event in result.get_asset_materialization_events()}
+
+    # ACT / ASSERT
+    with instance_for_test() as instance:
+        assert "games_rollup" in materialized_keys(instance)
+
+        # unchanged input: the rollup is skipped with the transform instead of being rolled up again
+        assert materialized_keys(instance) == {"raw_games"}
+        assert len(rolled_up) == 1
+
+
+def test_explode_game_links():
+    # ASSEMBLE
+    transformed_games = [
+        {
+            "game_id": 3498,
+            "tags": [{"id": 31, "name": "Singleplayer"}, {"id": 31, "name": "Singleplayer"}],
+            "genres": [{"id": 4, "name": "Action"}],
+            "platforms": [{"platform": {"id": 187, "name": "PlayStation 5"}}],
+            "stores": [{"id": 290375, "store": {"id": 3, "name": "PlayStation Store"}}],
+        },
+        {"game_id": 3328, "tags": [], "genres": float("nan"), "platforms": None, "stores": []},
+    ]
+
+    # ACT
+    links = explode_game_links(transformed_games)
+
+    # ASSERT
+    assert links == {
+        "game_tags": [{"game_id": 3498, "tag_id": 31}],
+        "game_genres": [{"game_id": 3498, "genre_id": 4}],
+        "game_platforms": [{"game_id": 3498, "platform_id": 187}],
+        "game_stores": [{"game_id": 3498, "store_id": 3}],
+    }
+
+
+def test_explode_embedded_dimensions():
+    # ASSEMBLE
+    raw_games = [
+        {
+            "id": 3498,
+            "genres": [{"id": 4, "name": "Action", "slug": "action"}],
+            "platforms": [{"platform": {"id": 187, "name": "PlayStation 5", "slug": "playstation5"}}],
+            "stores": [{"id": 290375, "store": {"id": 3, "name": "PlayStation Store", "slug": "playstation-store"}}],
+            "tags": [{"id": 31, "name": "Singleplayer", "slug": "singleplayer", "language": "eng", "games_count": 1}],
+        },
+        {
+            "id": 3328,
+            "genres": [{"id": 4, "name": "Action"}],
+            "platforms": None,
+            "stores": [],
+            "tags": [{"id": 31, "name": "Singleplayer", "slug": "singleplayer", "language": "eng", "games_count": 2}],
+        },
+    ]
+
+    # ACT
+    dimensions = explode_embedded_dimensions(raw_games)
+
+    # ASSERT
+    assert dimensions == {
+        "genres": [{"genre_id": 4, "name": "Action", "slug": "action"}],
+        "platforms": [{"platform_id": 187, "name": "PlayStation 5", "slug": "playstation5"}],
+        "stores": [{"store_id": 3, "name": "PlayStation Store", "slug": "playstation-store"}],
+        "tags": [
+            {
+                "tag_id": 31,
+                "name": "Singleplayer",
+                "slug": "singleplayer",
+                "language": "eng",
+                "games_count": 2,
+            }
+        ],
+    }
+
+
+def test_games_year_partitions_cover_every_release_year():
+    # ASSEMBLE
+    transformed_games = [
+        {"game_id": 1, "released": "2023-12-31"},
+        {"game_id": 2, "released": "2024-01-01"},
+        {"game_id": 3, "released": "2024-06-15"},
+    ]
+
+    # ACT
+    partitions = games_year_partitions(transformed_games)
+
+    # ASSERT
+    assert partitions == {
+        "games_y2023": ("2023-01-01", "2024-01-01"),
+        "games_y2024": ("2024-01-01", "2025-01-01"),
+    }
+
+
+def test_load_games_removes_games_that_lost_their_release_date(monkeypatch, postgres_conn):
+    # ASSEMBLE
+    monkeypatch.setattr(rawg, "GAMES_PARTITIONED", True)
+    upserts = []
+    monkeypatch.setattr(rawg, "upsert_with_links_to_database", lambda **kwargs: upserts.append(kwargs))
+    transformed_games = [
+        {"game_id": 1, "released": "2024-01-01", "genres": [], "platforms": [], "stores": [], "tags": []},
+        {"game_id": 2, "released": None, "genres": [], "platforms": [], "stores": [], "tags": []},
+    ]
+
+    # ACT
+    load_games(build_op_context(), postgres_conn, transformed_games)
+
+    # ASSERT
+    (upsert,) = upserts
+    assert [game["game_id"] for game in upsert["data"]] == [1]
+    assert upsert["removed_keys"] == [2]
+    assert upsert["partitions"] == {"games_y2024": ("2024-01-01", "2025-01-01")}
+
+
+def test_rollup_deltas_move_a_game_between_tags():
+    # ASSEMBLE
+    game = {
+        "game_id": 3498,
+        "released": "2013-09-17",
+        "rating": 4.47,
+        "tags": [{"id": 31}],
+        "genres": [{"id": 4}],
+        "platforms": [{"platform": {"id": 187}}],
+    }
+    before = [rollup_state(game)]
+    after = [rollup_state({**game, "tags": [{"id": 40}], "rating": 4.5})]
+
+    # ACT
+    deltas = rollup_deltas(before, after)
+
+    # ASSERT
+    assert deltas[(31, ALL, ALL, ALL)] == [-1, -4.47, -1]
+    assert deltas[(40, 4, ALL, ALL)] == [1, 4.5, 1]
+    assert deltas[(ALL, ALL, ALL, 2010)][:1] == [0]  # still one game in the decade, only the rating moved
+    assert rollup_deltas(after, after) == {}
+
+
+def test_extract_follows_next_pages_of_the_local_rawg_server():
+    # ASSEMBLE
+    stand_in = RawgStandIn(
+        games=generate_games(200, games_per_day=100),
+        reference={"genres": generate_genres(45)},
+    )
+    server, base_url = serve_in_background(stand_in)
+    config = RAWGApiConfig(api_key="test", base_url=base_url)
+
+    # ACT
+    try:
+        games, games_metadata = extract_games(build_op_context(partition_key="2024-01-02"), config)
+        genres, genres_metadata = extract_genres(build_op_context(partition_key="2024-01-02"), config)
+    finally:
+        server.shutdown()
+
+    # ASSERT
+    assert len(games) == 100 and {game["released"] for game in games} == {"2024-01-02"}
+    assert games_metadata["api_calls"] == 3  # 40 + 40 + 20, the last page has no next
+    assert [genre["id"] for genre in genres] == list(range(1, 46))
+    assert genres_metadata["api_calls"] == 3
+
+
+def test_checkpointed_tags_sweep_resumes_over_several_runs(monkeypatch, tmp_path):
+    # ASSEMBLE
+    stand_in = RawgStandIn(games=[], reference={"tags": generate_tags(200)})
+    server, base_url = serve_in_background(stand_in)
+    config = RAWGApiConfig(
+        api_key="test", base_url=base_url, max_pages=2, checkpoint=True, checkpoint_dir=str(tmp_path)
+    )
+    fetch_tags_page = rawg.fetch_tags_page
+
+    def fail_on_page_4(api_key, page=1, **kwargs):
+        if page == 4:
+            raise requests.HTTPError("502 Server Error")
+        return fetch_tags_page(api_key, page=page, **kwargs)
+
+    # ACT
+    try:
+        _, first_metadata = extract_tags(build_op_context(partition_key="2024-01-02"), config)
+        with monkeypatch.context() as patch:
+            patch.setattr(rawg, "fetch_tags_page", fail_on_page_4)
+            with pytest.raises(requests.HTTPError):
+                extract_tags(build_op_context(partition_key="2024-01-02"), config)
+        tags, last_metadata = extract_tags(build_op_context(partition_key="2024-01-02"), config)
+    finally:
+        server.shutdown()
+
+    # ASSERT
+    assert first_metadata["sweep_complete"] is False and first_metadata["checkpoint_page"] == 2
+    assert last_metadata["resumed_from_page"] == 4 and last_metadata["sweep_complete"] is True
+    assert last_metadata["api_calls"] == 2  # pages 4 and 5, the pages of the earlier runs were staged
+    assert [tag["id"] for tag in tags] == list(range(1, 201))
+    assert pending_checkpoints(str(tmp_path)) == []
+
+
+def test_game_details_are_only_fetched_for_new_and_updated_games(tmp_path):
+    # ASSEMBLE
+    raw_games = generate_games(30)
+    stand_in = RawgStandIn(games=raw_games)
+    server, base_url = serve_in_background(stand_in)
+    config = GameDetailsConfig(
+        api_key="test", base_url=base_url, concurrency=4, cache_path=str(tmp_path / "cache.sqlite")
+    )
+    context = build_op_context(partition_key="2024-01-01")
+
+    # ACT
+    try:
+        with GameDetailCache(config.cache_path) as cache:
+            first = fetch_changed_details(context, config, raw_games, cache)
+        raw_games[0] = {**raw_games[0], "updated": "2030-01-01T00:00:00"}
+        raw_games.append({"id": 999999, "updated": None})  # removed upstream, 404
+        requests_before = stand_in.requests
+        with GameDetailCache(config.cache_path) as cache:
+            second = fetch_changed_details(context, config, raw_games, cache)
+        requests_second = stand_in.requests - requests_before
+        with GameDetailCache(config.cache_path) as cache:
+            third = fetch_changed_details(context, config, raw_games, cache)
+        requests_third = stand_in.requests - requests_before - requests_second
+    finally:
+        server.shutdown()
+
+    # ASSERT
+    cache = GameDetailCache(config.cache_path)
+    no_failures = {"details_failed": 0, "failed_game_ids": []}
+    assert first == {"details_fetched": 30, "details_unchanged": 0, "details_missing": 0, **no_failures}
+    assert second == {"details_fetched": 1, "details_unchanged": 29, "details_missing": 1, **no_failures}
+    assert requests_second == 2
+    # the game that was not found is cached as a tombstone and not requested again
+    assert third == {"details_fetched": 0, "details_unchanged": 31, "details_missing": 0, **no_failures}
+    assert requests_third == 0
+    assert cache.updated([raw_games[0]["id"]]) == {raw_games[0]["id"]: "2030-01-01T00:00:00"}
+    assert 999999 not in cache.details([999999])
+
+
+def test_game_details_are_fetched_past_a_failed_game(monkeypatch, tmp_path):
+    # ASSEMBLE
+    raw_games = generate_games(10)
+    failing_game_id = raw_games[3]["id"]
+    server, base_url = serve_in_background(RawgStandIn(games=raw_games))
+    config = GameDetailsConfig(
+        api_key="test", base_url=base_url, concurrency=4, cache_path=str(tmp_path / "cache.sqlite")
+    )
+    fetch_game_detail = rawg_details.fetch_game_detail
+
+    def failing_fetch_game_detail(api_key, game_id, base_url):
+        if game_id == failing_game_id:
+            raise requests.HTTPError("500 Server Error")
+        return fetch_game_detail(api_key, game_id, base_url)
+
+    monkeypatch.setattr(rawg_details, "fetch_game_detail", failing_fetch_game_detail)
+
+    # ACT
+    try:
+        with GameDetailCache(config.cache_path) as cache:
+            counts = fetch_changed_details(build_op_context(partition_key="2024-01-01"), config, raw_games, cache)
+    finally:
+        server.shutdown()
+
+    # ASSERT
+    assert counts == {
+        "details_fetched": 9,
+        "details_unchanged": 0,
+        "details_missing": 0,
+        "details_failed": 1,
+        "failed_game_ids": [failing_game_id],
+    }
+    assert set(GameDetailCache(config.cache_path).updated([game["id"] for game in raw_games])) == {
+        game["id"] for game in raw_games if game["id"] != failing_game_id
+    }
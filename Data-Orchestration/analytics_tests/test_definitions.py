@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+
+from dagster import AssetKey, Definitions, instance_for_test
+
+import analytics.definitions
+
+# modules that only the transform/load steps or the dbt/airbyte definitions need
+HEAVY_MODULES = {"pandas", "sqlalchemy", "dagster_dbt", "dagster_airbyte", "dbt"}
+
+# time to import analytics.definitions on top of dagster itself
+IMPORT_TIME_BUDGET_US = 1_000_000
+
+# time for defs() to build the definitions, paid again by every run and step process
+DEFS_LOAD_BUDGET_SECONDS = 1.0
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Runs `python -X importtime` in a fresh interpreter and returns the cumulative time per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import dagster; import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_definitions_import_is_lazy():
+    # ACT
+    times = import_times("analytics.definitions")
+
+    # ASSERT
+    assert HEAVY_MODULES.isdisjoint(times)
+    assert times["analytics.definitions"] < IMPORT_TIME_BUDGET_US
+
+
+def test_definitions_load_is_lazy():
+    # ASSEMBLE
+    script = (
+        "import sys, time\n"
+        "import analytics.definitions\n"
+        "started = time.perf_counter()\n"
+        "analytics.definitions.defs()\n"
+        "print(time.perf_counter() - started)\n"
+        f"print(sorted(set({sorted(HEAVY_MODULES)!r}) & set(sys.modules)))\n"
+    )
+    env = {**os.environ, "ANALYTICS_LOAD_DBT": "false", "ANALYTICS_LOAD_AIRBYTE": "false"}
+
+    # ACT
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env)
+    seconds, heavy_modules = result.stdout.splitlines()
+
+    # ASSERT
+    assert float(seconds) < DEFS_LOAD_BUDGET_SECONDS
+    assert heavy_modules == "[]"
+
+
+def test_definitions_load_without_dbt_and_airbyte(monkeypatch):
+    # ASSEMBLE
+    monkeypatch.setattr(analytics.definitions, "LOAD_DBT", False)
+    monkeypatch.setattr(analytics.definitions, "LOAD_AIRBYTE", False)
+
+    # ACT / ASSERT
+    with instance_for_test():
+        defs = analytics.definitions.defs()
+        Definitions.validate_loadable(defs)
+        assert defs.resolve_job_def("run_rawg_etl")
+
+
+def test_games_rollup_reads_transformed_games_from_the_fused_step():
+    # ASSEMBLE
+    # the toggles are read at import, so the definitions are loaded in a fresh interpreter
+    script = (
+        "from dagster import AssetKey, Definitions\n"
+        "import analytics.definitions\n"
+        "defs = analytics.definitions.defs()\n"
+        "Definitions.validate_loadable(defs)\n"
+        "print(defs.resolve_assets_def(AssetKey(['postgres', 'transformed_games'])).node_def.name)\n"
+        "print(defs.resolve_asset_graph().get(AssetKey(['postgres', 'games_rollup'])).parent_keys)\n"
+    )
+    env = {
+        **os.environ,
+        "ANALYTICS_LOAD_DBT": "false",
+        "ANALYTICS_LOAD_AIRBYTE": "false",
+        "RAWG_FUSED_ETL": "true",
+    }
+
+    # ACT
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env)
+
+    # ASSERT
+    assert result.stdout.splitlines() == [
+        "fused_games",
+        str({AssetKey(["postgres", "transformed_games"])}),
+    ]
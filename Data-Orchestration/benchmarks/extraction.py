@@ -0,0 +1,113 @@
+"""Benchmarks the raw_games extraction against the local RAWG stand-in, without network access.
+
+Daily partitions are extracted with extract_games sequentially, concurrently like a backfill running
+several partitions at once, and through a page cache (cold, then warm), so changes to the raw_* assets
+can be compared on the same simulated latency. With --key-rate-limit the stand-in throttles each key,
+and the concurrent backfill is run with one key and with --keys keys from an ApiKeyPool.
+
+    python -m benchmarks.extraction --partitions 20 --games-per-day 120 --latency-ms 80 --concurrency 8
+    python -m benchmarks.extraction --key-rate-limit 5 --keys 4
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import time
+from unittest import mock
+
+from dagster import build_op_context
+
+from analytics.assets import rawg
+from analytics.ops.instrumentation import key_rotation
+from analytics.ops.key_pool import ApiKeyPool
+from benchmarks.rawg_payloads import generate_games
+from benchmarks.rawg_server import RawgStandIn, serve_in_background
+
+
+def extract_partition(base_url: str, partition_key: str, max_pages: int, key_pool: ApiKeyPool | None) -> int:
+    context = build_op_context(partition_key=partition_key)
+    config = rawg.RAWGApiConfig(api_key="benchmark", base_url=base_url, max_pages=max_pages)
+    if key_pool is None:
+        games, _ = rawg.extract_games(context, config)
+    else:
+        with key_rotation(key_pool):
+            games, _ = rawg.extract_games(context, config)
+    return len(games)
+
+
+def extract_all(
+    base_url: str,
+    partition_keys: list[str],
+    max_pages: int,
+    concurrency: int = 1,
+    key_pool: ApiKeyPool | None = None,
+) -> int:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return sum(
+            executor.map(lambda key: extract_partition(base_url, key, max_pages, key_pool), partition_keys)
+        )
+
+
+def cached_fetch_games_page():
+    """fetch_games_page behind an in-process page cache, the ceiling of caching unchanged pages."""
+    fetch = rawg.fetch_games_page
+    pages = {}
+
+    def cached(api_key, dt_range, page: int = 1, page_size: int = 40, base_url: str = rawg.RAWG_API_BASE_URL):
+        key = (base_url, dt_range, page, page_size)
+        if key not in pages:
+            pages[key] = fetch(api_key, dt_range, page=page, page_size=page_size, base_url=base_url)
+        return pages[key]
+
+    return cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--partitions", type=int, default=20)
+    parser.add_argument("--games-per-day", type=int, default=120)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--key-rate-limit", type=float, default=0.0, help="requests a second per key")
+    parser.add_argument("--keys", type=int, default=4)
+    args = parser.parse_args()
+
+    stand_in = RawgStandIn(
+        games=generate_games(args.partitions * args.games_per_day, games_per_day=args.games_per_day),
+        latency_ms=args.latency_ms,
+        key_rate_limit=args.key_rate_limit,
+    )
+    server, base_url = serve_in_background(stand_in)
+    start = datetime.date(2024, 1, 1)
+    partition_keys = [(start + datetime.timedelta(days=day)).isoformat() for day in range(args.partitions)]
+
+    def run(label, **kwargs):
+        requests_before = stand_in.requests
+        started = time.perf_counter()
+        games = extract_all(base_url, partition_keys, args.max_pages, **kwargs)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{label:>14}: {elapsed:7.2f}s  {games / elapsed:8.0f} games/s  "
+            f"{stand_in.requests - requests_before:5d} requests  {games} games"
+        )
+
+    try:
+        if args.key_rate_limit:
+            for keys in (1, args.keys):
+                key_pool = ApiKeyPool(
+                    [f"key-{i}" for i in range(keys)], requests_per_second=args.key_rate_limit
+                )
+                run(f"{keys} keys x{args.concurrency}", concurrency=args.concurrency, key_pool=key_pool)
+            return
+        run("sequential")
+        run(f"concurrent x{args.concurrency}", concurrency=args.concurrency)
+        with mock.patch.object(rawg, "fetch_games_page", cached_fetch_games_page()):
+            run("cached (cold)")
+            run("cached (warm)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmarks "games with tag X" containment queries with and without the games access paths.
+
+A copy of the games table, from the same definition as games, is filled with synthetic games in a local
+postgres (DB_* environment variables) and queried by scanning the tags json. bootstrap_schema then adds
+the generated id columns and GIN indexes that RAWG_GAMES_ACCESS_PATHS=true adds to an existing games
+table, and the table is queried again.
+
+    python -m benchmarks.games_access_paths --games 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from analytics.assets.rawg import games_table
+from analytics.ops.common import bootstrap_schema, create_database_engine
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+
+TABLE = "games_access_paths_benchmark"
+ESRB_SLUGS = ["everyone", "everyone-10-plus", "teen", "mature", "adults-only", "rating-pending"]
+
+
+def synthetic_game(game_id: int, rng: random.Random) -> dict:
+    return {
+        "game_id": game_id,
+        "tags": [{"id": t, "name": f"tag {t}"} for t in rng.sample(range(400), 20)],
+        "genres": [{"id": g, "name": f"genre {g}"} for g in rng.sample(range(19), 2)],
+        "platforms": [{"platform": {"id": p}} for p in rng.sample(range(50), 4)],
+        "stores": [{"id": game_id, "store": {"id": s}} for s in rng.sample(range(10), 3)],
+        "esrb_rating": {"slug": rng.choice(ESRB_SLUGS)},
+    }
+
+
+def time_queries(connection, queries: list[tuple[str, dict]], repeat: int) -> float:
+    """Returns the mean milliseconds per query."""
+    from sqlalchemy import text
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for sql, params in queries:
+            connection.execute(text(sql), params).fetchall()
+    return (time.perf_counter() - started) / (repeat * len(queries)) * 1000
+
+
+def main():
+    from sqlalchemy import MetaData, text
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_database_engine(
+        PostgresqlDatabaseResource(
+            DB_SERVER_NAME=os.getenv("DB_SERVER_NAME", "localhost"),
+            DB_DATABASE_NAME=os.environ["DB_DATABASE_NAME"],
+            DB_USERNAME=os.environ["DB_USERNAME"],
+            DB_PASSWORD=os.environ["DB_PASSWORD"],
+            DB_PORT=os.getenv("DB_PORT", "5432"),
+        )
+    )
+    rng = random.Random(0)
+    # the plain games table, as it is created without RAWG_GAMES_ACCESS_PATHS
+    games = games_table(MetaData(), TABLE, partitioned=False, access_paths=False)
+    games.drop(engine, checkfirst=True)
+    games.create(engine)
+    with engine.begin() as connection:
+        for start in range(0, args.games, 10000):
+            connection.execute(
+                games.insert(),
+                [synthetic_game(game_id, rng) for game_id in range(start, min(start + 10000, args.games))],
+            )
+        connection.execute(text(f"analyze {TABLE}"))
+
+    tag_ids = rng.sample(range(400), 10)
+    scans = [
+        (f"select game_id from {TABLE} where tags @> cast(:tags as jsonb)", {"tags": json.dumps([{"id": t}])})
+        for t in tag_ids
+    ] + [(f"select game_id from {TABLE} where esrb_rating ->> 'slug' = :slug", {"slug": "adults-only"})]
+    indexed = [
+        (f"select game_id from {TABLE} where tag_ids @> cast(:tag_ids as jsonb)", {"tag_ids": json.dumps([t])})
+        for t in tag_ids
+    ] + [(f"select game_id from {TABLE} where esrb_slug = :slug", {"slug": "adults-only"})]
+
+    with engine.connect() as connection:
+        before = time_queries(connection, scans, args.repeat)
+
+    # the same bootstrap that reaches an existing games table once RAWG_GAMES_ACCESS_PATHS is set
+    started = time.perf_counter()
+    bootstrap_schema(engine, games_table(MetaData(), TABLE, partitioned=False, access_paths=True).metadata)
+    with engine.begin() as connection:
+        connection.execute(text(f"analyze {TABLE}"))
+    bootstrap_seconds = time.perf_counter() - started
+
+    with engine.connect() as connection:
+        after = time_queries(connection, indexed, args.repeat)
+
+    print(f"{args.games} games")
+    print(f"  json scan: {before:8.2f}ms per query")
+    print(f"    indexed: {after:8.2f}ms per query ({before / after:.0f}x)")
+    print(f"  bootstrap: {bootstrap_seconds:8.2f}s to add the generated columns and indexes")
+
+    games.drop(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmarks the incremental and per-year games queries on a plain and a year partitioned games table.
+
+Two copies of games are filled with the same synthetic rows in a local postgres (DB_* environment
+variables): a plain heap with only its primary key, as games is created by default, and a table range
+partitioned by release year with a BRIN index on updated_at, as RAWG_GAMES_PARTITIONED=true creates it.
+Both are queried with the updated_at filter of the incremental staging model and with released ranges.
+
+    python -m benchmarks.games_partitioning --games 1000000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from analytics.ops.common import create_database_engine
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+
+PLAIN = "games_partitioning_benchmark_plain"
+PARTITIONED = "games_partitioning_benchmark_partitioned"
+FIRST_YEAR = 1990
+LAST_YEAR = 2025
+COLUMNS = (
+    "game_id integer not null, released date not null, updated_at timestamp, rating numeric(3, 2), "
+    "ratings_count integer, tags jsonb"
+)
+
+# rows are inserted in updated_at order, like the upserts that append changed games over time
+FILL = """
+insert into {table}
+select
+    i,
+    date '{first_year}-01-01' + (random() * (date '{end}' - date '{first_year}-01-01' - 1))::integer,
+    timestamp '2024-01-01' + i * interval '1 second',
+    round((random() * 5)::numeric, 2),
+    (random() * 10000)::integer,
+    jsonb_build_array(jsonb_build_object('id', (random() * 400)::integer))
+from generate_series(1, :games) as i
+"""
+
+
+def time_queries(connection, queries: list[tuple[str, dict]], repeat: int) -> float:
+    """Returns the mean milliseconds per query."""
+    from sqlalchemy import text
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for sql, params in queries:
+            connection.execute(text(sql), params).fetchall()
+    return (time.perf_counter() - started) / (repeat * len(queries)) * 1000
+
+
+def main():
+    from sqlalchemy import text
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--changed", type=int, default=5000, help="games changed since the last dbt run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_database_engine(
+        PostgresqlDatabaseResource(
+            DB_SERVER_NAME=os.getenv("DB_SERVER_NAME", "localhost"),
+            DB_DATABASE_NAME=os.environ["DB_DATABASE_NAME"],
+            DB_USERNAME=os.environ["DB_USERNAME"],
+            DB_PASSWORD=os.environ["DB_PASSWORD"],
+            DB_PORT=os.getenv("DB_PORT", "5432"),
+        )
+    )
+    fill = {"first_year": FIRST_YEAR, "end": f"{LAST_YEAR + 1}-01-01"}
+    with engine.begin() as connection:
+        for table in (PLAIN, PARTITIONED):
+            connection.execute(text(f"drop table if exists {table} cascade"))
+        connection.execute(text(f"create table {PLAIN} ({COLUMNS}, primary key (game_id))"))
+        connection.execute(
+            text(f"create table {PARTITIONED} ({COLUMNS}, primary key (game_id, released)) partition by range (released)")
+        )
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            connection.execute(
+                text(
+                    f"create table {PARTITIONED}_y{year} partition of {PARTITIONED} "
+                    f"for values from ('{year}-01-01') to ('{year + 1}-01-01')"
+                )
+            )
+        connection.execute(text(f"create index {PARTITIONED}_updated_at_brin on {PARTITIONED} using brin (updated_at)"))
+        for table in (PLAIN, PARTITIONED):
+            started = time.perf_counter()
+            connection.execute(text(FILL.format(table=table, **fill)), {"games": args.games})
+            print(f"{table}: filled in {time.perf_counter() - started:.1f}s")
+        for table in (PLAIN, PARTITIONED):
+            connection.execute(text(f"analyze {table}"))
+
+    rng = random.Random(0)
+    years = rng.sample(range(FIRST_YEAR, LAST_YEAR + 1), 5)
+    workloads = {
+        # the max(updated_at) of the staging model comes from the model itself, not from games
+        "incremental": lambda table: [
+            (
+                f"select * from {table} where updated_at > timestamp '2024-01-01' + :seen * interval '1 second'",
+                {"seen": args.games - args.changed},
+            )
+        ],
+        "per year": lambda table: [
+            (
+                f"select count(*), avg(rating) from {table} where released >= :start and released < :end",
+                {"start": f"{year}-01-01", "end": f"{year + 1}-01-01"},
+            )
+            for year in years
+        ],
+    }
+
+    print(f"{args.games} games, {args.changed} changed since the last run")
+    with engine.connect() as connection:
+        for name, queries in workloads.items():
+            plain = time_queries(connection, queries(PLAIN), args.repeat)
+            partitioned = time_queries(connection, queries(PARTITIONED), args.repeat)
+            print(
+                f"  {name:>11}: {plain:8.2f}ms plain  {partitioned:8.2f}ms partitioned "
+                f"({plain / partitioned:.1f}x)"
+            )
+
+    with engine.begin() as connection:
+        for table in (PLAIN, PARTITIONED):
+            connection.execute(text(f"drop table {table} cascade"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Load tests the marts API against a local postgres, with and without the result cache.
+
+The marts are filled with synthetic rows in MARTS_SCHEMA (default marts) when --seed is passed, so the
+benchmark does not need a dbt run. The connection is read from the DB_* environment variables.
+
+    python -m benchmarks.marts_api --seed --requests 5000 --concurrency 16
+"""
+
+import argparse
+import concurrent.futures
+import os
+import random
+import statistics
+import threading
+import time
+import urllib.request
+
+from analytics.api.cache import ResultCache
+from analytics.api.marts import MARTS_SCHEMA, build_server
+from analytics.ops.common import create_database_engine
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+
+
+def seed_marts(engine, platforms: int = 50, games_per_platform: int = 2000, genres: int = 19, tags: int = 400):
+    """Replaces the analysis marts with synthetic rows."""
+    from sqlalchemy import text
+
+    rng = random.Random(0)
+    with engine.begin() as connection:
+        connection.execute(text(f"create schema if not exists {MARTS_SCHEMA}"))
+        for statement in (
+            f"drop table if exists {MARTS_SCHEMA}.analysis_top_games_by_platform",
+            f"create table {MARTS_SCHEMA}.analysis_top_games_by_platform "
+            "(platform_name text, platform_rank integer, game_name text, rating numeric(3, 2))",
+            f"drop table if exists {MARTS_SCHEMA}.analysis_games_by_genre",
+            f"create table {MARTS_SCHEMA}.analysis_games_by_genre "
+            "(genre_id integer, genre_name text, game_count integer, avg_genre_rating numeric)",
+            f"drop table if exists {MARTS_SCHEMA}.analysis_games_tags_popularity",
+            f"create table {MARTS_SCHEMA}.analysis_games_tags_popularity "
+            "(tag_id integer, tag_name text, tagged_game_count integer)",
+        ):
+            connection.execute(text(statement))
+        connection.execute(
+            text(f"insert into {MARTS_SCHEMA}.analysis_top_games_by_platform values (:p, :r, :g, :rating)"),
+            [
+                {"p": f"platform {p}", "r": r + 1, "g": f"game {p}-{r}", "rating": round(5 - r * 5 / games_per_platform, 2)}
+                for p in range(platforms)
+                for r in range(games_per_platform)
+            ],
+        )
+        connection.execute(
+            text(f"insert into {MARTS_SCHEMA}.analysis_games_by_genre values (:id, :name, :count, :avg)"),
+            [{"id": g, "name": f"genre {g}", "count": rng.randint(1, 50000), "avg": rng.uniform(0, 5)} for g in range(genres)],
+        )
+        connection.execute(
+            text(f"insert into {MARTS_SCHEMA}.analysis_games_tags_popularity values (:id, :name, :count)"),
+            [{"id": t, "name": f"tag {t}", "count": rng.randint(1, 50000)} for t in range(tags)],
+        )
+
+
+def request_paths(requests: int, platforms: int = 50, seed: int = 0) -> list[str]:
+    """A mix of top-N and paginated requests, skewed towards a few popular queries like a dashboard."""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(requests):
+        kind = rng.random()
+        if kind < 0.5:
+            platform = min(int(rng.paretovariate(1.2)), platforms) - 1
+            paths.append(f"/marts/top_games_by_platform?platform=platform+{platform}&top=10")
+        elif kind < 0.8:
+            paths.append(f"/marts/games_tags_popularity?limit=20&offset={20 * rng.randint(0, 4)}")
+        else:
+            paths.append("/marts/games_by_genre?top=10")
+    return paths
+
+
+def load_test(base_url: str, paths: list[str], concurrency: int) -> dict:
+    def fetch(path):
+        started = time.perf_counter()
+        with urllib.request.urlopen(base_url + path) as response:
+            response.read()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(fetch, paths))
+    elapsed = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests_per_second": len(paths) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="replace the marts with synthetic rows first")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    engine = create_database_engine(
+        PostgresqlDatabaseResource(
+            DB_SERVER_NAME=os.getenv("DB_SERVER_NAME", "localhost"),
+            DB_DATABASE_NAME=os.environ["DB_DATABASE_NAME"],
+            DB_USERNAME=os.environ["DB_USERNAME"],
+            DB_PASSWORD=os.environ["DB_PASSWORD"],
+            DB_PORT=os.getenv("DB_PORT", "5432"),
+        )
+    )
+    if args.seed:
+        seed_marts(engine)
+
+    paths = request_paths(args.requests)
+    # max_entries=0 evicts every result as soon as it is cached
+    for label, cache in (("no cache", ResultCache(max_entries=0)), ("lru cache", ResultCache())):
+        server = build_server(engine, "127.0.0.1", 0, cache)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        result = load_test(f"http://127.0.0.1:{server.server_address[1]}", paths, args.concurrency)
+        server.shutdown()
+        print(
+            f"{label:>9}: {result['requests_per_second']:8.0f} req/s  p50 {result['p50_ms']:6.2f}ms  "
+            f"p95 {result['p95_ms']:6.2f}ms  p99 {result['p99_ms']:6.2f}ms  hit rate "
+            f"{cache.hits / max(cache.hits + cache.misses, 1):.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Synthetic RAWG API payloads for benchmarks.
+
+Modelled on the raw_* samples in the local Dagster storage (.tmp_dagster_home_*/storage/postgres/raw_*):
+games have nested platforms, stores, genres, tags, ratings and short_screenshots arrays, most have a null
+metacritic, esrb_rating and added_by_status, and a few have null platforms or stores or lack
+parent_platforms and community_rating. The same seed always gives the same payloads.
+"""
+
+import datetime
+import random
+
+TAG_LANGUAGES = ["eng", "rus"]
+RATING_TITLES = [(5, "exceptional"), (4, "recommended"), (3, "meh"), (1, "skip")]
+ESRB_RATINGS = [
+    (1, "Everyone", "everyone"),
+    (2, "Everyone 10+", "everyone-10-plus"),
+    (3, "Teen", "teen"),
+    (4, "Mature", "mature"),
+    (5, "Adults Only", "adults-only"),
+    (6, "Rating Pending", "rating-pending"),
+]
+
+# sizes of the reference endpoints, as in the stored samples
+TAGS_COUNT = 200
+GENRES_COUNT = 19
+PLATFORMS_COUNT = 51
+STORES_COUNT = 10
+
+
+def _image(rng: random.Random) -> str:
+    digest = "".join(rng.choice("0123456789abcdef") for _ in range(32))
+    return f"https://media.rawg.io/media/games/{digest[:3]}/{digest}.jpg"
+
+
+def _top_games(rng: random.Random, count: int = 6) -> list[dict]:
+    return [
+        {"id": rng.randint(1, 1_000_000), "slug": f"game-{i}", "name": f"Game {i}", "added": rng.randint(0, 25000)}
+        for i in range(count)
+    ]
+
+
+def generate_tags(count: int = TAGS_COUNT, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": tag_id,
+            "name": f"Tag {tag_id}",
+            "slug": f"tag-{tag_id}",
+            "games_count": rng.randint(1, 250000),
+            "image_background": _image(rng),
+            "language": rng.choice(TAG_LANGUAGES),
+            "games": _top_games(rng),
+        }
+        for tag_id in range(1, count + 1)
+    ]
+
+
+def generate_genres(count: int = GENRES_COUNT, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": genre_id,
+            "name": f"Genre {genre_id}",
+            "slug": f"genre-{genre_id}",
+            "games_count": rng.randint(1, 200000),
+            "image_background": _image(rng),
+            "games": _top_games(rng),
+        }
+        for genre_id in range(1, count + 1)
+    ]
+
+
+def generate_platforms(count: int = PLATFORMS_COUNT, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    platforms = []
+    for platform_id in range(1, count + 1):
+        year_start = rng.choice([None, rng.randint(1977, 2020)])
+        platforms.append(
+            {
+                "id": platform_id,
+                "name": f"Platform {platform_id}",
+                "slug": f"platform-{platform_id}",
+                "games_count": rng.randint(1, 560000),
+                "image_background": _image(rng),
+                "image": None,
+                "year_start": year_start,
+                "year_end": rng.choice([None, year_start + rng.randint(1, 15)]) if year_start else None,
+                "games": _top_games(rng),
+            }
+        )
+    return platforms
+
+
+def generate_stores(count: int = STORES_COUNT, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": store_id,
+            "name": f"Store {store_id}",
+            "domain": f"store{store_id}.example.com",
+            "slug": f"store-{store_id}",
+            "games_count": rng.randint(1, 125000),
+            "image_background": _image(rng),
+            "games": _top_games(rng),
+        }
+        for store_id in range(1, count + 1)
+    ]
+
+
+def generate_game(game_id: int, rng: random.Random, released: datetime.date) -> dict:
+    """One game as listed by /api/games."""
+    ratings_count = rng.choice([0, 0, 0, rng.randint(1, 5000)])
+    ratings = []
+    if ratings_count:
+        for rating_id, title in RATING_TITLES:
+            count = rng.randint(0, ratings_count)
+            ratings.append(
+                {"id": rating_id, "title": title, "count": count, "percent": round(100 * count / ratings_count, 2)}
+            )
+    platforms = [
+        {"platform": {"id": platform_id, "name": f"Platform {platform_id}", "slug": f"platform-{platform_id}"}}
+        for platform_id in rng.sample(range(1, PLATFORMS_COUNT + 1), rng.randint(1, 5))
+    ]
+    game = {
+        "slug": f"game-{game_id}",
+        "name": f"Game {game_id}",
+        "playtime": rng.choice([0, 0, rng.randint(1, 100)]),
+        "platforms": rng.choice([platforms] * 60 + [None]),
+        "stores": rng.choice(
+            [
+                [
+                    {"store": {"id": store_id, "name": f"Store {store_id}", "slug": f"store-{store_id}"}}
+                    for store_id in rng.sample(range(1, STORES_COUNT + 1), rng.randint(1, 3))
+                ]
+            ]
+            * 60
+            + [None]
+        ),
+        "released": released.isoformat(),
+        "tba": False,
+        "background_image": rng.choice([_image(rng), None]),
+        "rating": round(rng.uniform(0, 5), 2) if ratings_count else 0.0,
+        "rating_top": rng.choice([0, 3, 4, 5]),
+        "ratings": ratings,
+        "ratings_count": ratings_count,
+        "reviews_text_count": rng.randint(0, 50),
+        "added": rng.randint(0, 20000),
+        "added_by_status": rng.choice([None, None, {"yet": rng.randint(1, 50), "owned": rng.randint(0, 500)}]),
+        # mostly null like the API, NaN as it is after a json_normalize round trip
+        "metacritic": rng.choice([None] * 18 + [float("nan"), rng.randint(20, 100)]),
+        "suggestions_count": rng.randint(0, 600),
+        "updated": (
+            datetime.datetime.combine(released, datetime.time()) + datetime.timedelta(hours=rng.randint(0, 20000))
+        ).isoformat(),
+        "id": game_id,
+        "score": None,
+        "clip": None,
+        "tags": [
+            {
+                "id": tag_id,
+                "name": f"Tag {tag_id}",
+                "slug": f"tag-{tag_id}",
+                "language": rng.choice(TAG_LANGUAGES),
+                "games_count": rng.randint(1, 250000),
+                "image_background": _image(rng),
+            }
+            for tag_id in rng.sample(range(1, TAGS_COUNT + 1), rng.randint(0, 15))
+        ],
+        "esrb_rating": rng.choice([None] * 40 + [dict(zip(("id", "name", "slug"), rng.choice(ESRB_RATINGS)))]),
+        "user_game": None,
+        "reviews_count": ratings_count,
+        "saturated_color": "0f0f0f",
+        "dominant_color": "0f0f0f",
+        "short_screenshots": [
+            {"id": -1 if i == 0 else rng.randint(1, 5_000_000), "image": _image(rng)} for i in range(rng.randint(0, 7))
+        ],
+        "genres": [
+            {"id": genre_id, "name": f"Genre {genre_id}", "slug": f"genre-{genre_id}"}
+            for genre_id in rng.sample(range(1, GENRES_COUNT + 1), rng.randint(0, 3))
+        ],
+    }
+    if rng.random() > 0.01:
+        game["parent_platforms"] = [{"platform": p["platform"]} for p in platforms[:2]]
+    if rng.random() > 0.02:
+        game["community_rating"] = 0
+    return game
+
+
+def generate_games(
+    count: int, seed: int = 0, start_date: datetime.date = datetime.date(2024, 1, 1), games_per_day: int = 32
+) -> list[dict]:
+    """Games spread over release dates, by default at roughly the density of the stored raw_games partitions.
+
+    Args:
+        count: number of games
+        seed: random seed
+        start_date: first release date
+        games_per_day: games released on each date
+
+    Returns:
+        List of games as returned in the results of /api/games
+    """
+    rng = random.Random(seed)
+    return [
+        generate_game(1_000_000 + i, rng, start_date + datetime.timedelta(days=i // games_per_day)) for i in range(count)
+    ]
@@ -0,0 +1,238 @@
+"""Local RAWG compatible API server for offline extraction tests and benchmarks.
+
+Serves synthetic payloads from benchmarks.rawg_payloads with RAWG's pagination (count, next, previous,
+page_size capped at 40, 404 past the last page), the dates filter of /games and /games/{id}. Latency,
+random 429s, a per key rate limit and 401s for unknown keys can be injected. Responses can instead be recorded from the real API once and replayed.
+Point the pipeline at it with RAWG_API_BASE_URL=http://127.0.0.1:8081/api or base_url in the run config.
+
+    python -m benchmarks.rawg_server --port 8081 --games 10000 --latency-ms 50 --throttle-rate 0.01
+    python -m benchmarks.rawg_server --record recordings --upstream https://api.rawg.io/api
+    python -m benchmarks.rawg_server --replay recordings
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from benchmarks.rawg_payloads import (
+    generate_games,
+    generate_genres,
+    generate_platforms,
+    generate_stores,
+    generate_tags,
+)
+
+MAX_PAGE_SIZE = 40
+
+
+class RawgStandIn:
+    """Answers RAWG API requests from synthetic payloads or recordings."""
+
+    def __init__(
+        self,
+        games: list[dict] | None = None,
+        reference: dict[str, list[dict]] | None = None,
+        latency_ms: float = 0,
+        throttle_rate: float = 0.0,
+        key_rate_limit: float = 0.0,
+        valid_keys: set[str] | None = None,
+        seed: int = 0,
+        replay_dir: Path | None = None,
+        record_dir: Path | None = None,
+        upstream: str | None = None,
+    ):
+        self.games = games if games is not None else generate_games(1000)
+        self.games_by_id = {game["id"]: game for game in self.games}
+        self.reference = reference or {
+            "tags": generate_tags(),
+            "genres": generate_genres(),
+            "platforms": generate_platforms(),
+            "stores": generate_stores(),
+        }
+        self.latency_ms = latency_ms
+        self.throttle_rate = throttle_rate
+        self.key_rate_limit = key_rate_limit
+        self.valid_keys = valid_keys
+        self._key_requests = {}
+        self.replay_dir = replay_dir
+        self.record_dir = record_dir
+        self.upstream = upstream
+        self.requests = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def respond(self, base_url: str, path: str, query: dict[str, str]) -> tuple[int, dict]:
+        """Status and json body for a request, e.g. path=/api/games and query={"page": "2"}.
+
+        Args:
+            base_url: url of this server up to /api, used in next and previous
+            path: request path
+            query: query parameters, the api key is ignored
+        """
+        key = query.get("key")
+        if self.valid_keys is not None and key not in self.valid_keys:
+            return 401, {"error": "The key is invalid."}
+        with self._lock:
+            self.requests += 1
+            throttle = self._rng.random() < self.throttle_rate or self.over_key_rate(key)
+            if throttle:
+                self.throttled += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if throttle:
+            return 429, {"error": "The request was throttled."}
+
+        query = {name: value for name, value in query.items() if name != "key"}
+        endpoint = path.removeprefix("/api/").strip("/")
+        if self.record_dir is not None:
+            return self.record(base_url, endpoint, query)
+        if self.replay_dir is not None:
+            return self.replay(base_url, endpoint, query)
+
+        parts = endpoint.split("/")
+        if parts[0] == "games" and len(parts) == 2:
+            game = self.games_by_id.get(int(parts[1])) if parts[1].isdigit() else None
+            return (200, game) if game else (404, {"detail": "Not found."})
+        if parts[0] == "games" and len(parts) == 1:
+            results = self.games
+            if "dates" in query:
+                first, last = query["dates"].split(",")
+                results = [game for game in results if first <= game["released"] <= last]
+            return self.page(base_url, endpoint, query, results)
+        if len(parts) == 1 and parts[0] in self.reference:
+            return self.page(base_url, endpoint, query, self.reference[parts[0]])
+        return 404, {"detail": "Not found."}
+
+    def over_key_rate(self, key: str | None) -> bool:
+        """Counts the request against the key's rate, true once it made key_rate_limit requests in a second."""
+        if not self.key_rate_limit:
+            return False
+        now = time.monotonic()
+        recent = [at for at in self._key_requests.get(key, []) if at > now - 1]
+        if len(recent) >= self.key_rate_limit:
+            self._key_requests[key] = recent
+            return True
+        self._key_requests[key] = recent + [now]
+        return False
+
+    def page(self, base_url: str, endpoint: str, query: dict[str, str], results: list[dict]) -> tuple[int, dict]:
+        page = int(query.get("page", 1))
+        page_size = min(int(query.get("page_size", 20)), MAX_PAGE_SIZE)
+        start = (page - 1) * page_size
+        if page < 1 or (page > 1 and start >= len(results)):
+            return 404, {"detail": "Invalid page."}
+
+        def page_url(number):
+            return f"{base_url}/{endpoint}?{urlencode({**query, 'page': number})}"
+
+        return 200, {
+            "count": len(results),
+            "next": page_url(page + 1) if start + page_size < len(results) else None,
+            "previous": page_url(page - 1) if page > 1 else None,
+            "results": results[start : start + page_size],
+        }
+
+    def recording_path(self, directory: Path, endpoint: str, query: dict[str, str]) -> Path:
+        digest = hashlib.sha1(f"{endpoint}?{urlencode(sorted(query.items()))}".encode()).hexdigest()
+        return directory / f"{endpoint.replace('/', '_')}-{digest}.json"
+
+    def record(self, base_url: str, endpoint: str, query: dict[str, str]) -> tuple[int, dict]:
+        import requests
+
+        response = requests.get(f"{self.upstream}/{endpoint}", params={**query, "key": os.environ["api_key"]})
+        recording = {"status": response.status_code, "body": response.json()}
+        self.record_dir.mkdir(parents=True, exist_ok=True)
+        self.recording_path(self.record_dir, endpoint, query).write_text(json.dumps(recording))
+        return recording["status"], self.rewrite_links(recording["body"], base_url)
+
+    def replay(self, base_url: str, endpoint: str, query: dict[str, str]) -> tuple[int, dict]:
+        path = self.recording_path(self.replay_dir, endpoint, query)
+        if not path.exists():
+            return 404, {"detail": f"No recording of {endpoint} {query}"}
+        recording = json.loads(path.read_text())
+        return recording["status"], self.rewrite_links(recording["body"], base_url)
+
+    @staticmethod
+    def rewrite_links(body: dict, base_url: str) -> dict:
+        # recorded next and previous urls point at the real api and carry no key, so they are served
+        # relative to this server instead
+        for link in ("next", "previous"):
+            if isinstance(body, dict) and body.get(link):
+                body = {**body, link: base_url + "/" + body[link].split("/api/", 1)[-1]}
+        return body
+
+
+def build_handler(stand_in: RawgStandIn):
+    class RawgHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            base_url = f"http://{self.headers['Host']}/api"
+            status, body = stand_in.respond(base_url, url.path, dict(parse_qsl(url.query)))
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):  # access logs would dominate a benchmark
+            pass
+
+    return RawgHandler
+
+
+def build_server(stand_in: RawgStandIn, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer((host, port), build_handler(stand_in))
+
+
+def serve_in_background(stand_in: RawgStandIn) -> tuple[ThreadingHTTPServer, str]:
+    """Starts a server on a free port in a daemon thread.
+
+    Returns:
+        The server, shut it down with server.shutdown(), and its base url
+    """
+    server = build_server(stand_in)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--games-per-day", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--key-rate-limit", type=float, default=0.0, help="requests a second per key before 429")
+    parser.add_argument("--record", type=Path, metavar="DIR", help="proxy to --upstream and save the responses")
+    parser.add_argument("--upstream", default="https://api.rawg.io/api")
+    parser.add_argument("--replay", type=Path, metavar="DIR", help="serve responses saved with --record")
+    args = parser.parse_args()
+
+    stand_in = RawgStandIn(
+        games=generate_games(args.games, games_per_day=args.games_per_day),
+        latency_ms=args.latency_ms,
+        throttle_rate=args.throttle_rate,
+        key_rate_limit=args.key_rate_limit,
+        replay_dir=args.replay,
+        record_dir=args.record,
+        upstream=args.upstream,
+    )
+    server = build_server(stand_in, args.host, args.port)
+    print(f"Serving a RAWG stand-in on http://{args.host}:{args.port}/api")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
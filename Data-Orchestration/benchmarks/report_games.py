@@ -0,0 +1,192 @@
+"""Benchmarks the report_games model against the fan-out join it replaced, as dbt compiles them.
+
+Synthetic fact_games, dim_* and bridge_games_* tables are created in a local postgres (DB_* environment
+variables), in SCHEMA_PREFIX_marts so the real marts are left alone. models/marts/report_games.sql and the
+previous model kept in analyses/report_games_fan_out.sql are compiled by dbt against them with the local
+target, and each compiled query is materialised with CREATE TABLE AS, as dbt does for a table model.
+
+    python -m benchmarks.report_games --games 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import time
+from pathlib import Path
+
+from analytics.ops.common import create_database_engine
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+
+DBT_PROJECT_DIR = Path(__file__).parents[2].joinpath("Data-Transformation", "dbt", "warehouse")
+COMPILED_DIR = DBT_PROJECT_DIR.joinpath("target", "compiled", "rawg_warehouse")
+REPORTS = {
+    "fan_out": COMPILED_DIR.joinpath("analyses", "report_games_fan_out.sql"),
+    "aggregated": COMPILED_DIR.joinpath("models", "marts", "report_games.sql"),
+}
+
+# the models are compiled with --vars '{schema_prefix: ...}', see macros/generate_schema_name.sql
+SCHEMA_PREFIX = "report_games_benchmark"
+SCHEMA = f"{SCHEMA_PREFIX}_marts"
+
+DIMENSIONS = {
+    # dimension: (number of members, links per game)
+    "platforms": (50, 4),
+    "genres": (19, 2),
+    "stores": (10, 3),
+    "tags": (400, 20),
+}
+
+
+def build_warehouse(engine, games: int, seed: int = 0) -> None:
+    """Replaces the marts the report reads from in SCHEMA with synthetic games.
+
+    Args:
+        engine: sqlalchemy engine of the local postgres
+        games: number of games
+        seed: random seed, so runs are comparable
+    """
+    from sqlalchemy import text
+
+    rng = random.Random(seed)
+    with engine.begin() as connection:
+        connection.execute(text(f"drop schema if exists {SCHEMA} cascade"))
+        connection.execute(text(f"create schema {SCHEMA}"))
+        connection.execute(
+            text(
+                f"create table {SCHEMA}.fact_games (game_key text, rating numeric, ratings jsonb, "
+                "ratings_count integer, reviews_text_count integer, playtime integer, metacritic integer, "
+                "updated_at timestamp)"
+            )
+        )
+        connection.execute(
+            text(
+                f"create table {SCHEMA}.dim_games (game_key text, game_id integer, game_name text, "
+                "game_slug text, released date, esrb_rating text, updated_at timestamp)"
+            )
+        )
+        connection.execute(
+            text(f"insert into {SCHEMA}.fact_games values (:key, :rating, '[]', :count, 0, :playtime, :metacritic, now())"),
+            [
+                {
+                    "key": f"k{i}",
+                    "rating": round(rng.uniform(0, 5), 2),
+                    "count": rng.randint(0, 5000),
+                    "playtime": rng.randint(0, 100),
+                    "metacritic": rng.randint(20, 100),
+                }
+                for i in range(games)
+            ],
+        )
+        connection.execute(
+            text(f"insert into {SCHEMA}.dim_games values (:key, :id, :name, :slug, '2024-01-01', 'teen', now())"),
+            [{"key": f"k{i}", "id": i, "name": f"Game {i}", "slug": f"game-{i}"} for i in range(games)],
+        )
+
+        for dimension, (members, links_per_game) in DIMENSIONS.items():
+            singular = dimension[:-1]
+            extra = ", domain text" if dimension == "stores" else ""
+            connection.execute(
+                text(f"create table {SCHEMA}.dim_{dimension} ({singular}_id integer, {singular}_name text{extra})")
+            )
+            connection.execute(
+                text(f"insert into {SCHEMA}.dim_{dimension} values (:id, :name{', :domain' if extra else ''})"),
+                [
+                    {"id": m, "name": f"{singular} {m}", **({"domain": f"{singular}{m}.com"} if extra else {})}
+                    for m in range(members)
+                ],
+            )
+            connection.execute(
+                text(
+                    f"create table {SCHEMA}.bridge_games_{dimension} "
+                    f"(game_key text, {singular}_id integer, updated_at timestamp)"
+                )
+            )
+            connection.execute(
+                text(f"insert into {SCHEMA}.bridge_games_{dimension} values (:key, :id, now())"),
+                [
+                    {"key": f"k{i}", "id": m}
+                    for i in range(games)
+                    for m in rng.sample(range(members), links_per_game)
+                ],
+            )
+            connection.execute(
+                text(f"create index on {SCHEMA}.bridge_games_{dimension} (game_key)")
+            )
+        connection.execute(text("analyze"))
+
+
+def compile_reports() -> dict[str, str]:
+    """Compiles report_games and the fan-out baseline with dbt against the synthetic marts.
+
+    Returns:
+        Report name to compiled SQL
+    """
+    subprocess.run(
+        [
+            "dbt",
+            "--quiet",
+            "compile",
+            "--select",
+            "report_games",
+            "report_games_fan_out",
+            "--target",
+            "local",
+            "--vars",
+            json.dumps({"schema_prefix": SCHEMA_PREFIX}),
+            "--profiles-dir",
+            os.getenv("DBT_PROFILES_DIR", os.fspath(DBT_PROJECT_DIR)),
+        ],
+        cwd=DBT_PROJECT_DIR,
+        check=True,
+    )
+    return {name: path.read_text() for name, path in REPORTS.items()}
+
+
+def time_report(engine, name: str, query: str) -> tuple[float, int]:
+    """Materialises a report with CREATE TABLE AS.
+
+    Args:
+        engine: sqlalchemy engine of the local postgres
+        name: table name for the report
+        query: compiled report query
+
+    Returns:
+        Seconds taken and rows in the report
+    """
+    from sqlalchemy import text
+
+    with engine.begin() as connection:
+        connection.execute(text(f"drop table if exists {SCHEMA}.{name}"))
+        started = time.perf_counter()
+        connection.execute(text(f"create table {SCHEMA}.{name} as {query}"))
+        elapsed = time.perf_counter() - started
+        rows = connection.execute(text(f"select count(*) from {SCHEMA}.{name}")).scalar()
+    return elapsed, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_database_engine(
+        PostgresqlDatabaseResource(
+            DB_SERVER_NAME=os.getenv("DB_SERVER_NAME", "localhost"),
+            DB_DATABASE_NAME=os.environ["DB_DATABASE_NAME"],
+            DB_USERNAME=os.environ["DB_USERNAME"],
+            DB_PASSWORD=os.environ["DB_PASSWORD"],
+            DB_PORT=os.getenv("DB_PORT", "5432"),
+        )
+    )
+    build_warehouse(engine, args.games)
+    reports = compile_reports()
+    print(f"{args.games} games")
+    for name, query in reports.items():
+        elapsed, rows = time_report(engine, f"report_{name}", query)
+        print(f"{name:>10}: {elapsed:8.3f}s {rows:>10} rows ({rows / args.games:.0f} per game)")
+
+
+if __name__ == "__main__":
+    main()
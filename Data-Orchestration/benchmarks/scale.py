@@ -0,0 +1,140 @@
+"""Scale benchmarks of the RAWG transform and load stages on synthetic payloads.
+
+Each transform_* helper is timed on 10k and 100k synthetic games (and the fixed size reference
+endpoints), then run again under tracemalloc for its peak memory. With --load the load_* helpers are
+timed against the local postgres in the DB_* environment variables, which they write to, so point
+them at a scratch database. Results are saved as json so two versions can be compared.
+
+    python -m benchmarks.scale --sizes 10000 100000 1000000 --load --save before
+    python -m benchmarks.scale --save after --compare benchmarks/results/before.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+from dagster import build_op_context
+
+from analytics.assets import rawg
+from analytics.resources.postgresql import PostgresqlDatabaseResource
+from benchmarks.rawg_payloads import (
+    generate_games,
+    generate_genres,
+    generate_platforms,
+    generate_stores,
+    generate_tags,
+)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# reference endpoints do not grow with the backlog, they are benchmarked once at their real size
+REFERENCE_PAYLOADS = {
+    "tags": generate_tags,
+    "genres": generate_genres,
+    "platforms": generate_platforms,
+    "stores": generate_stores,
+}
+
+
+def measure(fn, *args, memory: bool = True) -> dict:
+    """Wall time of fn, then its peak traced memory in a second run as tracemalloc slows it down."""
+    gc.collect()
+    started = time.perf_counter()
+    result = fn(*args)
+    stage = {"seconds": round(time.perf_counter() - started, 3)}
+    if memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn(*args)
+            stage["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        finally:
+            tracemalloc.stop()
+    return stage
+
+
+def run_entity(entity: str, raw: list[dict], postgres_conn, memory: bool) -> dict:
+    context = build_op_context(partition_key="2024-01-01")
+    transform = getattr(rawg, f"transform_{entity}")
+    stages = {"transform": measure(transform, context, raw, memory=memory)}
+    if postgres_conn is not None:
+        transformed = transform(context, raw)
+        # the first load inserts, the second updates every row like a refresh of an unchanged partition
+        load = getattr(rawg, f"load_{entity}")
+        stages["load_insert"] = measure(load, context, postgres_conn, transformed, memory=False)
+        stages["load_update"] = measure(load, context, postgres_conn, transformed, memory=False)
+    return stages
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> None:
+    for name, stages in results["benchmarks"].items():
+        for stage, measured in stages.items():
+            before = baseline["benchmarks"].get(name, {}).get(stage)
+            if not before:
+                continue
+            line = f"{name:>14} {stage:<12} {before['seconds']:9.3f}s -> {measured['seconds']:9.3f}s"
+            line += f" ({(measured['seconds'] - before['seconds']) / before['seconds']:+.0%})"
+            if "peak_mb" in measured and "peak_mb" in before:
+                line += f"  {before['peak_mb']:8.1f}MB -> {measured['peak_mb']:8.1f}MB"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--load", action="store_true", help="also time the loads into the DB_* database")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--save", metavar="LABEL", help="save the results to benchmarks/results/LABEL.json")
+    parser.add_argument("--compare", metavar="PATH", help="results json to compare against")
+    args = parser.parse_args()
+
+    postgres_conn = None
+    if args.load:
+        postgres_conn = PostgresqlDatabaseResource(
+            DB_SERVER_NAME=os.getenv("DB_SERVER_NAME", "localhost"),
+            DB_DATABASE_NAME=os.environ["DB_DATABASE_NAME"],
+            DB_USERNAME=os.environ["DB_USERNAME"],
+            DB_PASSWORD=os.environ["DB_PASSWORD"],
+            DB_PORT=os.getenv("DB_PORT", "5432"),
+        )
+
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "benchmarks": {},
+    }
+    for size in args.sizes:
+        name = f"games_{size}"
+        results["benchmarks"][name] = run_entity("games", generate_games(size), postgres_conn, not args.no_memory)
+        print(name, results["benchmarks"][name])
+    for entity, generate in REFERENCE_PAYLOADS.items():
+        results["benchmarks"][entity] = run_entity(entity, generate(), postgres_conn, not args.no_memory)
+        print(entity, results["benchmarks"][entity])
+
+    if args.save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(results, indent=2))
+        print(f"Saved {path}")
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ from setuptools import find_packages, setup
 
 setup(
     name="analytics",
-    packages=find_packages(exclude=["analytics_tests"]),
-    install_requires=["dagster", "dagster-cloud"],
+    packages=find_packages(exclude=["analytics_tests", "benchmarks"]),
+    install_requires=["dagster>=1.13,<1.14", "dagster-cloud"],
     extras_require={"dev": ["dagster-webserver", "pytest"]},
 )
@@ -0,0 +1,31 @@
+-- the bridges read the links of each game from the link tables the RAWG assets load into the local postgres
+-- target (game_tags, game_genres, game_platforms, game_stores). on snowflake airbyte only syncs the games
+-- table, so the json arrays of games are flattened instead
+
+{% macro game_links(link_table, json_column, alias) -%}
+    {{ return(adapter.dispatch('game_links')(link_table, json_column, alias)) }}
+{%- endmacro %}
+
+{% macro default__game_links(link_table, json_column, alias) -%}
+    {{ json_array_elements('g.' ~ json_column, alias) }}
+{%- endmacro %}
+
+{% macro postgres__game_links(link_table, json_column, alias) -%}
+    join {{ source('rawg', link_table) }} {{ alias }}
+      on {{ alias }}.game_id = g.game_id
+{%- endmacro %}
+
+
+-- the linked id of a row of game_links, path is the list of keys in the json element e.g. ['platform', 'id']
+
+{% macro game_link_id(alias, id_column, path) -%}
+    {{ return(adapter.dispatch('game_link_id')(alias, id_column, path)) }}
+{%- endmacro %}
+
+{% macro default__game_link_id(alias, id_column, path) -%}
+    {{ json_element_integer(alias, path) }}
+{%- endmacro %}
+
+{% macro postgres__game_link_id(alias, id_column, path) -%}
+    {{ alias }}.{{ id_column }}
+{%- endmacro %}
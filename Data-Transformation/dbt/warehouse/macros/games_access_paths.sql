@@ -0,0 +1,13 @@
+-- with RAWG_GAMES_ACCESS_PATHS=true the games table stores generated columns (tag_ids, genre_ids,
+-- platform_ids, store_ids, esrb_slug) that are computed once per upsert. a model reads the stored column
+-- when the games source has it, and computes the same value from the json otherwise
+
+{% macro games_access_path(column, expression) -%}
+    {%- set source_columns = [] -%}
+    {%- if execute -%}
+        {%- for source_column in adapter.get_columns_in_relation(source('rawg', 'games')) -%}
+            {%- do source_columns.append(source_column.name | lower) -%}
+        {%- endfor -%}
+    {%- endif -%}
+    {{ column if column in source_columns else expression }}
+{%- endmacro %}
@@ -5,10 +5,15 @@
 
         {{ default_schema }}
 
+    {#- --vars '{schema_prefix: x}' builds into x_marts instead of the shared schema, e.g. for benchmarks -#}
+    {%- elif var("schema_prefix", none) -%}
+
+        {{ var("schema_prefix") }}_{{ custom_schema_name | trim }}
+
     {%- else -%}
 
         {{ custom_schema_name | trim }}
 
     {%- endif -%}
 
-{%- endmacro %}
\ No newline at end of file
+{%- endmacro %}
@@ -0,0 +1,46 @@
+-- the game marts are incremental on the updated_at of the staging games model, so each run only
+-- processes the games that changed since the last run instead of the whole catalogue
+
+-- the marts were tables without updated_at before they were incremental. on the first incremental run against
+-- such a table there is no high-water mark yet, so every game is processed and on_schema_change adds and fills
+-- updated_at, the same as a --full-refresh would
+
+{% macro has_high_water_mark(column="updated_at") -%}
+    {%- set target_columns = [] -%}
+    {%- if execute -%}
+        {%- for target_column in adapter.get_columns_in_relation(this) -%}
+            {%- do target_columns.append(target_column.name | lower) -%}
+        {%- endfor -%}
+    {%- endif -%}
+    {{ return(column in target_columns) }}
+{%- endmacro %}
+
+
+{% macro changed_since_last_run(column="updated_at") -%}
+    {% if is_incremental() and has_high_water_mark() %}
+    where {{ column }} > (select coalesce(max(updated_at), '1900-01-01') from {{ this }})
+    {% endif %}
+{%- endmacro %}
+
+
+-- the bridges keep the raw dimension id of every link and are not joined to the dim_* models. a game is only
+-- flattened once per update, so a link whose dimension row arrives in a later run would be dropped for good.
+-- the marts built on the bridges are tables, and their joins to dim_* pick those rows up on the next run
+
+-- delete+insert on game_key replaces the rows of every game in the batch, but a game whose tags (or genres,
+-- platforms, stores) are now empty has no rows in the batch. used as a pre_hook, this removes the bridge rows
+-- of every changed game first so removed links do not linger. without a high-water mark every game is in the
+-- batch, so every row is removed
+
+{% macro delete_changed_game_links() -%}
+    {% if is_incremental() and has_high_water_mark() %}
+    delete from {{ this }}
+    where game_key in (
+        select game_key
+        from {{ ref('dim_games') }}
+        where updated_at > (select coalesce(max(updated_at), '1900-01-01') from {{ this }})
+    )
+    {% elif is_incremental() %}
+    delete from {{ this }}
+    {% endif %}
+{%- endmacro %}
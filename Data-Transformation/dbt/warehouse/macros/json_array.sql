@@ -0,0 +1,44 @@
+-- the bridge tables flatten the json arrays of the games table, which is written differently on snowflake
+-- and on the local postgres target
+
+{% macro json_array_elements(column, alias) -%}
+    {{ return(adapter.dispatch('json_array_elements')(column, alias)) }}
+{%- endmacro %}
+
+{% macro default__json_array_elements(column, alias) -%}
+    , lateral flatten(input => parse_json({{ column }})) {{ alias }}
+{%- endmacro %}
+
+{% macro postgres__json_array_elements(column, alias) -%}
+    cross join lateral jsonb_array_elements({{ column }}::jsonb) as {{ alias }}(value)
+{%- endmacro %}
+
+
+-- reads an integer from a flattened element, path is the list of keys e.g. ['platform', 'id']
+
+{% macro json_element_integer(alias, path) -%}
+    {{ return(adapter.dispatch('json_element_integer')(alias, path)) }}
+{%- endmacro %}
+
+{% macro default__json_element_integer(alias, path) -%}
+    {{ alias }}.value:{{ path | join(':') }}::integer
+{%- endmacro %}
+
+{% macro postgres__json_element_integer(alias, path) -%}
+    ({{ alias }}.value #>> '{{ "{" ~ path | join(",") ~ "}" }}')::integer
+{%- endmacro %}
+
+
+-- reads a text value from a json object column, path is the list of keys e.g. ['slug']
+
+{% macro json_text(column, path) -%}
+    {{ return(adapter.dispatch('json_text')(column, path)) }}
+{%- endmacro %}
+
+{% macro default__json_text(column, path) -%}
+    parse_json({{ column }}):{{ path | join(':') }}::string
+{%- endmacro %}
+
+{% macro postgres__json_text(column, path) -%}
+    ({{ column }}::jsonb #>> '{{ "{" ~ path | join(",") ~ "}" }}')
+{%- endmacro %}
@@ -9,7 +9,7 @@
 
 select
     dgenres.genre_id,
-    dgenres.name as genre_name,
+    dgenres.genre_name,
     count(distinct bg.game_key) as game_count,
     avg(fg.rating) as avg_genre_rating
 from {{ ref('bridge_games_genres') }} bg
@@ -17,4 +17,4 @@ join {{ ref('dim_genres') }} dgenres
   on bg.genre_id = dgenres.genre_id
 join {{ ref('fact_games') }} fg
   on bg.game_key = fg.game_key
-group by dgenres.genre_id, dgenres.name
\ No newline at end of file
+group by dgenres.genre_id, dgenres.genre_name
\ No newline at end of file
@@ -1,7 +1,11 @@
 {{
     config(
-        materialized="table",
-        schema="marts"
+        materialized="incremental",
+        schema="marts",
+        unique_key=["game_key"],
+        incremental_strategy="delete+insert",
+        on_schema_change="append_new_columns",
+        pre_hook="{{ delete_changed_game_links() }}"
     )
 }}
 
@@ -10,15 +14,17 @@
 -- using this table, and joining with fact_games, dim_games and dim_genres,
 -- I'll be able to see what games are connected to what genre per row.
 
+-- incremental: only the games updated since the last run are flattened, see macros/incremental_games.sql
+
 select
 
     dg.game_key,  -- allows me to join to dim_games later
-    dgenres.genre_id     -- allows me to join to dim_genres later
+    {{ game_link_id('genres', 'genre_id', ['id']) }} as genre_id,    -- allows me to join to dim_genres later
+    g.updated_at  -- high-water mark for the next incremental run
 
 from {{ ref('games') }} g -- contains the column with the nested json of genres
 join {{ ref('dim_games') }} dg -- contains the surrogate_key used to identify games
 
   on g.game_id = dg.game_id -- join dim_games and games - now i have a table containing all my games, with their game_key and genres JSON
-, lateral flatten(input => parse_json(g.genres)) genres -- flatten the json of genres
-join {{ ref('dim_genres') }} dgenres -- match the genre_id from the flattened json to the id of the genre within dim_genres
-  on genres.value:id::integer = dgenres.genre_id
+{{ game_links('game_genres', 'genres', 'genres') }} -- one row per linked id of each game, see macros/game_links.sql
+{{ changed_since_last_run('g.updated_at') }}
@@ -1,18 +1,24 @@
 {{
     config(
-        materialized="table",
-        schema="marts"
+        materialized="incremental",
+        schema="marts",
+        unique_key=["game_key"],
+        incremental_strategy="delete+insert",
+        on_schema_change="append_new_columns",
+        pre_hook="{{ delete_changed_game_links() }}"
     )
 }}
 
+-- incremental: only the games updated since the last run are flattened, see macros/incremental_games.sql
+
 select
 
-    dg.game_key,                
-    dplatforms.platform_id      
+    dg.game_key,
+    {{ game_link_id('platforms', 'platform_id', ['platform', 'id']) }} as platform_id,
+    g.updated_at
 
 from {{ ref('games') }} g
 join {{ ref('dim_games') }} dg
   on g.game_id = dg.game_id
-, lateral flatten(input => parse_json(g.platforms)) platforms -- creates a table that has makes one row per element in array 
-join {{ ref('dim_platforms') }} dplatforms
-  on platforms.value:platform:id::integer = dplatforms.platform_id -- dig one level deeper than before platformms.values:platform:id
+{{ game_links('game_platforms', 'platforms', 'platforms') }} -- one row per linked id of each game, see macros/game_links.sql
+{{ changed_since_last_run('g.updated_at') }}
@@ -1,7 +1,11 @@
 {{
     config(
-        materialized="table",
-        schema="marts"
+        materialized="incremental",
+        schema="marts",
+        unique_key=["game_key"],
+        incremental_strategy="delete+insert",
+        on_schema_change="append_new_columns",
+        pre_hook="{{ delete_changed_game_links() }}"
     )
 }}
 
@@ -10,15 +14,17 @@
 -- using this table, and joining with fact_games, dim_games and dim_tags,
 -- I'll be able to see what games are connected to what genre per row.
 
+-- incremental: only the games updated since the last run are flattened, see macros/incremental_games.sql
+
 select
 
     dg.game_key,  -- allows me to join to dim_games later
-    dt.tag_id     -- allows me to join to dim_tags later
+    {{ game_link_id('t', 'tag_id', ['id']) }} as tag_id,    -- allows me to join to dim_tags later
+    g.updated_at  -- high-water mark for the next incremental run
 
 from {{ ref('games') }} g -- contains the column with the nested json of tags
 join {{ ref('dim_games') }} dg -- contains the surrogate_key used to identify games
 
   on g.game_id = dg.game_id -- join dim_games and games - now i have a table containing all my games, with their game_key and tags JSON
-, lateral flatten(input => parse_json(g.tags)) t -- flatten the json of tags
-join {{ ref('dim_tags') }} dt -- match the tag_id from the flattened json to the id of the tag within dim_tags
-  on t.value:id::integer = dt.tag_id
+{{ game_links('game_tags', 'tags', 't') }} -- one row per linked id of each game, see macros/game_links.sql
+{{ changed_since_last_run('g.updated_at') }}
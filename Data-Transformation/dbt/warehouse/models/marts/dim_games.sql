@@ -1,7 +1,10 @@
 {{ 
     config(
-        materialized = "table",
-        schema = "marts"
+        materialized = "incremental",
+        schema = "marts",
+        unique_key = ["game_key"],
+        incremental_strategy = "delete+insert",
+        on_schema_change = "append_new_columns"
     ) 
 }}
 
@@ -11,8 +14,11 @@ select
     name as game_name,
     slug as game_slug,
     released,
+    esrb_slug as esrb_rating,
     updated_at
 from {{ ref('games') }}
+-- only games updated since the last run, see macros/incremental_games.sql
+{{ changed_since_last_run() }}
 
 -- to do
 -- Dims: dim_games(done), dim_tags(done), dim_genres(done), dim_platforms(done), dim_stores()
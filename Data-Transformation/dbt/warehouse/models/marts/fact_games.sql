@@ -2,8 +2,11 @@
 
 {{ 
     config(
-        materialized = "table",
-        schema = "marts"
+        materialized = "incremental",
+        schema = "marts",
+        unique_key = ["game_key"],
+        incremental_strategy = "delete+insert",
+        on_schema_change = "append_new_columns"
     ) 
 }}
 
@@ -16,7 +19,10 @@ select
     g.ratings_count,
     g.reviews_text_count,
     g.playtime,
-    g.metacritic
+    g.metacritic,
+    g.updated_at -- high-water mark for the next incremental run
 from {{ ref('games') }} g
 join {{ ref('dim_games') }} dg
   on g.game_id = dg.game_id
+-- only games updated since the last run, see macros/incremental_games.sql
+{{ changed_since_last_run('g.updated_at') }}
@@ -5,21 +5,71 @@
     )
 }}
 
+-- one row per game. joining fact_games to all four bridges at once multiplied every game by
+-- platforms x genres x stores x tags, so each bridge is aggregated to one delimited column per game
+-- before it is joined. names are separated by '|' as they can contain commas
+
+with platforms as (
+    select
+        bgp.game_key,
+        count(*) as platform_count,
+        {{ dbt.listagg('dp.platform_name', "'|'", "order by dp.platform_name") }} as platform_names
+    from {{ ref('bridge_games_platforms') }} bgp
+    join {{ ref('dim_platforms') }} dp
+      on bgp.platform_id = dp.platform_id
+    group by bgp.game_key
+),
+
+genres as (
+    select
+        bgg.game_key,
+        count(*) as genre_count,
+        {{ dbt.listagg('dg2.genre_name', "'|'", "order by dg2.genre_name") }} as genre_names
+    from {{ ref('bridge_games_genres') }} bgg
+    join {{ ref('dim_genres') }} dg2
+      on bgg.genre_id = dg2.genre_id
+    group by bgg.game_key
+),
+
+stores as (
+    select
+        bgs.game_key,
+        count(*) as store_count,
+        {{ dbt.listagg('ds.store_name', "'|'", "order by ds.store_name") }} as store_names,
+        {{ dbt.listagg('ds.domain', "'|'", "order by ds.store_name") }} as store_domains
+    from {{ ref('bridge_games_stores') }} bgs
+    join {{ ref('dim_stores') }} ds
+      on bgs.store_id = ds.store_id
+    group by bgs.game_key
+),
+
+tags as (
+    select
+        bgt.game_key,
+        count(*) as tag_count,
+        {{ dbt.listagg('dt.tag_name', "'|'", "order by dt.tag_name") }} as tag_names
+    from {{ ref('bridge_games_tags') }} bgt
+    join {{ ref('dim_tags') }} dt
+      on bgt.tag_id = dt.tag_id
+    group by bgt.game_key
+)
+
 select
-    {{ dbt_utils.star(from=ref('fact_games'), relation_alias='fg', except=["game_key"]) }},
+    {{ dbt_utils.star(from=ref('fact_games'), relation_alias='fg', except=["game_key", "updated_at"]) }},
     {{ dbt_utils.star(from=ref('dim_games'), relation_alias='dg', except=["game_key"]) }},
-    {{ dbt_utils.star(from=ref('dim_platforms'), relation_alias='dp', except=["platform_id"]) }},
-    {{ dbt_utils.star(from=ref('dim_genres'), relation_alias='dg2', except=["genre_id"]) }},
-    {{ dbt_utils.star(from=ref('dim_stores'), relation_alias='ds', except=["store_id"]) }},
-    {{ dbt_utils.star(from=ref('dim_tags'), relation_alias='dt', except=["tag_id"]) }}
+    coalesce(platforms.platform_count, 0) as platform_count,
+    platforms.platform_names,
+    coalesce(genres.genre_count, 0) as genre_count,
+    genres.genre_names,
+    coalesce(stores.store_count, 0) as store_count,
+    stores.store_names,
+    stores.store_domains,
+    coalesce(tags.tag_count, 0) as tag_count,
+    tags.tag_names
 
 from {{ ref('fact_games') }} as fg
 left join {{ ref('dim_games') }} as dg on fg.game_key = dg.game_key
-left join {{ ref('bridge_games_platforms') }} as bgp on fg.game_key = bgp.game_key
-left join {{ ref('dim_platforms') }} as dp on bgp.platform_id = dp.platform_id
-left join {{ ref('bridge_games_genres') }} as bgg on fg.game_key = bgg.game_key
-left join {{ ref('dim_genres') }} as dg2 on bgg.genre_id = dg2.genre_id
-left join {{ ref('bridge_games_stores') }} as bgs on fg.game_key = bgs.game_key
-left join {{ ref('dim_stores') }} as ds on bgs.store_id = ds.store_id
-left join {{ ref('bridge_games_tags') }} as bgt on fg.game_key = bgt.game_key
-left join {{ ref('dim_tags') }} as dt on bgt.tag_id = dt.tag_id
\ No newline at end of file
+left join platforms on fg.game_key = platforms.game_key
+left join genres on fg.game_key = genres.game_key
+left join stores on fg.game_key = stores.game_key
+left join tags on fg.game_key = tags.game_key
@@ -3,7 +3,8 @@
         materialized="incremental",
         unique_key=["game_id"],
         schema="staging",
-        incremental_strategy="delete+insert"
+        incremental_strategy="delete+insert",
+        on_schema_change="append_new_columns"
         )
 }}
 
@@ -24,7 +25,8 @@ select
     RATING_TOP,
     UPDATED_AT,
     RATINGS_COUNT,
-    REVIEWS_TEXT_COUNT
+    REVIEWS_TEXT_COUNT,
+    {{ games_access_path('esrb_slug', json_text('ESRB_RATING', ['slug'])) }} as ESRB_SLUG -- see macros/games_access_paths.sql
 from {{ source('rawg', 'games') }} -- see sources.yml: rawg is the name of the source not the name of the server, games is the table
 
 {% if is_incremental() %}